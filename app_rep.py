@@ -1,5 +1,8 @@
 import pandas as pd
+import numpy as np
 import json
+import os
+import re
 
 # Thresholds
 thresholds = {
@@ -39,6 +42,101 @@ def calculate_points(value, stat_name):
     else:
         return 0
 
+# Lower is better for these stats
+INVERTED_STATS = {"max_shot_inconsistency"}
+
+def score_stat(values, stat_name, thresholds=thresholds):
+    # Vectorized calculate_points over an array of values
+    values = np.asarray(values, dtype=np.float64)
+    if stat_name not in thresholds:
+        return np.zeros(values.shape, dtype=np.int64)
+    th = thresholds[stat_name]
+
+    if stat_name in INVERTED_STATS:
+        conditions = [values <= th['High'], values <= th['Med'], values <= th['Low']]
+    else:
+        conditions = [values >= th['High'], values >= th['Med'], values >= th['Low']]
+    # NaN fails every comparison and scores 0, same as calculate_points
+    return np.select(conditions, [3, 2, 1], default=0)
+
+def stats_to_long(data):
+    """
+    Turn wide max_game_report rows (player_{id}_{stat} columns, one row per match)
+    into one row per match and player with plain stat columns.
+    """
+    df = pd.DataFrame(data)
+    per_player = {}
+    for col in df.columns:
+        match = re.match(r"player_(\d+)_(.+)$", str(col))
+        if match:
+            per_player.setdefault(int(match.group(1)), {})[match.group(2)] = col
+
+    rows = []
+    for player_id, columns in per_player.items():
+        player_df = df[list(columns.values())].rename(columns={v: k for k, v in columns.items()})
+        player_df.insert(0, "player", player_id)
+        player_df.insert(0, "match", df.index)
+        rows.append(player_df)
+
+    if not rows:
+        return pd.DataFrame(columns=["match", "player"])
+    return pd.concat(rows, ignore_index=True).sort_values(["match", "player"], kind="stable").reset_index(drop=True)
+
+def score_players(df, thresholds=thresholds):
+    """
+    Score a DataFrame with one row per match and player (see stats_to_long) in a
+    single pass. Adds {stat}_Points, Total_Score and Score_Percentage columns.
+    """
+    df = df.copy()
+    points_columns = []
+    for stat_name in thresholds:
+        if stat_name in df.columns:
+            df[f'{stat_name}_Points'] = score_stat(df[stat_name].to_numpy(), stat_name, thresholds)
+            points_columns.append(f'{stat_name}_Points')
+
+    max_score = 3 * len(thresholds)
+    df['Total_Score'] = df[points_columns].sum(axis=1)
+    df['Score_Percentage'] = (df['Total_Score'] / max_score) * 100
+    return df
+
+def player_data_from_scores(scored):
+    """
+    {player_id: data} in the player_{id}_data.json layout (Score_Percentage,
+    Total_Score, the stats, then the points for every stat) for the first
+    match of a score_players table.
+    """
+    players = {}
+    for row in scored[scored["match"] == scored["match"].iloc[0]].to_dict(orient="records"):
+        player_id = row.pop("player")
+        row.pop("match")
+        prefix = f"player_{player_id}_"
+        stats = {k: v for k, v in row.items() if k not in ("Total_Score", "Score_Percentage") and not k.endswith("_Points")}
+        points = {k: v for k, v in row.items() if k.endswith("_Points")}
+        player_data = {prefix + "Score_Percentage": row["Score_Percentage"], prefix + "Total_Score": row["Total_Score"]}
+        player_data.update({prefix + k: v for k, v in stats.items()})
+        player_data.update({prefix + k: v for k, v in points.items()})
+        # NumPy scalars -> plain Python numbers for json
+        players[player_id] = {k: v.item() if hasattr(v, "item") else v for k, v in player_data.items()}
+    return players
+
+def player_score_data(data, thresholds=thresholds):
+    # Score a one-row max_game_report table, {player_id: data} as above
+    return player_data_from_scores(score_players(stats_to_long(data), thresholds))
+
+def write_player_data(players, output_dir="."):
+    # Writes player_{id}_data.json for every player of {player_id: data} and returns the paths
+    paths = []
+    for player_id, player_data in players.items():
+        path = os.path.join(output_dir, f"player_{player_id}_data.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(player_data, f, indent=4)
+        paths.append(path)
+        print(f"✅ Player data saved as {path}")
+    return paths
+
+def save_player_data(data, output_dir="."):
+    return write_player_data(player_score_data(data), output_dir)
+
 def calculate_player_scores(data):
     df = pd.DataFrame(data)
 
@@ -48,7 +146,7 @@ def calculate_player_scores(data):
 
         stat_name = "_".join(col.split("_")[2:])
         if stat_name in thresholds:
-            df[f'{col}_Points'] = df[col].apply(lambda x: calculate_points(x, stat_name))
+            df[f'{col}_Points'] = score_stat(df[col].to_numpy(), stat_name)
 
     df['player_1_Total_Score'] = df[[c for c in df.columns if c.startswith('player_1') and '_Points' in c]].sum(axis=1)
     df['player_2_Total_Score'] = df[[c for c in df.columns if c.startswith('player_2') and '_Points' in c]].sum(axis=1)
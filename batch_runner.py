@@ -0,0 +1,179 @@
+import argparse
+import ctypes
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+from app_rep import stats_to_long
+from instrumentation import current_rss_mb
+from metrics import score_metrics
+from stats_store import MatchStatsStore, TABLES
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+# Loaded once per worker process by _init_worker
+_worker_models = None
+_worker_memory_limit = None
+
+def collect_videos(source):
+    """
+    A directory (every video file in it) or a manifest file with one video path
+    per line. Relative manifest paths are resolved against the manifest's folder.
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(VIDEO_EXTENSIONS))
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    videos = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            videos.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+    return videos
+
+def match_id_for(video_path):
+    return os.path.splitext(os.path.basename(video_path))[0]
+
+class MemoryLimit:
+    """
+    Per-worker memory limit on the resident set size. A daemon thread samples
+    the RSS while a match runs (inside watch()) and raises MemoryError in the
+    thread running it once the RSS goes over limit_mb, so a runaway match fails
+    on its own instead of taking down the box or the pool. The error is raised
+    when that thread next runs Python code, after a long native call such as a
+    model forward pass returns.
+
+    Unlike an RLIMIT_AS address space limit, it doesn't count the virtual memory
+    torch / CUDA reserve without using. Not enforced where the RSS can't be read
+    (see instrumentation.current_rss_mb).
+    """
+    def __init__(self, limit_mb, interval=0.2):
+        self.limit_mb = limit_mb
+        self.interval = interval
+        self.enforced = current_rss_mb() is not None
+        self._lock = threading.Lock()
+        self._thread_id = None
+        if self.enforced:
+            threading.Thread(target=self._watch, daemon=True).start()
+        else:
+            print(f"⚠️ Memory limit of {limit_mb} MB not enforced, the RSS can't be read on this platform")
+
+    @contextmanager
+    def watch(self):
+        with self._lock:
+            self._thread_id = threading.get_ident()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._thread_id = None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if self._thread_id is None or current_rss_mb() <= self.limit_mb:
+                    continue
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(self._thread_id),
+                                                           ctypes.py_object(MemoryError))
+                # Once per match
+                self._thread_id = None
+
+def _init_worker(memory_limit_mb, num_threads):
+    global _worker_models, _worker_memory_limit
+    from main import load_models
+    _worker_models = load_models(num_threads=num_threads)
+
+    # Started after the models are loaded, loading them never trips the limit
+    if memory_limit_mb:
+        _worker_memory_limit = MemoryLimit(memory_limit_mb)
+
+def _run_match(video_path, output_dir, cache_dir, stats_store=None):
+    from main import analyze_match
+
+    match_id = match_id_for(video_path)
+    output_video_path = os.path.join(output_dir, f"{match_id}.avi")
+    report_path = os.path.join(output_dir, f"{match_id}_max_game_report.csv")
+    memory_limit = _worker_memory_limit.watch() if _worker_memory_limit is not None else nullcontext()
+    with memory_limit:
+        max_stats_df, _, _ = analyze_match(video_path, output_video_path, models=_worker_models,
+                                          report_path=report_path, cache_dir=cache_dir,
+                                          stats_store=stats_store, match_id=match_id)
+    return max_stats_df
+
+def run_batch(source, output_dir, max_workers=None, memory_limit_mb=None, num_threads=1,
+              cache_dir="tracker_cache", stats_store=None):
+    """
+    Run the full pipeline on every match in source on a process pool and return one
+    combined table with a row per match and player (stats, points and total score).
+    Failed matches are reported and skipped. With stats_store (a directory) every
+    match is also appended to a MatchStatsStore, compacted at the end.
+    """
+    videos = collect_videos(source)
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(memory_limit_mb, num_threads)) as executor:
+        futures = {executor.submit(_run_match, video_path, output_dir, cache_dir, stats_store): video_path
+                   for video_path in videos}
+        for future in as_completed(futures):
+            video_path = futures[future]
+            try:
+                max_stats_df = future.result()
+            except BrokenProcessPool:
+                # A worker died (killed for memory, crashed, or its models failed to load),
+                # every match still queued on the pool fails with it
+                print(f"❌ {video_path} failed: the worker process running it died")
+                continue
+            except Exception:
+                print(f"❌ {video_path} failed:\n{traceback.format_exc()}")
+                continue
+
+            match_df = stats_to_long(max_stats_df).drop(columns="match")
+            match_df.insert(0, "match", match_id_for(video_path))
+            results.append(match_df)
+            print(f"✅ {video_path} done")
+
+    if stats_store is not None:
+        store = MatchStatsStore(stats_store)
+        for table in TABLES:
+            store.compact(table)
+
+    if not results:
+        return pd.DataFrame(columns=["match", "player"])
+
+    combined = score_metrics(long_stats=pd.concat(results, ignore_index=True)).get("scores")
+    combined = combined.sort_values(["match", "player"], kind="stable").reset_index(drop=True)
+    combined.to_csv(os.path.join(output_dir, "batch_report.csv"), index=False)
+    return combined
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of match videos in parallel")
+    parser.add_argument("source", help="directory of videos or a manifest file with one video path per line")
+    parser.add_argument("--output-dir", default="output_videos")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--memory-limit-mb", type=int, default=None, help="resident memory limit per worker, a match going over fails")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--cache-dir", default="tracker_cache")
+    parser.add_argument("--stats-store", default=None, help="also append every match to this Parquet store")
+    args = parser.parse_args()
+
+    combined = run_batch(args.source, args.output_dir, args.workers, args.memory_limit_mb,
+                         args.threads_per_worker, args.cache_dir, args.stats_store)
+    print(combined)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmarks for the non-model stages on synthetic inputs.
+
+    python -m benchmarks.run_benchmarks --lengths 1000 10000 100000 500000 --json bench.json
+
+Each benchmark is timed for every length (frames, or matches for the scoring
+benchmarks). Throughput is items per second and the scaling exponent is the
+log-log slope of time against length (1.0 = linear).
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks import synthetic
+from app_rep import calculate_player_scores, score_players, stats_to_long
+from shot_stats import gather_shot_positions, compute_shot_events, build_player_stats_df
+from event_stats import EventPlayerStats
+from metrics import match_metrics
+from utils.player_stats_drawer_utils import (add_player_stats_columns,
+                                             draw_player_stats,
+                                             generate_report_max_only)
+
+FPS = 24
+
+def time_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_shot_stats(num_frames):
+    player_detections, ball_detections = synthetic.make_detections(num_frames)
+    # Mini court positions: bbox centers stand in for the real projection
+    player_mini_court_detections = [{pid: ((b[0] + b[2]) / 2, b[3]) for pid, b in d.items()} for d in player_detections]
+    ball_mini_court_detections = [{1: ((d[1][0] + d[1][2]) / 2, (d[1][1] + d[1][3]) / 2)} for d in ball_detections]
+    ball_shot_frames = synthetic.make_ball_shot_frames(num_frames)
+    player_1, player_2 = synthetic.PLAYER_IDS
+
+    def run():
+        positions = gather_shot_positions(ball_shot_frames, ball_mini_court_detections,
+                                          player_mini_court_detections, player_1, player_2)
+        shot_events = compute_shot_events(ball_shot_frames, *positions, player_1, player_2, FPS, 0.05)
+        build_player_stats_df(shot_events, num_frames, player_1, player_2)
+    return run
+
+def bench_draw_player_stats(num_frames):
+    player_stats = synthetic.make_player_stats_df(num_frames, FPS)
+    # One frame buffer drawn on num_frames times keeps memory flat at any length
+    frames = [synthetic.make_frame()] * num_frames
+    return lambda: draw_player_stats(frames, player_stats, *synthetic.PLAYER_IDS, FPS)
+
+def bench_generate_report_max_only(num_frames):
+    player_stats = synthetic.make_player_stats_df(num_frames, FPS)
+    add_player_stats_columns(player_stats, *synthetic.PLAYER_IDS, FPS)
+    return lambda: generate_report_max_only(player_stats, *synthetic.PLAYER_IDS, output_path=None)
+
+def bench_event_stats_report(num_frames):
+    # generate_report_max_only straight from the shot events, no per-frame table
+    ball_shot_frames = synthetic.make_ball_shot_frames(num_frames)
+    shot_events = compute_shot_events(ball_shot_frames, *synthetic.make_shot_positions(len(ball_shot_frames)),
+                                      *synthetic.PLAYER_IDS, FPS, 0.05)
+
+    def run():
+        player_stats = EventPlayerStats(shot_events, num_frames, *synthetic.PLAYER_IDS, FPS)
+        generate_report_max_only(player_stats, *synthetic.PLAYER_IDS, output_path=None)
+    return run
+
+def bench_metrics_rescore(num_frames):
+    # Scores with new thresholds on a match whose metrics are already computed
+    ball_shot_frames = synthetic.make_ball_shot_frames(num_frames)
+    shot_events = compute_shot_events(ball_shot_frames, *synthetic.make_shot_positions(len(ball_shot_frames)),
+                                      *synthetic.PLAYER_IDS, FPS, 0.05)
+    metrics = match_metrics(shot_events, num_frames, *synthetic.PLAYER_IDS, FPS)
+    metrics.get("scores")
+
+    def run():
+        metrics.set_input("thresholds", metrics.get("thresholds"))
+        metrics.get("scores")
+    return run
+
+def bench_calculate_player_scores(num_matches):
+    max_stats = synthetic.make_max_stats(num_matches)
+
+    def run():
+        # calculate_player_scores prints both players' data, keep it out of the results
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            calculate_player_scores(max_stats)
+    return run
+
+def bench_score_players(num_matches):
+    long_stats = stats_to_long(synthetic.make_max_stats(num_matches))
+    return lambda: score_players(long_stats)
+
+def bench_court_drawing(num_frames):
+    import torch
+    from court_line_detector import CourtLineDetector
+
+    # Tiny randomly initialized stand-in for the ResNet50, no weights needed
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, kernel_size=3, stride=4),
+        torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1),
+        torch.nn.Flatten(),
+        torch.nn.Linear(8, 28),
+    )
+    detector = CourtLineDetector(model=model, device='cpu')
+    keypoints = synthetic.make_court_keypoints()
+    frame = synthetic.make_frame()
+
+    def run():
+        frames = (frame for _ in range(num_frames))
+        for _ in detector.iter_keypoints_on_video(frames, keypoints, refresh_interval=250):
+            pass
+    return run
+
+BENCHMARKS = {
+    "shot_stats": (bench_shot_stats, "frames"),
+    "draw_player_stats": (bench_draw_player_stats, "frames"),
+    "generate_report_max_only": (bench_generate_report_max_only, "frames"),
+    "event_stats_report": (bench_event_stats_report, "frames"),
+    "metrics_rescore": (bench_metrics_rescore, "frames"),
+    "calculate_player_scores": (bench_calculate_player_scores, "matches"),
+    "score_players": (bench_score_players, "matches"),
+    "court_drawing": (bench_court_drawing, "frames"),
+}
+
+def scaling_exponent(lengths, seconds):
+    if len(lengths) < 2:
+        return None
+    return float(np.polyfit(np.log(lengths), np.log(np.maximum(seconds, 1e-9)), 1)[0])
+
+def run_benchmarks(names, lengths, repeat=3):
+    results = {}
+    for name in names:
+        make_benchmark, unit = BENCHMARKS[name]
+        rows = []
+        for length in lengths:
+            try:
+                run = make_benchmark(length)
+            except ImportError as e:
+                print(f"Skipping {name}: {e}")
+                break
+            seconds = time_call(run, repeat)
+            rows.append({"length": length, "seconds": seconds, "throughput": length / seconds})
+            print(f"{name:<26} {length:>8} {unit:<8} {seconds:10.4f} s {length / seconds:14.0f} {unit}/s")
+        if rows:
+            results[name] = {
+                "unit": unit,
+                "runs": rows,
+                "scaling_exponent": scaling_exponent([r["length"] for r in rows], [r["seconds"] for r in rows]),
+            }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the non-model pipeline stages on synthetic data")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--json", default=None, help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.lengths, args.repeat)
+
+    print()
+    for name, result in results.items():
+        exponent = result["scaling_exponent"]
+        print(f"{name:<26} scaling exponent: {exponent:.2f}" if exponent is not None else f"{name:<26} single length")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"✅ Benchmark results saved as {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from shot_stats import compute_shot_events, build_player_stats_df
+
+# Synthetic inputs shaped like the real pipeline's, so the non-model stages can be
+# timed without footage, weights or a GPU.
+
+FRAME_SIZE = (720, 1280)
+PLAYER_IDS = (1, 2)
+
+MAX_STATS = ["max_shot_speed", "avg_shot_speed", "max_speed", "avg_speed", "max_acceleration",
+             "max_shot_inconsistency", "max_distance_covered", "max_rally_contribution",
+             "total_shots", "max_rally_percentage"]
+
+def make_ball_shot_frames(num_frames, mean_gap=45, seed=0):
+    rng = np.random.default_rng(seed)
+    gaps = rng.integers(mean_gap // 2, mean_gap * 3 // 2, size=num_frames // max(mean_gap // 2, 1) + 2)
+    shot_frames = np.cumsum(gaps)
+    return shot_frames[shot_frames < num_frames].tolist()
+
+def make_detections(num_frames, seed=0):
+    # Player and ball detections: list of {track_id: [x1, y1, x2, y2]} per frame
+    rng = np.random.default_rng(seed)
+    frame_h, frame_w = FRAME_SIZE
+    player_detections = []
+    ball_detections = []
+    centers = np.array([[frame_w * 0.5, frame_h * 0.25], [frame_w * 0.5, frame_h * 0.8]])
+    for _ in range(num_frames):
+        centers += rng.normal(0, 2, size=centers.shape)
+        player_detections.append({
+            player_id: [cx - 30, cy - 80, cx + 30, cy + 80]
+            for player_id, (cx, cy) in zip(PLAYER_IDS, centers.tolist())
+        })
+        bx, by = rng.uniform(0, frame_w), rng.uniform(0, frame_h)
+        ball_detections.append({1: [bx - 5, by - 5, bx + 5, by + 5]})
+    return player_detections, ball_detections
+
+def make_shot_positions(num_shots, seed=0):
+    # (S, 2) ball / player_1 / player_2 positions in mini court pixels at the shot frames
+    rng = np.random.default_rng(seed)
+    ball = rng.uniform(0, 250, size=(num_shots, 2))
+    player_1 = rng.uniform(0, 250, size=(num_shots, 2))
+    player_2 = rng.uniform(0, 250, size=(num_shots, 2))
+    return ball, player_1, player_2
+
+def make_player_stats_df(num_frames, fps=24, seed=0):
+    # Per-frame stats table as built by main.py
+    ball_shot_frames = make_ball_shot_frames(num_frames, seed=seed)
+    shot_events = compute_shot_events(ball_shot_frames, *make_shot_positions(len(ball_shot_frames), seed),
+                                      PLAYER_IDS[0], PLAYER_IDS[1], fps, meters_per_pixel=0.05)
+    return build_player_stats_df(shot_events, num_frames, *PLAYER_IDS)
+
+def make_max_stats(num_rows, seed=0):
+    # Wide max_game_report rows, one per match
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for stat_name in MAX_STATS:
+        for player_id in PLAYER_IDS:
+            columns[f"player_{player_id}_{stat_name}"] = rng.uniform(0, 100, size=num_rows)
+    return pd.DataFrame(columns)
+
+def make_court_keypoints(seed=0):
+    rng = np.random.default_rng(seed)
+    frame_h, frame_w = FRAME_SIZE
+    keypoints = np.empty(28, dtype=np.float32)
+    keypoints[::2] = rng.uniform(0, frame_w, 14)
+    keypoints[1::2] = rng.uniform(0, frame_h, 14)
+    return keypoints
+
+def make_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=FRAME_SIZE + (3,), dtype=np.uint8)
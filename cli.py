@@ -0,0 +1,122 @@
+"""
+Command line entry point with one sub-command per path through the project.
+
+    python cli.py analyze --input input_videos/input_video.mp4
+    python cli.py score --input max_game_report.csv
+    python cli.py report --data player_1_data.json player_2_data.json
+
+Every sub-command imports what it needs when it runs. score and report never
+load torch, OpenCV or the trackers, so they start fast and work on machines
+without them.
+"""
+import argparse
+import glob
+import os
+
+def add_analyze_arguments(parser):
+    parser.add_argument("--input", default="input_videos/input_video.mp4")
+    parser.add_argument("--output", default="output_videos/xxx190.avi")
+    parser.add_argument("--projection", choices=["mini_court", "homography"], default="mini_court",
+                        help="coordinates used for the shot speed maths")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="decode and encode on background threads, overlapping I/O with compute")
+    parser.add_argument("--highlights", default=None, help="write highlight clips to this directory")
+    parser.add_argument("--num-highlights", type=int, default=20)
+    parser.add_argument("--no-video", action="store_true", help="skip the full annotated video (e.g. with --highlights)")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="run detection on every k-th frame (every frame near shots) and interpolate the rest")
+    parser.add_argument("--shot-window", type=float, default=0.5,
+                        help="seconds around each shot detected at full frame rate with --stride")
+    parser.add_argument("--court-mode", choices=["track", "per_frame"], default="track",
+                        help="reuse the court keypoints until the scene changes, or re-predict them on every frame "
+                             "(moving camera)")
+    parser.add_argument("--court-refresh-interval", type=int, default=None,
+                        help="with --court-mode track, also re-predict the court keypoints every N frames")
+    parser.add_argument("--stats-store", default=None, help="append the match stats to this Parquet store")
+    parser.add_argument("--rallies", default=None, help="save the rally index to this JSON file")
+    parser.add_argument("--profile-json", default=None, help="write per-stage timings and memory to this JSON file")
+    parser.add_argument("--cprofile", action="store_true", help="include a cProfile report in the JSON")
+    parser.add_argument("--tracemalloc", action="store_true", help="record peak Python allocations per stage")
+    return parser
+
+def run_analyze(args):
+    from instrumentation import PipelineProfiler
+    from main import analyze_match
+
+    profiler = PipelineProfiler(enabled=args.profile_json is not None,
+                                profile=args.cprofile,
+                                trace_memory=args.tracemalloc)
+    output_video_path = None if args.no_video else args.output
+    _, result, _ = analyze_match(args.input, output_video_path, profiler=profiler, projection=args.projection,
+                                pipelined=args.pipelined, rally_index_path=args.rallies,
+                                highlights_dir=args.highlights, num_highlights=args.num_highlights,
+                                stats_store=args.stats_store, stride=args.stride, shot_window=args.shot_window,
+                                court_mode=args.court_mode, court_refresh_interval=args.court_refresh_interval)
+    print(result)
+
+    if args.profile_json:
+        profiler.dump_json(args.profile_json)
+
+def add_score_arguments(parser):
+    parser.add_argument("--input", default="max_game_report.csv", help="max_game_report CSV to score")
+    parser.add_argument("--output-dir", default=".", help="where to write player_{id}_data.json")
+    parser.add_argument("--thresholds", default=None,
+                        help="JSON file of {stat: {High, Med, Low}} overriding the default thresholds")
+    return parser
+
+def run_score(args):
+    import json
+    import pandas as pd
+    from app_rep import thresholds, write_player_data
+    from metrics import score_metrics
+
+    if args.thresholds:
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            thresholds = dict(thresholds, **json.load(f))
+
+    max_stats_df = pd.read_csv(args.input, index_col=0, float_precision="round_trip")
+    metrics = score_metrics(max_stats=max_stats_df, thresholds=thresholds)
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_player_data(metrics.get("player_data"), args.output_dir)
+    print(metrics.get("scores")[["match", "player", "Total_Score", "Score_Percentage"]])
+
+def add_report_arguments(parser):
+    parser.add_argument("--data", nargs="+", default=None,
+                        help="player_{id}_data.json files (default: every one in the current directory)")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--renderer", choices=["fpdf", "wkhtmltopdf"], default=None,
+                        help="PDF backend (default: fpdf if installed, else wkhtmltopdf)")
+    return parser
+
+def run_report(args):
+    import json
+    from generate_report import generate_player_report, get_report_renderer, player_ids_in
+
+    data_paths = args.data or sorted(glob.glob("player_*_data.json"))
+    os.makedirs(args.output_dir, exist_ok=True)
+    renderer = get_report_renderer(args.renderer)
+
+    for data_path in data_paths:
+        with open(data_path, "r", encoding="utf-8") as f:
+            # {column: [value]}, the one-row table the report functions expect, without pandas
+            player_stats = {key: [value] for key, value in json.load(f).items()}
+        for player in player_ids_in(player_stats):
+            pdf_output = os.path.join(args.output_dir, f"player_{player}_report.pdf")
+            generate_player_report(player_stats, player, None, pdf_output, renderer=renderer)
+
+COMMANDS = {
+    "analyze": (add_analyze_arguments, run_analyze, "analyze a match video"),
+    "score": (add_score_arguments, run_score, "re-score a max_game_report CSV"),
+    "report": (add_report_arguments, run_report, "render PDF reports from player_*_data.json"),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tennis match analysis")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (add_arguments, _, help_text) in COMMANDS.items():
+        add_arguments(subparsers.add_parser(name, help=help_text))
+    args = parser.parse_args(argv)
+    COMMANDS[args.command][1](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+
+class StaticLayer:
+    """
+    Cached RGBA rasterization of a drawing that is the same on every frame.
+
+    draw_fn(frame) draws in place on a frame of frame_shape. It is rendered once
+    over a black and once over a white background. For any drawing that is
+    opaque or alpha blended, on_black = alpha * color and
+    on_white - on_black = (1 - alpha) * 255, which gives the colour and alpha of
+    every pixel. Applying the layer is then one blend over its bounding box.
+    """
+    def __init__(self, draw_fn, frame_shape):
+        on_black = draw_fn(np.zeros(frame_shape, dtype=np.uint8)).astype(np.int32)
+        on_white = draw_fn(np.full(frame_shape, 255, dtype=np.uint8)).astype(np.int32)
+
+        # (1 - alpha) * 255 per pixel, averaged over the colour channels
+        inverse_alpha = np.clip(on_white - on_black, 0, 255).mean(axis=2)
+        alpha = 255 - inverse_alpha
+        color = np.where(alpha[..., None] > 0,
+                         np.clip(on_black * 255 / np.maximum(alpha[..., None], 1), 0, 255), 0)
+
+        ys, xs = np.nonzero(alpha > 0)
+        if len(ys) == 0:
+            self.roi = None
+            return
+        self.roi = (slice(ys.min(), ys.max() + 1), slice(xs.min(), xs.max() + 1))
+
+        # Cached RGBA layer (BGR + alpha, uint8) for the bounding box
+        self.rgba = np.dstack([color, alpha])[self.roi].round().astype(np.uint8)
+
+        # Sparse drawings (text, points, lines) only touch the drawn pixels,
+        # dense ones (filled boxes) blend the whole bounding box
+        drawn = self.rgba[..., 3] > 0
+        self.sparse = drawn.mean() < 0.5
+        if self.sparse:
+            # Opaque pixels are plain copies, only the antialiased edges need blending
+            rows, cols = np.nonzero(drawn)
+            pixels = self.rgba[rows, cols]
+            rows, cols = rows + self.roi[0].start, cols + self.roi[1].start
+            opaque = pixels[:, 3] == 255
+            self._opaque_index = (rows[opaque], cols[opaque])
+            self._opaque_color = pixels[opaque, :3]
+            self._blend_index = (rows[~opaque], cols[~opaque])
+            pixels = pixels[~opaque]
+        else:
+            pixels = self.rgba
+        alpha_pixels = pixels[..., 3:4].astype(np.uint16)
+        self._inverse_alpha = 255 - alpha_pixels
+        self._premultiplied = pixels[..., :3].astype(np.uint16) * alpha_pixels + 127
+
+    def apply(self, frame):
+        if self.roi is None:
+            return frame
+        if self.sparse:
+            frame[self._opaque_index] = self._opaque_color
+            frame[self._blend_index] = (frame[self._blend_index] * self._inverse_alpha + self._premultiplied) // 255
+        else:
+            roi = frame[self.roi]
+            blended = (roi.astype(np.uint16) * self._inverse_alpha + self._premultiplied) // 255
+            np.copyto(roi, blended.astype(np.uint8))
+        return frame
+
+class FrameCompositor:
+    """
+    Applies every annotation layer to a frame in place in a single pass.
+
+    Static layers are rasterized once (on the first frame) and blended from
+    their cached RGBA image. Dynamic layers are called as draw_fn(frame, frame_num)
+    and should draw in place; if one returns a different array it is copied
+    back into the frame. Layers are applied in the order they were added.
+    """
+    def __init__(self, profiler=None):
+        self.layers = []
+        self.profiler = profiler
+
+    def add_static(self, name, draw_fn):
+        self.layers.append((name, "static", draw_fn))
+        return self
+
+    def add_dynamic(self, name, draw_fn):
+        self.layers.append((name, "dynamic", draw_fn))
+        return self
+
+    def _rasterize(self, frame_shape):
+        self._compiled = []
+        for name, kind, draw_fn in self.layers:
+            if kind == "static":
+                layer = StaticLayer(draw_fn, frame_shape)
+                self._compiled.append((name, lambda frame, frame_num, layer=layer: layer.apply(frame)))
+            else:
+                self._compiled.append((name, draw_fn))
+        self._frame_shape = frame_shape
+
+    def compose(self, frame, frame_num):
+        if getattr(self, "_frame_shape", None) != frame.shape:
+            self._rasterize(frame.shape)
+
+        for name, draw_fn in self._compiled:
+            if self.profiler is not None:
+                with self.profiler.stage(name, frames=1):
+                    result = draw_fn(frame, frame_num)
+            else:
+                result = draw_fn(frame, frame_num)
+            if result is not None and result is not frame:
+                np.copyto(frame, result)
+        return frame
+
+    def iter_compose(self, video_frames, start_frame=0):
+        # start_frame is the frame number of the first frame, for clips of a video
+        for frame_num, frame in enumerate(video_frames, start_frame):
+            yield self.compose(frame, frame_num)
@@ -0,0 +1,34 @@
+"""
+This tree is the flat upload of the project (see README):
+player_stats_drawer_utils.py belongs in its utils package and the court
+dimensions come from its constants module. When those aren't importable,
+stand them in from this tree so the tests run as shipped.
+"""
+import importlib.util
+import sys
+import types
+
+def _install_utils():
+    import player_stats_drawer_utils
+
+    utils = types.ModuleType("utils")
+    utils.__path__ = []
+    utils.player_stats_drawer_utils = player_stats_drawer_utils
+    sys.modules["utils"] = utils
+    sys.modules["utils.player_stats_drawer_utils"] = player_stats_drawer_utils
+
+def _install_constants():
+    # ITF court dimensions in metres
+    constants = types.ModuleType("constants")
+    constants.SINGLE_LINE_WIDTH = 8.23
+    constants.DOUBLE_LINE_WIDTH = 10.97
+    constants.HALF_COURT_LINE_HEIGHT = 23.77 / 2
+    constants.SERVICE_LINE_WIDTH = 6.4
+    constants.DOUBLE_ALLY_DIFFERENCE = 1.37
+    constants.NO_MANS_LAND_HEIGHT = 5.48
+    sys.modules["constants"] = constants
+
+if importlib.util.find_spec("utils") is None:
+    _install_utils()
+if importlib.util.find_spec("constants") is None:
+    _install_constants()
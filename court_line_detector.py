@@ -1,28 +1,112 @@
 import torch
-import torchvision.transforms as transforms
 import cv2
-from torchvision import models
 import numpy as np
+from PIL import Image
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+def preprocess_frames(frames):
+    # The torchvision ToPILImage / Resize((224, 224)) / ToTensor / Normalize steps
+    # on a whole batch, with the same PIL bilinear resize. Used by both predict and
+    # predict_batch, so exported models don't need torchvision. The resize works
+    # per channel, so the BGR -> RGB swap is done on the 224x224 result.
+    batch = np.empty((len(frames), 224, 224, 3), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        resized = Image.fromarray(frame).resize((224, 224), Image.BILINEAR)
+        batch[i] = np.asarray(resized)[..., ::-1]
+    batch *= 1.0 / 255.0
+    batch -= IMAGENET_MEAN
+    batch /= IMAGENET_STD
+    # NHWC -> NCHW
+    return torch.from_numpy(batch.transpose(0, 3, 1, 2).copy())
+
+# Artifacts written by court_model_export, loaded without building the ResNet50
+EXPORTED_MODEL_SUFFIXES = ('.torchscript', '.onnx')
+
+def build_court_model(model_path, device='cpu'):
+    # The weights all come from model_path, no ImageNet download
+    from torchvision import models
+
+    model = models.resnet50(weights=None)
+    model.fc = torch.nn.Linear(model.fc.in_features, 14 * 2)
+    model.load_state_dict(torch.load(model_path, map_location=device))
+    return model
+
+class OnnxCourtModel:
+    """
+    ONNX Runtime session behind the same call interface as the torch model:
+    takes an NCHW float tensor and returns an (N, 28) tensor.
+    """
+    def __init__(self, model_path, device='cpu', num_threads=None):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+        providers = ['CPUExecutionProvider']
+        if torch.device(device).type == 'cuda':
+            providers.insert(0, 'CUDAExecutionProvider')
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def __call__(self, batch):
+        outputs = self.session.run(None, {self.input_name: batch.cpu().numpy()})[0]
+        return torch.from_numpy(outputs)
+
+def load_exported_model(model_path, device='cpu', num_threads=None):
+    """
+    Loads a .torchscript or .onnx court keypoint model. Quantized TorchScript
+    only runs on the CPU and raises a ValueError on any other device. ONNX
+    Runtime runs the quantized nodes on its CPU provider by itself.
+    """
+    if model_path.endswith('.onnx'):
+        return OnnxCourtModel(model_path, device, num_threads)
+
+    model = torch.jit.load(model_path, map_location='cpu').eval()
+    if torch.device(device).type != 'cpu':
+        if 'quantized::' in str(model.inlined_graph):
+            raise ValueError(f"{model_path} is quantized and only runs on the CPU, load it with device='cpu'")
+        model = model.to(device)
+    if torch.device(device).type == 'cpu':
+        # Freezes the weights and fuses conv/bn for CPU inference
+        model = torch.jit.optimize_for_inference(model)
+    return model
 
 class CourtLineDetector:
-    def __init__(self, model_path):
-        self.model = models.resnet50(pretrained=True)
-        self.model.fc = torch.nn.Linear(self.model.fc.in_features, 14 * 2)
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    def __init__(self, model_path=None, device=None, num_threads=None, model=None):
+        # `model` skips building the ResNet50 (any module mapping a 224x224 batch to 28 values)
+        if device is None:
+            # Exported artifacts are exported (and quantized) on the CPU
+            exported = model is None and model_path.endswith(EXPORTED_MODEL_SUFFIXES)
+            device = 'cuda' if torch.cuda.is_available() and not exported else 'cpu'
+        self.device = torch.device(device)
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        if model is None:
+            if model_path.endswith(EXPORTED_MODEL_SUFFIXES):
+                model = load_exported_model(model_path, self.device, num_threads)
+            else:
+                model = build_court_model(model_path, self.device)
+        self.model = model
+        self.model.to(self.device)
         self.model.eval() 
-        self.transform = transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
+        self.inference_count = 0
+        self.skipped_inferences = 0
 
     def predict(self, image):
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_tensor = self.transform(image_rgb).unsqueeze(0)
+        image_tensor = self.preprocess_batch([image]).to(self.device)
 
         with torch.no_grad():
             outputs = self.model(image_tensor)
+        self.inference_count += 1
 
         keypoints = outputs.squeeze().cpu().numpy()
         original_h, original_w = image.shape[:2]
@@ -32,6 +116,30 @@ class CourtLineDetector:
 
         return keypoints
 
+    def preprocess_batch(self, frames):
+        return preprocess_frames(frames)
+
+    def predict_batch(self, frames, batch_size=16):
+        # Returns an (N, 28) array of keypoints, one row per frame
+        all_keypoints = []
+
+        with torch.inference_mode():
+            for start in range(0, len(frames), batch_size):
+                chunk = frames[start:start + batch_size]
+                batch_tensor = self.preprocess_batch(chunk).to(self.device)
+                outputs = self.model(batch_tensor)
+                self.inference_count += len(chunk)
+
+                keypoints = outputs.float().cpu().numpy().reshape(len(chunk), -1)
+                sizes = np.array([frame.shape[:2] for frame in chunk], dtype=np.float32)
+                keypoints[:, ::2] *= sizes[:, 1:2] / 224.0
+                keypoints[:, 1::2] *= sizes[:, 0:1] / 224.0
+                all_keypoints.append(keypoints)
+
+        if not all_keypoints:
+            return np.empty((0, 28), dtype=np.float32)
+        return np.concatenate(all_keypoints)
+
     def get_court_bounds(self, keypoints):
         if len(keypoints) != 28:
             print("Error: Invalid number of keypoints detected.")
@@ -65,13 +173,90 @@ class CourtLineDetector:
 
         return image
 
-    def draw_keypoints_on_video(self, video_frames):
-        output_video_frames = []
+    def scene_signature(self, image, size=(64, 36)):
+        # Tiny grayscale thumbnail, cheap enough to compute for every frame
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def scene_changed(self, reference_signature, signature, threshold):
+        # Mean absolute difference of the thumbnails (0-255 scale)
+        return float(np.mean(np.abs(signature - reference_signature))) > threshold
+
+    def draw_keypoints_on_video(self, video_frames, keypoints=None, mode="track",
+                                refresh_interval=None, scene_change_threshold=12.0):
+        return list(self.iter_keypoints_on_video(video_frames, keypoints, mode,
+                                                 refresh_interval, scene_change_threshold))
+
+    def iter_keypoints_on_video(self, video_frames, keypoints=None, mode="track",
+                                refresh_interval=None, scene_change_threshold=12.0):
+        """
+        Generator version of draw_keypoints_on_video, draws on each frame as it is pulled.
+        See CourtKeypointTracker for the modes.
+        """
+        tracker = CourtKeypointTracker(self, keypoints, mode, refresh_interval, scene_change_threshold)
 
         for frame in video_frames:
-            keypoints = self.predict(frame)
+            keypoints = tracker.update(frame)
             frame = self.draw_keypoints(frame, keypoints)
             frame = self.draw_court_boundaries(frame, keypoints)
-            output_video_frames.append(frame)
+            yield frame
+
+        tracker.report()
+
+class CourtKeypointTracker:
+    """
+    Keypoints for a stream of frames, one update() per frame.
+
+    mode="track"     : reuse the keypoints across frames and only re-run the model
+                       when the scene changes (camera cut / motion) or every
+                       `refresh_interval` frames. `keypoints` (e.g. from predict on
+                       the first frame) can be passed in to skip the first inference.
+    mode="per_frame" : run the model on every frame (moving-camera footage).
+
+    update() returns the same keypoints object until they are re-predicted, so
+    callers can cache anything derived from them with an identity check.
+    """
+    def __init__(self, detector, keypoints=None, mode="track",
+                 refresh_interval=None, scene_change_threshold=12.0):
+        if mode not in ("track", "per_frame"):
+            raise ValueError(f"Unknown keypoint mode: {mode}")
+        self.detector = detector
+        self.keypoints = keypoints
+        self.mode = mode
+        self.refresh_interval = refresh_interval
+        self.scene_change_threshold = scene_change_threshold
+
+        self.reference_signature = None
+        self.frames_since_refresh = 0
+        self.frame_count = 0
+        self.skipped = 0
+
+    def update(self, frame):
+        self.frame_count += 1
+        if self.mode == "per_frame":
+            self.keypoints = self.detector.predict(frame)
+            return self.keypoints
+
+        signature = self.detector.scene_signature(frame)
+        needs_refresh = (
+            self.keypoints is None
+            or (self.refresh_interval is not None and self.frames_since_refresh >= self.refresh_interval)
+            or (self.reference_signature is not None
+                and self.detector.scene_changed(self.reference_signature, signature, self.scene_change_threshold))
+        )
+        if needs_refresh:
+            self.keypoints = self.detector.predict(frame)
+            self.frames_since_refresh = 0
+            self.reference_signature = signature
+        else:
+            self.skipped += 1
+            self.detector.skipped_inferences += 1
+            if self.reference_signature is None:
+                # keypoints were passed in, use this frame as the reference
+                self.reference_signature = signature
+        self.frames_since_refresh += 1
+        return self.keypoints
 
-        return output_video_frames
+    def report(self):
+        if self.mode == "track":
+            print(f"Court keypoints: skipped {self.skipped} of {self.frame_count} inferences")
@@ -0,0 +1,164 @@
+"""
+Export the court keypoint model to TorchScript or ONNX, optionally INT8 quantized.
+
+    python court_model_export.py --weights models/keypoints_model.pth --format torchscript \
+        --quantize static --calibration-video input_videos/input_video.mp4
+
+The artifact is loaded by CourtLineDetector like the .pth weights
+(CourtLineDetector("models/keypoints_model.torchscript")), without building
+the torchvision ResNet50 or downloading anything.
+
+Quantization:
+    dynamic  INT8 weights computed on the fly. With TorchScript this only covers
+             the final Linear layer, with ONNX Runtime it covers the convolutions too.
+    static   INT8 weights and activations, calibrated on frames from a video.
+             This is the one that speeds up the convolutions on the CPU.
+"""
+import argparse
+import os
+import tempfile
+import time
+from itertools import islice
+
+import numpy as np
+import torch
+
+from court_line_detector import CourtLineDetector, build_court_model, preprocess_frames
+from utils.player_stats_drawer_utils import get_video_frame_count, iter_video_frames
+
+EXPORT_FORMATS = ('torchscript', 'onnx')
+QUANTIZE_MODES = (None, 'dynamic', 'static')
+
+def default_output_path(weights_path, export_format, quantize=None):
+    # models/keypoints_model.pth -> models/keypoints_model_int8_static.onnx
+    root = os.path.splitext(weights_path)[0]
+    if quantize:
+        root += f"_int8_{quantize}"
+    return f"{root}.{export_format}"
+
+def calibration_batches(video_path, num_frames=64, batch_size=16):
+    """
+    Preprocessed (N, 3, 224, 224) batches of frames spread evenly over the
+    video, the same preprocessing predict_batch uses.
+    """
+    step = max(get_video_frame_count(video_path) // num_frames, 1)
+    frames = list(islice(iter_video_frames(video_path), 0, step * num_frames, step))
+    if not frames:
+        raise ValueError(f"No frames could be read from {video_path}")
+
+    return [preprocess_frames(frames[start:start + batch_size])
+            for start in range(0, len(frames), batch_size)]
+
+def quantize_torch_static(model, calibration):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    prepared = prepare_fx(model, qconfig_mapping, example_inputs=(calibration[0],))
+    with torch.no_grad():
+        for batch in calibration:
+            prepared(batch)
+    return convert_fx(prepared)
+
+def export_torchscript(model, output_path, quantize=None, calibration=None):
+    if quantize == 'dynamic':
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif quantize == 'static':
+        model = quantize_torch_static(model, calibration)
+
+    example = calibration[0][:1] if calibration else torch.zeros(1, 3, 224, 224)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    traced.save(output_path)
+
+class _CalibrationReader:
+    # onnxruntime.quantization.CalibrationDataReader interface
+    def __init__(self, input_name, calibration):
+        self.batches = iter([{input_name: batch.numpy()} for batch in calibration])
+
+    def get_next(self):
+        return next(self.batches, None)
+
+def export_onnx(model, output_path, quantize=None, calibration=None):
+    example = calibration[0][:1] if calibration else torch.zeros(1, 3, 224, 224)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Quantized models are written from a float export
+        float_path = os.path.join(tmp_dir, "model.onnx") if quantize else output_path
+        torch.onnx.export(model, example, float_path,
+                          input_names=["image"], output_names=["keypoints"],
+                          dynamic_axes={"image": {0: "batch"}, "keypoints": {0: "batch"}},
+                          opset_version=17)
+
+        if quantize == 'dynamic':
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+        elif quantize == 'static':
+            from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+            quantize_static(float_path, output_path, _CalibrationReader("image", calibration),
+                            quant_format=QuantFormat.QDQ,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+def export_court_model(weights_path, output_path=None, export_format='torchscript', quantize=None,
+                       calibration_video=None, calibration_frames=64):
+    """
+    Writes the court keypoint model from weights_path (the .pth state dict) as
+    a TorchScript or ONNX artifact and returns its path. Static quantization
+    needs calibration_video.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantization mode: {quantize}")
+    if quantize == 'static' and calibration_video is None:
+        raise ValueError("Static quantization needs a calibration video")
+
+    if output_path is None:
+        output_path = default_output_path(weights_path, export_format, quantize)
+
+    # Exported and quantized on the CPU, the quantized kernels are CPU only
+    model = build_court_model(weights_path, 'cpu').eval()
+    calibration = calibration_batches(calibration_video, calibration_frames) if calibration_video else None
+
+    if export_format == 'onnx':
+        export_onnx(model, output_path, quantize, calibration)
+    else:
+        export_torchscript(model, output_path, quantize, calibration)
+
+    print(f"✅ Court model exported as {output_path}")
+    return output_path
+
+def measure_latency(model_path, repeat=20, num_threads=None):
+    # Cold start and per-frame CPU latency (ms) of a .pth or exported model
+    start = time.perf_counter()
+    detector = CourtLineDetector(model_path, device='cpu', num_threads=num_threads)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    detector.predict_batch([frame])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        detector.predict_batch([frame])
+    return load_ms, (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the court keypoint model to TorchScript or ONNX")
+    parser.add_argument("--weights", default="models/keypoints_model.pth")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="torchscript")
+    parser.add_argument("--quantize", choices=[mode for mode in QUANTIZE_MODES if mode], default=None)
+    parser.add_argument("--calibration-video", default=None, help="frames used to calibrate static quantization")
+    parser.add_argument("--calibration-frames", type=int, default=64)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--benchmark", action="store_true", help="compare load time and CPU latency with the .pth model")
+    args = parser.parse_args()
+
+    output_path = export_court_model(args.weights, args.output, args.format, args.quantize,
+                                     args.calibration_video, args.calibration_frames)
+
+    if args.benchmark:
+        for model_path in (args.weights, output_path):
+            load_ms, frame_ms = measure_latency(model_path)
+            print(f"{model_path}: load {load_ms:.0f} ms, {frame_ms:.1f} ms per frame")
+
+if __name__ == "__main__":
+    main()
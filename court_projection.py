@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+
+import constants
+
+def court_reference_keypoints():
+    """
+    The 14 court keypoints in metres, in the order CourtLineDetector predicts them.
+    Origin is the far left doubles corner, x runs across the court and y along it.
+    """
+    width = constants.DOUBLE_LINE_WIDTH
+    length = constants.HALF_COURT_LINE_HEIGHT * 2
+    alley = constants.DOUBLE_ALLY_DIFFERENCE
+    service = constants.NO_MANS_LAND_HEIGHT
+    singles = constants.SINGLE_LINE_WIDTH
+
+    return np.array([
+        (0, 0),                                 # 0
+        (width, 0),                             # 1
+        (0, length),                            # 2
+        (width, length),                        # 3
+        (alley, 0),                             # 4
+        (alley, length),                        # 5
+        (width - alley, 0),                     # 6
+        (width - alley, length),                # 7
+        (alley, service),                       # 8
+        (alley + singles, service),             # 9
+        (alley, length - service),              # 10
+        (alley + singles, length - service),    # 11
+        (alley + singles / 2, service),         # 12
+        (alley + singles / 2, length - service) # 13
+    ], dtype=np.float32)
+
+def fill_missing_positions(positions):
+    """
+    (num_frames, ..., 2) positions with NaN rows replaced by the last valid
+    position of the same point, and leading NaN rows by its first valid one.
+    A point that is never found stays NaN.
+    """
+    flat = positions.reshape(len(positions), -1, 2)
+    if not len(flat):
+        return positions.copy()
+    valid = ~np.isnan(flat).any(axis=2)
+    source = np.where(valid, np.arange(len(flat))[:, None], -1)
+    source = np.maximum.accumulate(source, axis=0)
+    source = np.where(source >= 0, source, np.argmax(valid, axis=0)[None, :])
+    return flat[source, np.arange(flat.shape[1])[None, :]].reshape(positions.shape)
+
+class CourtProjector:
+    """
+    Image -> court (metres) homography fitted once from the 28-value keypoint
+    array. All points of a match are projected with a single
+    cv2.perspectiveTransform call, so distances come out in metres directly.
+    """
+    def __init__(self, court_keypoints, ransac_threshold=0.3):
+        image_points = np.asarray(court_keypoints, dtype=np.float32).reshape(-1, 2)
+        court_points = court_reference_keypoints()
+        # RANSAC in court units: a keypoint more than ransac_threshold metres off is ignored
+        self.homography, inliers = cv2.findHomography(image_points, court_points, cv2.RANSAC, ransac_threshold)
+        if self.homography is None:
+            raise ValueError("Could not fit a court homography to the keypoints")
+        self.inliers = inliers.ravel().astype(bool)
+
+    def project_points(self, points):
+        # (N, 2) image points -> (N, 2) court points in metres, NaN rows stay NaN
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        projected = np.full(points.shape, np.nan)
+        valid = ~np.isnan(points).any(axis=1)
+        if valid.any():
+            projected[valid] = cv2.perspectiveTransform(points[valid].reshape(-1, 1, 2), self.homography).reshape(-1, 2)
+        return projected
+
+    def project_detections(self, player_detections, ball_detections, player_1, player_2):
+        """
+        Player foot points (bottom center of the bbox) and ball centers for every
+        frame in metres. Returns player positions as (num_frames, 2, 2), player_1
+        then player_2, and ball positions as (num_frames, 2). A frame where a
+        player or the ball is missing keeps its last known position (see
+        fill_missing_positions), so no NaN reaches the shot stats.
+        """
+        num_frames = len(player_detections)
+        points = np.full((num_frames, 3, 2), np.nan)
+
+        for frame_num, (players, ball) in enumerate(zip(player_detections, ball_detections)):
+            for slot, player_id in enumerate((player_1, player_2)):
+                bbox = players.get(player_id)
+                if bbox is not None:
+                    points[frame_num, slot] = ((bbox[0] + bbox[2]) / 2, bbox[3])
+            bbox = ball.get(1)
+            if bbox is not None and len(bbox) == 4:
+                points[frame_num, 2] = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+
+        projected = self.project_points(points.reshape(-1, 2)).reshape(num_frames, 3, 2)
+        projected = fill_missing_positions(projected)
+        return projected[:, :2], projected[:, 2]
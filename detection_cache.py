@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Bump when the on-disk layout changes so old entries are never read back
+CACHE_VERSION = 1
+
+_file_hash_memo = {}
+
+def hash_file(path, chunk_size=1 << 20):
+    # Content hash, memoized per (path, size, mtime) so re-runs don't re-read the video
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hash_memo:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        _file_hash_memo[memo_key] = digest.hexdigest()
+    return _file_hash_memo[memo_key]
+
+def encode_detections(detections):
+    # list of {track_id: [x1, y1, x2, y2]} per frame -> flat columnar arrays
+    frames, track_ids, bboxes = [], [], []
+    for frame_num, frame_detections in enumerate(detections):
+        for track_id, bbox in frame_detections.items():
+            frames.append(frame_num)
+            track_ids.append(track_id)
+            bboxes.append(bbox)
+    return {
+        "num_frames": np.array(len(detections), dtype=np.int64),
+        "frame": np.array(frames, dtype=np.int32),
+        "track_id": np.array(track_ids, dtype=np.int32),
+        "bbox": np.array(bboxes, dtype=np.float32).reshape(-1, 4),
+    }
+
+def decode_detections(arrays):
+    detections = [{} for _ in range(int(arrays["num_frames"]))]
+    for frame_num, track_id, bbox in zip(arrays["frame"].tolist(),
+                                         arrays["track_id"].tolist(),
+                                         arrays["bbox"].tolist()):
+        detections[frame_num][track_id] = bbox
+    return detections
+
+class DetectionCache:
+    """
+    On-disk detection cache replacing the hardcoded pickle stubs.
+
+    Entries are keyed by the video content hash, the model weights hash (or the
+    model name when it is not a local file) and the detection parameters, and are
+    stored as uncompressed .npz files of frame / track_id / bbox columns, loaded
+    with allow_pickle=False. Total size is capped at max_bytes with least recently
+    used entries evicted first.
+    """
+    def __init__(self, cache_dir="tracker_cache", max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, video_path, model_path, params=None):
+        model_id = hash_file(model_path) if os.path.isfile(model_path) else str(model_path)
+        payload = json.dumps({
+            "version": CACHE_VERSION,
+            "video": hash_file(video_path),
+            "model": model_id,
+            "params": params or {},
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key):
+        path = self.path_for(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                detections = decode_detections(arrays)
+            # Touch for LRU ordering
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            # Missing, corrupt or concurrently evicted entry
+            return None
+        return detections
+
+    def save(self, key, detections):
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **encode_detections(detections))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def lookup(self, video_path, model_path, params=None):
+        # (key, cached detections or None), save fresh detections under the key
+        key = self.make_key(video_path, model_path, params)
+        detections = self.load(key)
+        if detections is not None:
+            print(f"Loaded cached detections {key[:12]} for {video_path}")
+        return key, detections
+
+    def get_or_detect(self, video_path, model_path, detect_fn, params=None):
+        key, detections = self.lookup(video_path, model_path, params)
+        if detections is not None:
+            return detections
+
+        detections = detect_fn()
+        self.save(key, detections)
+        return detections
+
+    def invalidate(self, key):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            self.invalidate(key)
+
+    def entries(self):
+        # (key, size, last used) for every entry
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            entries.append((name[:-len(".npz")], stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self.invalidate(key)
+            total_bytes -= size
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from shot_stats import cumulative_player_stats, build_player_stats_df
+from utils.player_stats_drawer_utils import add_player_stats_columns
+
+class _PlayerSteps:
+    """
+    One player's last_shot_speed / last_player_speed as step functions over
+    the frames: segment i holds from starts[i] up to the next start. Every
+    column add_player_stats_columns derives from them is evaluated per segment
+    instead of per frame.
+    """
+    def __init__(self, starts, shot_speed, player_speed, num_frames, fps):
+        self.starts = starts
+        self.shot_speed = shot_speed
+        self.player_speed = player_speed
+        self.lengths = np.diff(np.append(starts, num_frames))
+        frame_time = 1 / fps
+
+        # acceleration: diff of the player speed, only non-zero on a segment's first frame
+        self.acceleration = np.nan_to_num(np.diff(player_speed, prepend=player_speed[:1]), nan=0.0)
+        self.acceleration[0] = 0.0
+
+        # distance_covered: cumsum of speed * frame_time (NaN frames add nothing and read NaN)
+        self.distance_step = np.nan_to_num(player_speed, nan=0.0) * frame_time
+        self.distance_before = np.concatenate([[0.0], np.cumsum(self.distance_step * self.lengths)[:-1]])
+
+        # rally_contribution / total_shots: count of frames where the shot speed went up
+        increased = np.zeros(len(starts), dtype=bool)
+        increased[1:] = shot_speed[1:] > shot_speed[:-1]
+        self.shot_count = np.cumsum(increased)
+
+        # shot_inconsistency is a rolling std over the frames with a shot speed
+        # (dropna), so it is evaluated on that sequence of positions
+        valid = ~np.isnan(shot_speed)
+        self.nan_before = np.concatenate([[0], np.cumsum(self.lengths * ~valid)[:-1]])
+        self.valid_starts = (starts - self.nan_before)[valid]
+        self.valid_values = shot_speed[valid]
+        self.valid_frames = int(self.lengths[valid].sum())
+
+    def segment_at(self, frames):
+        return np.searchsorted(self.starts, frames, side='right') - 1
+
+    def rolling_std_at(self, positions, window=5):
+        # Rolling std (ddof=1, min_periods=1, NaN -> 0) at positions of the dropna sequence
+        offsets = positions[:, None] - np.arange(window - 1, -1, -1)
+        in_range = offsets >= 0
+        segments = np.searchsorted(self.valid_starts, np.maximum(offsets, 0), side='right') - 1
+        values = np.where(in_range, self.valid_values[segments], 0.0)
+        counts = in_range.sum(axis=1)
+        mean = values.sum(axis=1) / counts
+        squares = np.where(in_range, (values - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        return np.where(counts > 1, np.sqrt(squares / np.maximum(counts - 1, 1)), 0.0)
+
+    def shot_inconsistency_at(self, frames):
+        segments = self.segment_at(frames)
+        result = np.full(len(frames), np.nan)
+        valid = ~np.isnan(self.shot_speed[segments])
+        if valid.any():
+            positions = frames[valid] - self.nan_before[segments[valid]]
+            result[valid] = self.rolling_std_at(positions)
+        return result
+
+    def values_at(self, frames):
+        # shot speed, player speed, acceleration, shot inconsistency, distance, rally contribution
+        frames = np.asarray(frames, dtype=np.int64)
+        segments = self.segment_at(frames)
+        is_start = frames == self.starts[segments]
+        distance = (self.distance_before[segments]
+                    + self.distance_step[segments] * (frames - self.starts[segments] + 1))
+        distance = np.where(np.isnan(self.player_speed[segments]), np.nan, distance)
+        return (self.shot_speed[segments],
+                self.player_speed[segments],
+                np.where(is_start, self.acceleration[segments], 0.0),
+                self.shot_inconsistency_at(frames),
+                distance,
+                self.shot_count[segments].astype(np.float64))
+
+    def max_stats(self):
+        # The per-player aggregates of generate_report_max_only
+        def weighted_mean(values):
+            # Mean over frames skipping 0 and NaN, like calculate_average_speed
+            keep = (values != 0) & ~np.isnan(values)
+            return (values[keep] * self.lengths[keep]).sum() / self.lengths[keep].sum() if keep.any() else np.nan
+
+        def nanmax(values):
+            return np.nanmax(values) if (~np.isnan(values)).any() else np.nan
+
+        # Inconsistency is only non-zero in the first window - 1 positions after a change
+        if self.valid_frames:
+            positions = (self.valid_starts[:, None] + np.arange(4)).ravel()
+            positions = positions[positions < self.valid_frames]
+            max_shot_inconsistency = max(0.0, float(self.rolling_std_at(positions).max()))
+        else:
+            max_shot_inconsistency = np.nan
+
+        # Distance is linear within a segment, its maximum is at a segment's first or last frame
+        speed_known = ~np.isnan(self.player_speed)
+        first = self.distance_before + self.distance_step
+        last = self.distance_before + self.distance_step * self.lengths
+        max_distance_covered = nanmax(np.where(speed_known, np.maximum(first, last), np.nan))
+
+        total_shots = int(self.shot_count[-1])
+        return {
+            "max_shot_speed": nanmax(self.shot_speed),
+            "avg_shot_speed": weighted_mean(self.shot_speed),
+            "max_speed": nanmax(self.player_speed),
+            "avg_speed": weighted_mean(self.player_speed),
+            "max_acceleration": max(0.0, float(self.acceleration.max())),
+            "max_shot_inconsistency": max_shot_inconsistency,
+            "max_distance_covered": max_distance_covered,
+            "max_rally_contribution": total_shots,
+            "total_shots": total_shots,
+            "max_rally_percentage": 100.0 if total_shots else 0.0,
+        }
+
+class EventPlayerStats:
+    """
+    Event-sparse replacement for the dense per-frame player_stats_data_df.
+
+    Only the shot events are stored (plus the all-zero row at frame 0). A frame
+    is looked up with a binary search over the event frames, and the derived
+    columns of add_player_stats_columns (acceleration, shot inconsistency,
+    distance covered, rally contribution) are computed per event, so the
+    values are the same as the dense table's. Indexing (stats[frame_num])
+    returns the 12 overlay values like get_player_stats_values, so it can be
+    passed to annotate_frames in place of that array.
+
+    distance covered and the rally columns deliberately keep the dense table's
+    definitions (the last player speed summed every frame, shot-speed increases
+    counted as shots). The live accumulator, the stored frame stats and the
+    scoring thresholds are built on them.
+    """
+    block_size = 1024
+
+    def __init__(self, shot_events, num_frames, player_1, player_2, fps):
+        self.shot_events = shot_events
+        self.num_frames = num_frames
+        self.player_1 = player_1
+        self.player_2 = player_2
+        self.fps = fps
+
+        columns = cumulative_player_stats(shot_events, player_1, player_2)
+        frame_num = columns['frame_num']
+        # Events at the same frame: the last one wins; events past the end are dropped
+        keep = np.append(frame_num[1:] != frame_num[:-1], True) & (frame_num < num_frames)
+        self.events = {name: values[keep] for name, values in columns.items()}
+
+        starts = self.events['frame_num']
+        self.players = [
+            _PlayerSteps(starts,
+                         self.events[f'player_{player_id}_last_shot_speed'].astype(np.float64),
+                         self.events[f'player_{player_id}_last_player_speed'].astype(np.float64),
+                         num_frames, fps)
+            for player_id in (player_1, player_2)
+        ]
+        self._block_start = None
+        self._block = None
+
+    def __len__(self):
+        return self.num_frames
+
+    def values_at(self, frames):
+        # (len(frames), 12) overlay values, same layout and NaN handling as get_player_stats_values
+        per_player = [player.values_at(frames) for player in self.players]
+        values = np.empty((len(frames), 12))
+        for stat in range(6):
+            values[:, 2 * stat] = per_player[0][stat]
+            values[:, 2 * stat + 1] = per_player[1][stat]
+        return np.nan_to_num(values, nan=0.0)
+
+    def __getitem__(self, frame_num):
+        if not 0 <= frame_num < self.num_frames:
+            raise IndexError(frame_num)
+        # Frames are drawn in order, so values are computed a block at a time
+        block_start = frame_num - frame_num % self.block_size
+        if self._block_start != block_start:
+            block_end = min(block_start + self.block_size, self.num_frames)
+            self._block = self.values_at(np.arange(block_start, block_end))
+            self._block_start = block_start
+        return self._block[frame_num - block_start]
+
+    def event_table(self):
+        # One row per event with the player_{id}_{stat} columns, for callers that
+        # only need the frames where a value changes (e.g. highlights)
+        return pd.DataFrame(self.events)
+
+    def to_dataframe(self):
+        # The dense per-frame table main.py used to build, for storage or export
+        player_stats = build_player_stats_df(self.shot_events, self.num_frames, self.player_1, self.player_2)
+        return add_player_stats_columns(player_stats, self.player_1, self.player_2, self.fps)
+
+    def max_stats(self):
+        # Same table as generate_report_max_only, straight from the events
+        stats_1 = self.players[0].max_stats()
+        stats_2 = self.players[1].max_stats()
+        max_stats = {}
+        for stat_name in stats_1:
+            max_stats[f"player_{self.player_1}_{stat_name}"] = [stats_1[stat_name]]
+            max_stats[f"player_{self.player_2}_{stat_name}"] = [stats_2[stat_name]]
+        return pd.DataFrame(max_stats)
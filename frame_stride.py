@@ -0,0 +1,113 @@
+import numpy as np
+
+from utils.player_stats_drawer_utils import count_video_frames, iter_video_frames_at
+
+# Detection on every k-th frame, and on every frame near a shot. The tracks are
+# interpolated back to one entry per native frame, so everything downstream
+# (shot frames, speeds with frame_time = 1 / FPS, drawing) keeps using native
+# frame numbers.
+
+def select_frames(num_frames, stride, dense_windows=()):
+    """
+    Sorted frame indices to run detection on: every stride-th frame, the last
+    frame, and every frame inside the (start, end) dense_windows.
+    """
+    selected = [np.arange(0, num_frames, max(stride, 1)), [num_frames - 1]]
+    for start, end in dense_windows:
+        selected.append(np.arange(max(start, 0), min(end, num_frames - 1) + 1))
+    return np.unique(np.concatenate(selected).astype(np.int64))
+
+def shot_windows(shot_frames, radius):
+    # (start, end) frame windows of +-radius frames around each shot frame
+    return [(int(frame) - radius, int(frame) + radius) for frame in shot_frames]
+
+def interpolate_tracks(sparse_detections, selected_frames, num_frames):
+    """
+    Expands detections made on selected_frames to every frame. Each bbox is
+    linearly interpolated between two consecutive selected frames where the
+    track was found; a track missing from a selected frame is not filled in
+    across it.
+    """
+    selected_frames = np.asarray(selected_frames, dtype=np.int64)
+    detections = [{} for _ in range(num_frames)]
+
+    # Per track: positions in selected_frames where it was found, and its bboxes
+    tracks = {}
+    for position, frame_detections in enumerate(sparse_detections):
+        for track_id, bbox in frame_detections.items():
+            if len(bbox) != 4:
+                continue
+            positions, bboxes = tracks.setdefault(track_id, ([], []))
+            positions.append(position)
+            bboxes.append(bbox)
+
+    for track_id, (positions, bboxes) in tracks.items():
+        positions = np.asarray(positions)
+        bboxes = np.asarray(bboxes, dtype=np.float64)
+        frames = selected_frames[positions]
+
+        for frame, bbox in zip(frames, bboxes):
+            detections[frame][track_id] = bbox.tolist()
+
+        # Only fill between samples that are neighbours in selected_frames
+        consecutive = np.flatnonzero(np.diff(positions) == 1)
+        for i in consecutive:
+            start, end = frames[i], frames[i + 1]
+            if end - start < 2:
+                continue
+            weights = ((np.arange(start + 1, end) - start) / (end - start))[:, None]
+            filled = bboxes[i] + (bboxes[i + 1] - bboxes[i]) * weights
+            for frame, bbox in zip(range(start + 1, end), filled.tolist()):
+                detections[frame][track_id] = bbox
+
+    return detections
+
+def detect_on_frames(tracker, video_path, selected_frames):
+    # Runs tracker.detect_frames on the selected frames only, one dict per selected frame
+    return tracker.detect_frames(iter_video_frames_at(video_path, selected_frames))
+
+def detect_strided(tracker, video_path, num_frames, selected_frames):
+    sparse_detections = detect_on_frames(tracker, video_path, selected_frames)
+    return interpolate_tracks(sparse_detections, selected_frames[:len(sparse_detections)], num_frames)
+
+def expand_to_frames(sparse_detections, selected_frames, num_frames):
+    # Detections made on selected_frames placed at their frame, every other frame empty
+    detections = [{} for _ in range(num_frames)]
+    for frame, frame_detections in zip(selected_frames.tolist(), sparse_detections):
+        detections[frame] = frame_detections
+    return detections
+
+def detect_adaptive(player_tracker, ball_tracker, video_path, stride, shot_radius, num_frames=None):
+    """
+    Adaptive stride detection for both trackers. The ball is first detected
+    every stride frames to find rough shot frames. Then both trackers run on
+    every frame within shot_radius frames of those shots, and on every stride-th
+    frame elsewhere. Returns per-frame (player_detections, ball_detections).
+    Player tracks are interpolated; the ball is only set on the frames where it
+    was detected, so its gaps can still be told apart from real detections (the
+    ball tracker interpolates them). num_frames defaults to the number of frames
+    the video actually decodes to.
+    """
+    if num_frames is None:
+        num_frames = count_video_frames(video_path)
+
+    coarse_frames = select_frames(num_frames, stride)
+    coarse_ball = detect_on_frames(ball_tracker, video_path, coarse_frames)
+    coarse_track = ball_tracker.interpolate_ball_positions(
+        interpolate_tracks(coarse_ball, coarse_frames[:len(coarse_ball)], num_frames))
+    rough_shot_frames = ball_tracker.get_ball_shot_frames(coarse_track)
+
+    selected_frames = select_frames(num_frames, stride, shot_windows(rough_shot_frames, shot_radius))
+
+    # Ball: only the frames the coarse pass did not cover
+    extra_frames = np.setdiff1d(selected_frames, coarse_frames[:len(coarse_ball)])
+    extra_ball = detect_on_frames(ball_tracker, video_path, extra_frames)
+    ball_by_frame = dict(zip(coarse_frames.tolist(), coarse_ball))
+    ball_by_frame.update(zip(extra_frames.tolist(), extra_ball))
+    ball_frames = np.array(sorted(ball_by_frame), dtype=np.int64)
+    ball_detections = expand_to_frames([ball_by_frame[frame] for frame in ball_frames], ball_frames, num_frames)
+
+    player_detections = detect_strided(player_tracker, video_path, num_frames, selected_frames)
+
+    print(f"✅ Adaptive stride: detection on {len(selected_frames)} of {num_frames} frames")
+    return player_detections, ball_detections
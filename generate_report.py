@@ -1,9 +1,7 @@
-import pandas as pd
-import markdown
-import pdfkit
+import os
+import shutil
 
 WKHTMLTOPDF_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe" 
-CONFIG = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
 
 CSS_STYLE = """
 <style>
@@ -99,41 +97,159 @@ def evaluate_talent(player_stats, player):
 
     return summary
 
-def generate_player_report(player_stats, player, md_output, pdf_output):
-    if player_stats.empty:
-        print("EMPTY!")
-        return None
+REPORT_METRICS = [
+    ("Max Shot Speed", "max_shot_speed"),
+    ("Avg Shot Speed", "avg_shot_speed"),
+    ("Max Player Speed", "max_speed"),
+    ("Avg Player Speed", "avg_speed"),
+    ("Max Acceleration", "max_acceleration"),
+    ("Shot inConsistency", "max_shot_inconsistency")
+]
+
+def build_player_report(player_stats, player):
+    # Report content shared by every renderer
+    metrics = [(metric, player_stats.get(f"player_{player}_{stat}", [0])[0]) for metric, stat in REPORT_METRICS]
+    return {
+        "title": f"Tennis Player Report - {player}",
+        "metrics": metrics,
+        "analysis": [(metric, generate_paragraph(metric, value)) for metric, value in metrics],
+        "summary": evaluate_talent(player_stats, player),
+    }
 
-    content = f"""# Tennis Player Report - {player}
+def report_to_markdown(report):
+    content = f"""# {report['title']}
 
 ## Key Metrics Overview
 
 | Metric | Value |
 |--------|-------|
 """
-
-    metrics = [
-        ("Max Shot Speed", f"player_{player}_max_shot_speed"),
-        ("Avg Shot Speed", f"player_{player}_avg_shot_speed"),
-        ("Max Player Speed", f"player_{player}_max_speed"),
-        ("Avg Player Speed", f"player_{player}_avg_speed"),
-        ("Max Acceleration", f"player_{player}_max_acceleration"),
-        ("Shot inConsistency", f"player_{player}_max_shot_inconsistency")
-    ]
-
-    for metric, key in metrics:
-        value = player_stats.get(key, [0])[0]
+    for metric, value in report["metrics"]:
         content += f"| {metric} | {value:.2f} |\n"
 
     content += "\n## Key Metrics Analysis\n"
 
-    for metric, key in metrics:
-        value = player_stats.get(key, [0])[0]
-        content += f"### {metric}\n{generate_paragraph(metric, value)}\n\n"
+    for metric, paragraph in report["analysis"]:
+        content += f"### {metric}\n{paragraph}\n\n"
+
+    content += f"""## Overall Summary\n{report['summary']}\n"""
+    return content
+
+class WkhtmltopdfRenderer:
+    # Markdown -> HTML -> wkhtmltopdf, one subprocess per report
+    def __init__(self, wkhtmltopdf_path=WKHTMLTOPDF_PATH):
+        try:
+            import pdfkit
+            import markdown
+        except ImportError as e:
+            raise RuntimeError(f"The wkhtmltopdf report renderer needs pdfkit and markdown ({e})") from e
+        if not os.path.isfile(wkhtmltopdf_path):
+            # Not at the configured path, e.g. not on Windows: look on PATH
+            wkhtmltopdf_path = shutil.which("wkhtmltopdf")
+        if wkhtmltopdf_path is None:
+            raise RuntimeError(f"The wkhtmltopdf report renderer needs wkhtmltopdf, not found at "
+                               f"{WKHTMLTOPDF_PATH} or on PATH")
+        self.pdfkit = pdfkit
+        self.markdown = markdown
+        self.config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
+
+    def render(self, report, pdf_file):
+        html_content = CSS_STYLE + self.markdown.markdown(report_to_markdown(report), extensions=["extra", "tables"])
+        self.pdfkit.from_string(html_content, pdf_file, configuration=self.config)
+
+class FpdfRenderer:
+    # In-process PDF writer (fpdf2), no subprocess and no intermediate files
+    def __init__(self):
+        try:
+            from fpdf import FPDF
+        except ImportError as e:
+            raise RuntimeError("The fpdf report renderer needs fpdf2 (pip install fpdf2)") from e
+        self.FPDF = FPDF
+
+    def render(self, report, pdf_file):
+        pdf = self.FPDF()
+        pdf.set_margins(15, 15, 15)
+        pdf.add_page()
+
+        pdf.set_font("Helvetica", "B", 20)
+        pdf.set_text_color(51, 51, 51)
+        pdf.multi_cell(0, 10, report["title"], new_x="LMARGIN", new_y="NEXT")
+
+        self._heading(pdf, "Key Metrics Overview")
+        pdf.set_font("Helvetica", "", 11)
+        with pdf.table(text_align="CENTER", headings_style=self._table_headings_style()) as table:
+            table.row(["Metric", "Value"])
+            for metric, value in report["metrics"]:
+                table.row([metric, f"{value:.2f}"])
+
+        self._heading(pdf, "Key Metrics Analysis")
+        for metric, paragraph in report["analysis"]:
+            pdf.set_font("Helvetica", "B", 12)
+            pdf.multi_cell(0, 8, metric, new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font("Helvetica", "", 11)
+            pdf.multi_cell(0, 6, paragraph, new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(2)
+
+        self._heading(pdf, "Overall Summary")
+        pdf.set_font("Helvetica", "", 11)
+        pdf.multi_cell(0, 6, report["summary"], new_x="LMARGIN", new_y="NEXT")
+
+        pdf.output(pdf_file)
 
-    summary = evaluate_talent(player_stats, player)
+    def _heading(self, pdf, text):
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "B", 15)
+        pdf.multi_cell(0, 9, text, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(1)
 
-    content += f"""## Overall Summary\n{summary}\n"""
+    def _table_headings_style(self):
+        from fpdf.fonts import FontFace
+        return FontFace(emphasis="BOLD", fill_color=(244, 244, 244))
+
+# In order of preference
+REPORT_RENDERERS = {
+    "fpdf": FpdfRenderer,
+    "wkhtmltopdf": WkhtmltopdfRenderer,
+}
+
+def get_report_renderer(name=None):
+    """
+    The named renderer, or with name=None the first one that is installed
+    (fpdf, then wkhtmltopdf). Raises RuntimeError saying what is missing when
+    the renderer, or with name=None every renderer, is unavailable.
+    """
+    if name is not None:
+        if name not in REPORT_RENDERERS:
+            raise ValueError(f"Unknown report renderer: {name}")
+        return REPORT_RENDERERS[name]()
+
+    errors = []
+    for renderer_class in REPORT_RENDERERS.values():
+        try:
+            return renderer_class()
+        except RuntimeError as e:
+            errors.append(str(e))
+    raise RuntimeError("No PDF report renderer is available. " + " ".join(errors))
+
+def generate_player_report(player_stats, player, md_output, pdf_output, renderer=None):
+    """
+    Without a renderer the report goes through a Markdown file and wkhtmltopdf as
+    before. With one (see get_report_renderer) it is rendered straight to
+    pdf_output and md_output may be None.
+    """
+    # player_stats: a max_game_report DataFrame or a {column: [value]} dict
+    if len(player_stats) == 0:
+        print("EMPTY!")
+        return None
+
+    report = build_player_report(player_stats, player)
+
+    if renderer is not None:
+        renderer.render(report, pdf_output)
+        print(f"✅ PDF report saved as {pdf_output}")
+        return
+
+    content = report_to_markdown(report)
 
     with open(md_output, "w", encoding="utf-8") as file:
         file.write(content)
@@ -143,11 +259,46 @@ def generate_player_report(player_stats, player, md_output, pdf_output):
     convert_md_to_pdf(md_output, pdf_output)
 
 def convert_md_to_pdf(md_file, pdf_file):
+    # markdown and pdfkit are only needed here, not when importing this module
+    import markdown
+    import pdfkit
+
     with open(md_file, "r", encoding="utf-8") as file:
         md_content = file.read()
 
     html_content = CSS_STYLE + markdown.markdown(md_content, extensions=["extra", "tables"])
 
-    pdfkit.from_string(html_content, pdf_file, configuration=CONFIG)
+    pdfkit.from_string(html_content, pdf_file, configuration=pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH))
 
     print(f"✅ PDF report saved as {pdf_file}")
+
+def player_ids_in(max_stats_df):
+    # Player ids present in a max_game_report table (player_{id}_... columns) or dict
+    player_ids = []
+    for col in getattr(max_stats_df, "columns", max_stats_df):
+        parts = str(col).split("_")
+        if len(parts) > 2 and parts[0] == "player" and parts[1].isdigit() and int(parts[1]) not in player_ids:
+            player_ids.append(int(parts[1]))
+    return player_ids
+
+def generate_reports_batch(matches, output_dir, renderer=None):
+    """
+    Render a report for every player of every match with one renderer instance
+    (a renderer, its name, or None for the first installed one).
+    matches maps a match id to its max_game_report DataFrame (one row). Returns
+    the written PDF paths.
+    """
+    if renderer is None or isinstance(renderer, str):
+        renderer = get_report_renderer(renderer)
+    os.makedirs(output_dir, exist_ok=True)
+
+    pdf_paths = []
+    for match_id, max_stats_df in matches.items():
+        max_stats_df = max_stats_df.reset_index(drop=True)
+        for player in player_ids_in(max_stats_df):
+            pdf_output = os.path.join(output_dir, f"{match_id}_player_{player}_report.pdf")
+            renderer.render(build_player_report(max_stats_df, player), pdf_output)
+            pdf_paths.append(pdf_output)
+
+    print(f"✅ {len(pdf_paths)} PDF reports saved in {output_dir}")
+    return pdf_paths
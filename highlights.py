@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.player_stats_drawer_utils import get_video_fps, iter_video_range, save_video_stream
+
+# Per-frame stats columns whose peaks make a highlight: the fastest shots and
+# the fastest player movements
+HIGHLIGHT_STATS = ['last_shot_speed', 'last_player_speed']
+
+def top_stat_frames(player_stats, column, n=10):
+    """
+    Frames where `column` takes a new value (the shot frames for the last_*
+    columns), the n largest values first. Returns (frames, values).
+    """
+    values = player_stats[column].to_numpy(dtype=np.float64)
+    changed = np.flatnonzero(np.diff(values, prepend=np.nan) != 0)
+    changed = changed[~np.isnan(values[changed]) & (values[changed] > 0)]
+    order = np.argsort(-values[changed], kind='stable')[:n]
+    frames = player_stats['frame_num'].to_numpy()[changed[order]]
+    return frames, values[changed[order]]
+
+def merge_ranges(frame_ranges, num_frames=None):
+    # Sorts, clamps to the video and merges overlapping or touching (start, end) ranges
+    merged = []
+    for start, end in sorted((int(start), int(end)) for start, end in frame_ranges):
+        start = max(start, 0)
+        if num_frames is not None:
+            end = min(end, num_frames - 1)
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def highlight_ranges(player_stats, player_1, player_2, fps, n=20, before=1.0, after=2.0, num_frames=None):
+    """
+    Frame ranges around the top moments of every HIGHLIGHT_STATS column for
+    both players, the same values generate_report_max_only takes the maxima
+    of. Each moment gets `before` / `after` seconds around its frame and
+    overlapping ranges are merged.
+    """
+    columns = [f'player_{player_id}_{stat}' for stat in HIGHLIGHT_STATS for player_id in (player_1, player_2)]
+    per_column = max(n // len(columns), 1)
+
+    frame_ranges = []
+    for column in columns:
+        frames, _ = top_stat_frames(player_stats, column, per_column)
+        frame_ranges.extend((frame - int(before * fps), frame + int(after * fps)) for frame in frames)
+    return merge_ranges(frame_ranges, num_frames)
+
+def write_clip(video_path, start_frame, end_frame, output_path, fps, annotate=None):
+    # Decodes only start_frame..end_frame; annotate(frames, start_frame) draws on them
+    frames = iter_video_range(video_path, start_frame, end_frame)
+    if annotate is not None:
+        frames = annotate(frames, start_frame)
+    return save_video_stream(frames, output_path, fps)
+
+def export_clips(video_path, frame_ranges, output_dir="highlights", annotate=None, max_workers=4, fps=None):
+    """
+    Writes one clip per (start, end) frame range to output_dir and returns
+    their paths. Each clip seeks the source video to its first frame, so only
+    the clip frames are decoded, and clips are written in parallel threads
+    (OpenCV releases the GIL while decoding and encoding). annotate must be
+    safe to call from several threads at once.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if fps is None:
+        fps = get_video_fps(video_path)
+
+    clip_paths = [os.path.join(output_dir, f"clip_{i:03d}_{start}_{end}.avi")
+                  for i, (start, end) in enumerate(frame_ranges)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(write_clip, video_path, start, end, clip_path, fps, annotate)
+                   for (start, end), clip_path in zip(frame_ranges, clip_paths)]
+        for future in futures:
+            future.result()
+
+    print(f"✅ {len(clip_paths)} clips saved in {output_dir}")
+    return clip_paths
@@ -0,0 +1,179 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from app_rep import stats_to_long, score_players
+
+class RunningPlayerStats:
+    """
+    O(1) running version of the per-player columns draw_player_stats adds and the
+    maxima generate_report_max_only takes over them. Fed one frame (or a run of
+    identical frames) at a time with the player's last_shot_speed and
+    last_player_speed.
+    """
+    def __init__(self, fps, window=5):
+        self.frame_time = 1 / fps
+        self.frames = 0
+
+        self.last_shot_speed = None
+        self.last_player_speed = None
+
+        self.max_shot_speed = -math.inf
+        self.max_speed = -math.inf
+        self.shot_speed_sum = 0.0
+        self.shot_speed_count = 0
+        self.speed_sum = 0.0
+        self.speed_count = 0
+
+        self.max_acceleration = -math.inf
+        self.shot_window = deque(maxlen=window)
+        self.max_shot_inconsistency = -math.inf
+        self.distance_covered = 0.0
+        self.max_distance_covered = -math.inf
+        self.rally_contribution = 0
+        self.total_shots = 0
+        self.max_rally_percentage = -math.inf
+
+    def update(self, shot_speed, player_speed, n_frames=1):
+        if n_frames <= 0:
+            return
+
+        # Max / mean of the raw columns (mean skips zeros like calculate_average_speed)
+        self.max_shot_speed = max(self.max_shot_speed, shot_speed)
+        self.max_speed = max(self.max_speed, player_speed)
+        if shot_speed != 0 and not math.isnan(shot_speed):
+            self.shot_speed_sum += shot_speed * n_frames
+            self.shot_speed_count += n_frames
+        if player_speed != 0 and not math.isnan(player_speed):
+            self.speed_sum += player_speed * n_frames
+            self.speed_count += n_frames
+
+        # Acceleration: diff of player speed, 0 on the first frame and for repeated frames
+        if self.last_player_speed is None:
+            acceleration = 0.0
+        else:
+            acceleration = player_speed - self.last_player_speed
+        self.max_acceleration = max(self.max_acceleration, acceleration)
+        if n_frames > 1:
+            self.max_acceleration = max(self.max_acceleration, 0.0)
+
+        # Rally contribution / total shots: frames where the shot speed went up
+        if self.last_shot_speed is not None and shot_speed > self.last_shot_speed:
+            self.rally_contribution += 1
+            self.total_shots += 1
+
+        # Shot inconsistency: rolling std over the last `window` frames. After
+        # `window` identical frames the std is 0, so longer runs cost the same.
+        # NaN frames are left out of the window like the dropna in the batch path.
+        if not math.isnan(shot_speed):
+            for _ in range(min(n_frames, self.shot_window.maxlen)):
+                self.shot_window.append(shot_speed)
+                if len(self.shot_window) > 1:
+                    std = float(np.std(self.shot_window, ddof=1))
+                else:
+                    std = 0.0
+                self.max_shot_inconsistency = max(self.max_shot_inconsistency, std)
+
+        # Distance: cumulative speed * frame time, its maximum is at one end of the run.
+        # cumsum skips NaN, and leaves NaN (out of the max) on those frames.
+        if not math.isnan(player_speed):
+            self.distance_covered += player_speed * self.frame_time * n_frames
+            first_frame_distance = self.distance_covered - player_speed * self.frame_time * (n_frames - 1)
+            self.max_distance_covered = max(self.max_distance_covered, first_frame_distance, self.distance_covered)
+
+        rally_percentage = self.rally_contribution / self.total_shots * 100 if self.total_shots else 0.0
+        self.max_rally_percentage = max(self.max_rally_percentage, rally_percentage)
+
+        self.last_shot_speed = shot_speed
+        self.last_player_speed = player_speed
+        self.frames += n_frames
+
+    def max_stats(self):
+        def value(v):
+            return v if v != -math.inf else np.nan
+
+        return {
+            "max_shot_speed": value(self.max_shot_speed),
+            "avg_shot_speed": self.shot_speed_sum / self.shot_speed_count if self.shot_speed_count else np.nan,
+            "max_speed": value(self.max_speed),
+            "avg_speed": self.speed_sum / self.speed_count if self.speed_count else np.nan,
+            "max_acceleration": value(self.max_acceleration),
+            "max_shot_inconsistency": value(self.max_shot_inconsistency),
+            "max_distance_covered": value(self.max_distance_covered),
+            "max_rally_contribution": self.rally_contribution if self.frames else np.nan,
+            "total_shots": self.total_shots if self.frames else np.nan,
+            "max_rally_percentage": value(self.max_rally_percentage),
+        }
+
+class LiveMatchStats:
+    """
+    Incremental max_game_report for a live feed. Feed per-frame stats rows
+    (update / update_row) or only the shot events (add_shot); the results match
+    generate_report_max_only over the same frames.
+    """
+    def __init__(self, player_1, player_2, fps):
+        self.player_1 = player_1
+        self.player_2 = player_2
+        self.players = {player_1: RunningPlayerStats(fps), player_2: RunningPlayerStats(fps)}
+        self.frames = 0
+        self.current_row = {player_1: (0.0, 0.0), player_2: (0.0, 0.0)}
+        # Frame of the last add_shot, held back until a later frame shows up
+        self.pending_shot_frame = None
+
+    def update(self, shot_speed_1, player_speed_1, shot_speed_2, player_speed_2, n_frames=1):
+        self._flush_shot()
+        self.current_row = {self.player_1: (shot_speed_1, player_speed_1),
+                            self.player_2: (shot_speed_2, player_speed_2)}
+        for player_id, (shot_speed, player_speed) in self.current_row.items():
+            self.players[player_id].update(shot_speed, player_speed, n_frames)
+        self.frames += n_frames
+
+    def update_row(self, row, n_frames=1):
+        # row: one row of player_stats_data_df (or any mapping with the same keys)
+        self.update(row[f'player_{self.player_1}_last_shot_speed'], row[f'player_{self.player_1}_last_player_speed'],
+                    row[f'player_{self.player_2}_last_shot_speed'], row[f'player_{self.player_2}_last_player_speed'],
+                    n_frames)
+
+    def advance_to(self, frame_num):
+        # Repeat the current row for every frame before frame_num (the forward fill)
+        self._flush_shot()
+        self._repeat_current(frame_num - self.frames)
+
+    def add_shot(self, frame_num, player_shot_ball, shot_speed, opponent_speed):
+        # One shot event as computed in shot_stats, applied at its start frame.
+        # Events on the same frame share one row, the later one winning like
+        # expand_to_frames, so the frame is only counted once.
+        if frame_num != self.pending_shot_frame:
+            self.advance_to(frame_num)
+            self.pending_shot_frame = frame_num
+        opponent_id = self.player_2 if player_shot_ball == self.player_1 else self.player_1
+        row = dict(self.current_row)
+        row[player_shot_ball] = (shot_speed, row[player_shot_ball][1])
+        row[opponent_id] = (row[opponent_id][0], opponent_speed)
+        self.current_row = row
+
+    def _flush_shot(self):
+        if self.pending_shot_frame is not None:
+            self.pending_shot_frame = None
+            self.update(*self.current_row[self.player_1], *self.current_row[self.player_2])
+
+    def _repeat_current(self, n_frames):
+        if n_frames > 0:
+            self.update(*self.current_row[self.player_1], *self.current_row[self.player_2], n_frames)
+
+    def max_game_report(self):
+        # Same columns as generate_report_max_only
+        self._flush_shot()
+        stats_1 = self.players[self.player_1].max_stats()
+        stats_2 = self.players[self.player_2].max_stats()
+        max_stats = {}
+        for stat_name in stats_1:
+            max_stats[f"player_{self.player_1}_{stat_name}"] = [stats_1[stat_name]]
+            max_stats[f"player_{self.player_2}_{stat_name}"] = [stats_2[stat_name]]
+        return pd.DataFrame(max_stats)
+
+    def scores(self):
+        # One row per player with points, Total_Score and Score_Percentage
+        return score_players(stats_to_long(self.max_game_report()))
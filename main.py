@@ -1,48 +1,226 @@
-from utils import (read_video, 
-                   save_video,
-                   measure_distance,
-                   draw_player_stats,
-                   convert_pixel_distance_to_meters
-                   )
-import constants
-from app_rep import calculate_player_scores
-from generate_report import generate_player_report
-from utils.player_stats_drawer_utils import generate_report_max_only,get_video_fps
-from trackers import PlayerTracker,BallTracker
-from court_line_detector import CourtLineDetector
-from mini_court import MiniCourt  
-import cv2  
-import pandas as pd
-from copy import deepcopy
-import numpy as np
-def main():
+import argparse
+import os
+
+def annotate_frames(video_frames, player_tracker, player_detections, ball_tracker, ball_detections,
+                    court_line_detector, court_keypoints, mini_court,
+                    player_mini_court_detections, ball_mini_court_detections,
+                    player_stats_values, profiler=None, start_frame=0,
+                    court_mode="track", court_refresh_interval=None):
+    # Single pass: every layer is drawn in place on each frame as it is pulled.
+    # The mini court background is rasterized once. The court keypoints follow
+    # the keypoint tracker (court_mode / court_refresh_interval, see
+    # CourtKeypointTracker) and are drawn directly, which is cheaper than
+    # blending a cached layer of 14 points and a polygon.
+    import cv2
+    from compositor import FrameCompositor
+    from court_line_detector import CourtKeypointTracker
+    from utils.player_stats_drawer_utils import PlayerStatsOverlay
+
+    compositor = FrameCompositor(profiler)
+
+    ## Draw Player Bounding Boxes
+    compositor.add_dynamic('draw_player_bboxes',
+                           lambda frame, i: player_tracker.draw_bboxes([frame], [player_detections[i]])[0])
+    compositor.add_dynamic('draw_ball_bboxes',
+                           lambda frame, i: ball_tracker.draw_bboxes([frame], [ball_detections[i]])[0])
+
+    ## Draw court Keypoints
+    keypoint_tracker = CourtKeypointTracker(court_line_detector, court_keypoints, mode=court_mode,
+                                            refresh_interval=court_refresh_interval)
+    def draw_court_keypoints(frame, i):
+        keypoints = keypoint_tracker.update(frame)
+        frame = court_line_detector.draw_keypoints(frame, keypoints)
+        return court_line_detector.draw_court_boundaries(frame, keypoints)
+    compositor.add_dynamic('draw_court_keypoints', draw_court_keypoints)
+
+    # Draw Mini Court
+    compositor.add_static('draw_mini_court', lambda frame: mini_court.draw_mini_court([frame])[0])
+    compositor.add_dynamic('draw_mini_court_players',
+                           lambda frame, i: mini_court.draw_points_on_mini_court([frame], [player_mini_court_detections[i]])[0])
+    compositor.add_dynamic('draw_mini_court_ball',
+                           lambda frame, i: mini_court.draw_points_on_mini_court([frame], [ball_mini_court_detections[i]], color=(0,255,255))[0])
+
+    # Draw Player Stats
+    stats_overlay = None
+    def draw_stats(frame, i):
+        nonlocal stats_overlay
+        if i < len(player_stats_values):
+            if stats_overlay is None:
+                stats_overlay = PlayerStatsOverlay(frame.shape)
+            stats_overlay.draw(frame, player_stats_values[i])
+    compositor.add_dynamic('draw_player_stats', draw_stats)
+
+    ## Draw frame number on top left corner
+    compositor.add_dynamic('draw_frame_number',
+                           lambda frame, i: cv2.putText(frame, f"Frame: {i}",(10,30),cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2))
+
+    yield from compositor.iter_compose(video_frames, start_frame)
+    keypoint_tracker.report()
+
+def detect_in_one_pass(video_frames, player_tracker=None, ball_tracker=None, profiler=None):
+    """
+    Feeds every decoded frame to both trackers (detect_frame) as it is pulled,
+    so the video is decoded once for player and ball detection. A tracker left
+    as None is skipped (e.g. its detections are cached) and its detections are
+    returned as None.
+    """
+    from instrumentation import PipelineProfiler
+
+    if profiler is None:
+        profiler = PipelineProfiler(enabled=False)
+    player_detections = [] if player_tracker is not None else None
+    ball_detections = [] if ball_tracker is not None else None
+    for frame in video_frames:
+        if player_tracker is not None:
+            with profiler.stage('player_detection', frames=1):
+                player_detections.append(player_tracker.detect_frame(frame))
+        if ball_tracker is not None:
+            with profiler.stage('ball_detection', frames=1):
+                ball_detections.append(ball_tracker.detect_frame(frame))
+    return player_detections, ball_detections
+
+PLAYER_MODEL_PATH = 'yolov8x'
+BALL_MODEL_PATH = 'models/yolo5_last.pt'
+COURT_MODEL_PATH = "models/keypoints_model.pth"
+
+def load_models(num_threads=None):
+    # Everything that is expensive to construct, so it can be shared across matches.
+    # torch and the trackers are only imported here, importing main stays cheap.
+    from trackers import PlayerTracker, BallTracker
+    from court_line_detector import CourtLineDetector
+
+    return {
+        'player_tracker': PlayerTracker(model_path=PLAYER_MODEL_PATH),
+        'ball_tracker': BallTracker(model_path=BALL_MODEL_PATH),
+        'court_line_detector': CourtLineDetector(COURT_MODEL_PATH, num_threads=num_threads),
+    }
+
+def analyze_match(input_video_path, output_video_path, models=None,
+                  report_path="max_game_report.csv", cache_dir="tracker_cache", profiler=None,
+                  projection="mini_court", pipelined=False, rally_index_path=None,
+                  highlights_dir=None, num_highlights=20, stats_store=None, match_id=None,
+                  stride=1, shot_window=0.5, detections=None, court_mode="track",
+                  court_refresh_interval=None):
+    """
+    Full pipeline for one match video. Writes the annotated video to
+    output_video_path and returns (max_stats_df, scores, metrics), metrics
+    being the match's MetricGraph (see metrics.match_metrics), e.g. to
+    re-score with other thresholds without re-running the match. Pass a
+    PipelineProfiler to record per-stage timings. projection="homography"
+    computes the shot stats from a court homography in metres instead of the
+    mini court coordinates (the mini court is still used for drawing).
+    pipelined=True decodes and encodes on background threads so I/O overlaps
+    with detection and drawing; the output video is identical.
+    rally_index_path saves the rally index (see rallies.RallyIndex) as JSON.
+    highlights_dir writes short annotated clips around the fastest shots and
+    player movements; output_video_path=None skips the full annotated video.
+    stats_store (a MatchStatsStore or its directory) appends the max and
+    per-frame stats under match_id (default: the video file name).
+    stride > 1 runs the trackers on every stride-th frame, and on every frame
+    within shot_window seconds of a shot, and interpolates the tracks in
+    between (see frame_stride). Frame numbers and FPS stay native.
+    detections=(player_detections, ball_detections) skips the trackers and the
+    detection cache, e.g. for detections stitched together by sharded.py.
+    court_mode="per_frame" re-runs the court keypoint model on every drawn
+    frame (moving-camera footage); the default "track" reuses the keypoints
+    until the scene changes or every court_refresh_interval frames. The shot
+    stats still use the keypoints of the first frame.
+    """
+    # Imported here rather than at the top, importing main (the CLI, the batch and
+    # sharded workers) doesn't pull in OpenCV, pandas or the pipeline stages
+    import constants
+    from utils import convert_pixel_distance_to_meters
+    from utils.player_stats_drawer_utils import (get_video_fps,
+                                                 iter_video_frames,
+                                                 iter_video_frames_threaded,
+                                                 read_first_frame,
+                                                 save_video_stream,
+                                                 save_video_stream_threaded
+                                                 )
+    from detection_cache import DetectionCache
+    from shot_stats import gather_shot_positions, compute_shot_events
+    from metrics import match_metrics
+    from instrumentation import PipelineProfiler
+    from court_projection import CourtProjector
+    from rallies import ball_visible_mask, segment_rallies
+    from highlights import highlight_ranges, export_clips
+    from stats_store import MatchStatsStore
+    from frame_stride import detect_adaptive
+
+    if profiler is None:
+        profiler = PipelineProfiler(enabled=False)
+    read_frames = iter_video_frames_threaded if pipelined else iter_video_frames
+    write_frames = save_video_stream_threaded if pipelined else save_video_stream
+
+    if models is None:
+        with profiler.stage('load_models'):
+            models = load_models()
+
     # Read Video
-    input_video_path = "input_videos/input_video.mp4"
-    FPS = get_video_fps(input_video_path)
-    video_frames = read_video(input_video_path)
+    with profiler.stage('video_read', frames=1):
+        FPS = get_video_fps(input_video_path)
+        first_frame = read_first_frame(input_video_path)
 
     # Detect Players and Ball
-    player_tracker = PlayerTracker(model_path='yolov8x')
-    ball_tracker = BallTracker(model_path='models/yolo5_last.pt')
-
-    player_detections = player_tracker.detect_frames(video_frames,
-                                                     read_from_stub=True,
-                                                     stub_path="tracker_stubs/player_detections1.pkl"
-                                                     )
-    ball_detections = ball_tracker.detect_frames(video_frames,
-                                                     read_from_stub=True  ,
-                                                     stub_path="tracker_stubs/ball_detections1.pkl"
-                                                       )
-    ball_detections = ball_tracker.interpolate_ball_positions(ball_detections)
+    player_tracker = models['player_tracker']
+    ball_tracker = models['ball_tracker']
+
+    # Detections are cached by video content, model weights and parameters.
+    # Frames are streamed from disk, the trackers never see the whole video at once.
+    if detections is not None:
+        player_detections, ball_detections = detections
+    else:
+        detection_cache = DetectionCache(cache_dir)
+        player_params = {'tracker': 'player'}
+        ball_params = {'tracker': 'ball'}
+        if stride > 1:
+            shot_radius = int(round(shot_window * FPS))
+            for params in (player_params, ball_params):
+                params.update(stride=stride, shot_radius=shot_radius)
+            # Only the detected ball frames are set, the ball tracker interpolates the rest
+            ball_params.update(detected_only=True)
+        player_key, player_detections = detection_cache.lookup(input_video_path, PLAYER_MODEL_PATH, player_params)
+        ball_key, ball_detections = detection_cache.lookup(input_video_path, BALL_MODEL_PATH, ball_params)
+        detect_players, detect_ball = player_detections is None, ball_detections is None
+
+        if stride > 1 and (detect_players or detect_ball):
+            # Adaptive stride: both trackers run on every stride-th frame and on every
+            # frame near a shot, then the tracks are interpolated back to every frame
+            with profiler.stage('player_detection'):
+                player_detections, ball_detections = detect_adaptive(player_tracker, ball_tracker,
+                                                                      input_video_path, stride, shot_radius)
+            profiler.add_frames('player_detection', len(player_detections))
+        elif detect_players or detect_ball:
+            # One decode pass feeds both trackers, only the drawing decodes the video again
+            detected_players, detected_ball = detect_in_one_pass(
+                profiler.iter_stage('video_read', read_frames(input_video_path)),
+                player_tracker if detect_players else None,
+                ball_tracker if detect_ball else None,
+                profiler)
+            if detect_players:
+                player_detections = detected_players
+            if detect_ball:
+                ball_detections = detected_ball
+        if detect_players:
+            detection_cache.save(player_key, player_detections)
+        if detect_ball:
+            detection_cache.save(ball_key, ball_detections)
+
+    with profiler.stage('ball_detection'):
+        # Frames with a real ball detection, the rally segmentation needs the gaps
+        ball_visible = ball_visible_mask(ball_detections)
+        ball_detections = ball_tracker.interpolate_ball_positions(ball_detections)
+    num_frames = len(player_detections)
     
     
     # Court Line Detector model
-    court_model_path = "models/keypoints_model.pth"
-    court_line_detector = CourtLineDetector(court_model_path)
-    court_keypoints = court_line_detector.predict(video_frames[0])
+    court_line_detector = models['court_line_detector']
+    with profiler.stage('court_keypoints', frames=1):
+        court_keypoints = court_line_detector.predict(first_frame)
     
     # choose players
-    player_detections = player_tracker.choose_and_filter_players(court_keypoints, player_detections)
+    with profiler.stage('choose_players', frames=num_frames):
+        player_detections = player_tracker.choose_and_filter_players(court_keypoints, player_detections)
 
     # Extract exactly two keys from each dictionary
     filtered_data = [{k: v for i, (k, v) in enumerate(item.items()) if i < 2} for item in player_detections]
@@ -58,126 +236,102 @@ def main():
 
     
     # MiniCourt
-    mini_court = MiniCourt(video_frames[0]) 
+    from mini_court import MiniCourt
+    mini_court = MiniCourt(first_frame) 
 
     # Detect ball shots
-    ball_shot_frames= ball_tracker.get_ball_shot_frames(ball_detections)
+    with profiler.stage('ball_shot_detection', frames=num_frames):
+        ball_shot_frames= ball_tracker.get_ball_shot_frames(ball_detections)
 
     # Convert positions to mini court positions
-    player_mini_court_detections, ball_mini_court_detections = mini_court.convert_bounding_boxes_to_mini_court_coordinates(player_detections, 
-                                                                                                          ball_detections,
-                                                                                                          court_keypoints,player_1,player_2)
-
-    player_stats_data = [{
-        'frame_num':0,
-        f'player_{player_1}_number_of_shots':0,
-        f'player_{player_1}_total_shot_speed':0,
-        f'player_{player_1}_last_shot_speed':0,
-        f'player_{player_1}_total_player_speed':0,
-        f'player_{player_1}_last_player_speed':0,
-
-        f'player_{player_2}_number_of_shots':0,
-        f'player_{player_2}_total_shot_speed':0,
-        f'player_{player_2}_last_shot_speed':0,
-        f'player_{player_2}_total_player_speed':0,
-        f'player_{player_2}_last_player_speed':0,
-    } ]
-    
-    for ball_shot_ind in range(len(ball_shot_frames)-1):
-        start_frame = ball_shot_frames[ball_shot_ind]
-        end_frame = ball_shot_frames[ball_shot_ind+1]
-        ball_shot_time_in_seconds = (end_frame-start_frame)/FPS 
-
-        # Get distance covered by the ball
-        distance_covered_by_ball_pixels = measure_distance(ball_mini_court_detections[start_frame][1],
-                                                           ball_mini_court_detections[end_frame][1])
-        distance_covered_by_ball_meters = convert_pixel_distance_to_meters( distance_covered_by_ball_pixels,
-                                                                           constants.DOUBLE_LINE_WIDTH,
-                                                                           mini_court.get_width_of_mini_court()
-                                                                           ) 
-
-        # Speed of the ball shot in km/h
-        speed_of_ball_shot = distance_covered_by_ball_meters/ball_shot_time_in_seconds * 3.6
-
-        # player who the ball
-        # player who shot the ball
-        player_positions = player_mini_court_detections[start_frame]
-        
-        # Choose the closer player to the ball
-        player_shot_ball = min([player_1,player_2], key=lambda player_id: measure_distance(player_positions[player_id], ball_mini_court_detections[start_frame][1]))
-
-
-        # opponent player speed
-        opponent_player_id = player_2 if player_shot_ball == player_1 else player_1
-
-        distance_covered_by_opponent_pixels = measure_distance(player_mini_court_detections[start_frame][opponent_player_id],
-                                                                player_mini_court_detections[end_frame][opponent_player_id])
-        distance_covered_by_opponent_meters = convert_pixel_distance_to_meters( distance_covered_by_opponent_pixels,
-                                                                           constants.DOUBLE_LINE_WIDTH,
-                                                                           mini_court.get_width_of_mini_court()
-                                                                           ) 
-
-        speed_of_opponent = distance_covered_by_opponent_meters/ball_shot_time_in_seconds * 3.6
-
-        current_player_stats= deepcopy(player_stats_data[-1])
-        current_player_stats['frame_num'] = start_frame
-        current_player_stats[f'player_{player_shot_ball}_number_of_shots'] += 1
-        current_player_stats[f'player_{player_shot_ball}_total_shot_speed'] += speed_of_ball_shot
-        current_player_stats[f'player_{player_shot_ball}_last_shot_speed'] = speed_of_ball_shot
-
-        current_player_stats[f'player_{opponent_player_id}_total_player_speed'] += speed_of_opponent
-        current_player_stats[f'player_{opponent_player_id}_last_player_speed'] = speed_of_opponent
-
-        player_stats_data.append(current_player_stats)
-
-    player_stats_data_df = pd.DataFrame(player_stats_data)
-    frames_df = pd.DataFrame({'frame_num': list(range(len(video_frames)))})
-    player_stats_data_df = pd.merge(frames_df, player_stats_data_df, on='frame_num', how='left')
-    player_stats_data_df = player_stats_data_df.ffill()
-
-    
-
-    player_stats_data_df[f'player_{player_shot_ball}_average_shot_speed'] = player_stats_data_df[f'player_{player_shot_ball}_total_shot_speed'] / player_stats_data_df[f'player_{player_shot_ball}_number_of_shots'].replace(0, 1)
-    player_stats_data_df[f'player_{opponent_player_id}_average_shot_speed'] = player_stats_data_df[f'player_{opponent_player_id}_total_shot_speed'] / player_stats_data_df[f'player_{opponent_player_id}_number_of_shots'].replace(0, 1)
-    player_stats_data_df[f'player_{player_shot_ball}_average_player_speed'] = player_stats_data_df[f'player_{player_shot_ball}_total_player_speed'] / player_stats_data_df[f'player_{opponent_player_id}_number_of_shots'].replace(0, 1)
-    player_stats_data_df[f'player_{opponent_player_id}_average_player_speed'] = player_stats_data_df[f'player_{opponent_player_id}_total_player_speed'] / player_stats_data_df[f'player_{player_shot_ball}_number_of_shots'].replace(0, 1)
-
+    with profiler.stage('mini_court_conversion', frames=num_frames):
+        player_mini_court_detections, ball_mini_court_detections = mini_court.convert_bounding_boxes_to_mini_court_coordinates(player_detections, 
+                                                                                                              ball_detections,
+                                                                                                              court_keypoints,player_1,player_2)
+
+    # Shot stats: vectorized over the shot frames, then expanded to one row per frame
+    with profiler.stage('shot_stats', frames=num_frames):
+        if projection == 'homography':
+            # Court homography fitted once, every position projected to metres in one call
+            court_projector = CourtProjector(court_keypoints)
+            player_court_positions, ball_court_positions = court_projector.project_detections(player_detections,
+                                                                                              ball_detections,
+                                                                                              player_1, player_2)
+            ball_shot_positions = ball_court_positions[ball_shot_frames]
+            player_1_shot_positions = player_court_positions[ball_shot_frames, 0]
+            player_2_shot_positions = player_court_positions[ball_shot_frames, 1]
+            meters_per_pixel = 1.0
+        else:
+            meters_per_pixel = convert_pixel_distance_to_meters(1,
+                                                                constants.DOUBLE_LINE_WIDTH,
+                                                                mini_court.get_width_of_mini_court()
+                                                                )
+            ball_shot_positions, player_1_shot_positions, player_2_shot_positions = gather_shot_positions(ball_shot_frames,
+                                                                                                         ball_mini_court_detections,
+                                                                                                         player_mini_court_detections,
+                                                                                                         player_1, player_2)
+        shot_events = compute_shot_events(ball_shot_frames,
+                                          ball_shot_positions, player_1_shot_positions, player_2_shot_positions,
+                                          player_1, player_2, FPS, meters_per_pixel)
+        # Drawing, highlights, the report and the store all read the same memoized metrics.
+        # Only the shot events are kept, frames are looked up by binary search.
+        metrics = match_metrics(shot_events, num_frames, player_1, player_2, FPS)
+        player_stats = metrics.get('player_stats')
+
+    # Rallies: start / end frame, shots and hitters, queryable per rally
+    with profiler.stage('rally_segmentation', frames=num_frames):
+        rally_index = segment_rallies(ball_shot_frames, num_frames, FPS, shot_events, ball_visible)
+        if rally_index_path is not None:
+            rally_index.save(rally_index_path)
+
+    def annotate(video_frames, start_frame=0, profiler=None):
+        return annotate_frames(video_frames, player_tracker, player_detections,
+                               ball_tracker, ball_detections,
+                               court_line_detector, court_keypoints,
+                               mini_court,
+                               player_mini_court_detections, ball_mini_court_detections,
+                               player_stats, profiler, start_frame,
+                               court_mode, court_refresh_interval)
+
+    # Draw output: read, annotate and write one frame at a time.
+    # save_video only counts the encoder, decode and drawing are nested stages.
+    if output_video_path is not None:
+        output_video_frames = annotate(profiler.iter_stage('video_read', read_frames(input_video_path)),
+                                       profiler=profiler)
+        with profiler.stage('save_video'):
+            written_frames = write_frames(output_video_frames, output_video_path)
+        profiler.add_frames('save_video', written_frames)
+
+    # Highlights: only the clip frames are decoded and annotated, clips are written in parallel
+    if highlights_dir is not None:
+        with profiler.stage('highlights'):
+            clip_ranges = highlight_ranges(metrics.get('event_table'), player_1, player_2, FPS,
+                                           n=num_highlights, num_frames=num_frames)
+            export_clips(input_video_path, clip_ranges, highlights_dir, annotate)
+
+    with profiler.stage('report_generation'):
+        max_stats_df = metrics.get('max_stats')
+        if report_path is not None:
+            max_stats_df.to_csv(report_path, index=True)
+
+        #generate_player_report(max_stats_df, player_1, "player_1_report.md", "player_1_report.pdf")
+        #generate_player_report(max_stats_df, player_2, "player_2_report.md", "player_2_report.pdf")
+        result = metrics.get('scores')[["player", "Total_Score", "Score_Percentage"]]
+
+    if stats_store is not None:
+        with profiler.stage('stats_store'):
+            if not isinstance(stats_store, MatchStatsStore):
+                stats_store = MatchStatsStore(stats_store)
+            if match_id is None:
+                match_id = os.path.splitext(os.path.basename(input_video_path))[0]
+            stats_store.append(match_id, max_stats_df, metrics.get('frame_stats'), player_1, player_2)
+    return max_stats_df, result, metrics
 
-
-    # Draw output
-    ## Draw Player Bounding Boxes
-    output_video_frames= player_tracker.draw_bboxes(video_frames,player_detections)
-    output_video_frames= ball_tracker.draw_bboxes(output_video_frames, ball_detections)
-
-    ## Draw court Keypoints
-    output_video_frames  = court_line_detector.draw_keypoints_on_video(output_video_frames)
-
-    # Draw Mini Court
-    output_video_frames = mini_court.draw_mini_court(output_video_frames)
-    output_video_frames = mini_court.draw_points_on_mini_court(output_video_frames,player_mini_court_detections)
-    output_video_frames = mini_court.draw_points_on_mini_court(output_video_frames,ball_mini_court_detections, color=(0,255,255))    
-
-    # Draw Player Stats
-    output_video_frames = draw_player_stats(output_video_frames,player_stats_data_df,player_1,player_2,FPS)
-
-    ## Draw frame number on top left corner
-    for i, frame in enumerate(output_video_frames):
-        cv2.putText(frame, f"Frame: {i}",(10,30),cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-    '''
-
-    output_video_frames= player_tracker.draw_bboxes(video_frames, player_detections)
-    output_video_frames= ball_tracker.draw_bboxes(output_video_frames, ball_detections)
-
-    ## Draw court Keypoints
-    output_video_frames  = court_line_detector.draw_keypoints_on_video(output_video_frames, court_keypoints)'''
-    save_video(output_video_frames, "output_videos/xxx190.avi")
-
-    max_stats_df = generate_report_max_only(player_stats_data_df, player_1, player_2)
-
-    #generate_player_report(max_stats_df, player_1, "player_1_report.md", "player_1_report.pdf")
-    #generate_player_report(max_stats_df, player_2, "player_2_report.md", "player_2_report.pdf")
-    result = calculate_player_scores(max_stats_df)
-    print(result)
+def main():
+    # Same as `python cli.py analyze`
+    from cli import add_analyze_arguments, run_analyze
+    parser = add_analyze_arguments(argparse.ArgumentParser(description="Analyze a tennis match video"))
+    run_analyze(parser.parse_args())
 
 if __name__ == "__main__":
   main()
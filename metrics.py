@@ -0,0 +1,119 @@
+"""
+Memoized per-match metrics with dependency tracking.
+
+    metrics = match_metrics(shot_events, num_frames, player_1, player_2, fps)
+    metrics.get("max_stats")                   # computed once
+    metrics.set_input("thresholds", new_thresholds)
+    metrics.get("scores")                      # only the scoring runs again
+
+Every metric names the inputs / metrics it is computed from. A metric's
+version is its definition plus the versions of its dependencies, and an input's
+version is bumped by every set_input (inputs may be changed in place and set
+again). A computed value is reused while its version is unchanged, so changing
+one input only recomputes the metrics downstream of it, and a cached metric is
+still valid when the metrics it was computed from have been evicted. Computed
+values live in an LRU cache of at most max_entries metrics.
+"""
+from collections import OrderedDict
+
+from app_rep import stats_to_long, score_players, player_data_from_scores, thresholds as default_thresholds
+
+class MetricGraph:
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._metrics = {}
+        self._inputs = {}
+        self._versions = {}
+        self._cache = OrderedDict()
+        # Number of times each metric was computed
+        self.computations = {}
+
+    def add_metric(self, name, dependencies, compute):
+        # compute(*values of dependencies). Redefining a metric makes everything computed from it stale.
+        self._metrics[name] = (tuple(dependencies), compute)
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def set_input(self, name, value):
+        self._inputs[name] = value
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def invalidate(self, name):
+        # Recompute name, and everything computed from it, on the next get
+        self._versions[name] = self._versions.get(name, 0) + 1
+        self._cache.pop(name, None)
+
+    def version(self, name):
+        if name in self._inputs:
+            return self._versions[name]
+        if name not in self._metrics:
+            raise KeyError(f"Unknown metric or input: {name}")
+        dependencies, _ = self._metrics[name]
+        return (self._versions[name],) + tuple(self.version(dependency) for dependency in dependencies)
+
+    def get(self, name):
+        if name in self._inputs:
+            return self._inputs[name]
+
+        version = self.version(name)
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(name)
+            return cached[1]
+
+        dependencies, compute = self._metrics[name]
+        value = compute(*[self.get(dependency) for dependency in dependencies])
+        self.computations[name] = self.computations.get(name, 0) + 1
+        self._cache[name] = (version, value)
+        self._cache.move_to_end(name)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return value
+
+def add_score_metrics(metrics):
+    # scores and player_data on top of a long_stats input or metric
+    metrics.add_metric("scores", ["long_stats", "thresholds"], score_players)
+    metrics.add_metric("player_data", ["scores"], player_data_from_scores)
+    return metrics
+
+def score_metrics(max_stats=None, long_stats=None, thresholds=default_thresholds, max_entries=16):
+    """
+    Scoring without a match, for re-scoring stored results: from a wide
+    max_game_report table (max_stats) or from one row per match and player
+    (long_stats, see app_rep.stats_to_long).
+    """
+    metrics = MetricGraph(max_entries)
+    metrics.set_input("thresholds", thresholds)
+    if max_stats is not None:
+        metrics.set_input("max_stats", max_stats)
+        metrics.add_metric("long_stats", ["max_stats"], stats_to_long)
+    else:
+        metrics.set_input("long_stats", long_stats)
+    return add_score_metrics(metrics)
+
+def match_metrics(shot_events, num_frames, player_1, player_2, fps, thresholds=default_thresholds,
+                  max_entries=16):
+    """
+    The metrics of one match, shared by drawing, the max report and scoring:
+        player_stats  EventPlayerStats, the per-frame overlay values
+        event_table   one row per shot event (highlights)
+        frame_stats   the dense per-frame table (stats store)
+        max_stats     the max_game_report table
+        long_stats    max_stats as one row per player
+        scores        score_players over long_stats with the thresholds input
+        player_data   {player_id: data} as saved in player_{id}_data.json
+    """
+    # Needs OpenCV through utils, the scoring-only graph above doesn't
+    from event_stats import EventPlayerStats
+
+    metrics = MetricGraph(max_entries)
+    for name, value in [("shot_events", shot_events), ("num_frames", num_frames), ("player_1", player_1),
+                        ("player_2", player_2), ("fps", fps), ("thresholds", thresholds)]:
+        metrics.set_input(name, value)
+
+    metrics.add_metric("player_stats", ["shot_events", "num_frames", "player_1", "player_2", "fps"],
+                       EventPlayerStats)
+    metrics.add_metric("event_table", ["player_stats"], lambda stats: stats.event_table())
+    metrics.add_metric("frame_stats", ["player_stats"], lambda stats: stats.to_dataframe())
+    metrics.add_metric("max_stats", ["player_stats"], lambda stats: stats.max_stats())
+    metrics.add_metric("long_stats", ["max_stats"], stats_to_long)
+    return add_score_metrics(metrics)
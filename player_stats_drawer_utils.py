@@ -1,7 +1,10 @@
 import numpy as np
 import cv2
 import csv
+import itertools
 import pandas as pd
+import queue
+import threading
 
 def get_video_fps(video_path):
     cap = cv2.VideoCapture(video_path)
@@ -9,6 +12,172 @@ def get_video_fps(video_path):
     cap.release()
     return fps
 
+def get_video_frame_count(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return frame_count
+
+def count_video_frames(video_path):
+    # Frames the decoder actually yields. CAP_PROP_FRAME_COUNT comes from the
+    # container header and can be off; grab() skips the colour conversion.
+    cap = cv2.VideoCapture(video_path)
+    frame_count = 0
+    try:
+        while cap.grab():
+            frame_count += 1
+    finally:
+        cap.release()
+    return frame_count
+
+def iter_video_frames(video_path):
+    # Yields frames one at a time instead of loading the whole video
+    cap = cv2.VideoCapture(video_path)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+def iter_video_range(video_path, start_frame, end_frame):
+    # Frames start_frame..end_frame (inclusive), end_frame=None reads to the end
+    # of the stream. Seeks to start_frame instead of decoding everything before it.
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        frames = itertools.count() if end_frame is None else range(end_frame - start_frame + 1)
+        for _ in frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+def iter_video_frames_at(video_path, frame_indices):
+    # Yields only the frames at the given (sorted) indices. Skipped frames are
+    # grabbed but never retrieved, which saves the colour conversion and copy.
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frame_num = 0
+        for target in frame_indices:
+            while frame_num < target:
+                if not cap.grab():
+                    return
+                frame_num += 1
+            ret, frame = cap.read()
+            if not ret:
+                return
+            frame_num += 1
+            yield frame
+    finally:
+        cap.release()
+
+def read_first_frame(video_path):
+    return next(iter_video_frames(video_path))
+
+def save_video_stream(output_video_frames, output_video_path, fps=24):
+    # Streaming counterpart of save_video: writes frames as they are produced
+    out = None
+    frame_count = 0
+    try:
+        for frame in output_video_frames:
+            if out is None:
+                fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+                out = cv2.VideoWriter(output_video_path, fourcc, fps, (frame.shape[1], frame.shape[0]))
+            out.write(frame)
+            frame_count += 1
+    finally:
+        if out is not None:
+            out.release()
+    return frame_count
+
+_END_OF_STREAM = object()
+
+class _ErrorInThread:
+    def __init__(self, error):
+        self.error = error
+
+def _put_until_stopped(frame_queue, item, stop_event):
+    # Blocking put that gives up once the consumer has gone away
+    while not stop_event.is_set():
+        try:
+            frame_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def iter_video_frames_threaded(video_path, queue_size=32):
+    # Like iter_video_frames but decodes on a background thread. The bounded
+    # queue provides backpressure, decoding never runs more than queue_size
+    # frames ahead of the consumer. cv2 releases the GIL while decoding.
+    frame_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    def decode():
+        try:
+            for frame in iter_video_frames(video_path):
+                if not _put_until_stopped(frame_queue, frame, stop_event):
+                    return
+            _put_until_stopped(frame_queue, _END_OF_STREAM, stop_event)
+        except Exception as e:
+            _put_until_stopped(frame_queue, _ErrorInThread(e), stop_event)
+
+    decoder = threading.Thread(target=decode, name="video-decoder", daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, _ErrorInThread):
+                raise item.error
+            yield item
+    finally:
+        stop_event.set()
+        decoder.join()
+
+def save_video_stream_threaded(output_video_frames, output_video_path, fps=24, queue_size=32):
+    # Like save_video_stream but encodes on a background thread while the caller
+    # keeps computing the next frames. Frames are written in the same order.
+    frame_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    errors = []
+
+    def encode():
+        def frames():
+            while True:
+                item = frame_queue.get()
+                if item is _END_OF_STREAM:
+                    return
+                yield item
+        try:
+            save_video_stream(frames(), output_video_path, fps)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the producer
+            stop_event.set()
+
+    encoder = threading.Thread(target=encode, name="video-encoder", daemon=True)
+    encoder.start()
+    frame_count = 0
+    try:
+        for frame in output_video_frames:
+            if not _put_until_stopped(frame_queue, frame, stop_event):
+                break
+            frame_count += 1
+    finally:
+        _put_until_stopped(frame_queue, _END_OF_STREAM, stop_event)
+        encoder.join()
+    if errors:
+        raise errors[0]
+    return frame_count
+
 def calculate_average_speed(player_stats, player_1, player_2):
     player_1_avg_speed = player_stats[f'player_{player_1}_last_player_speed'].replace(0, np.nan).mean()
     player_2_avg_speed = player_stats[f'player_{player_2}_last_player_speed'].replace(0, np.nan).mean()
@@ -18,7 +187,7 @@ def calculate_average_speed(player_stats, player_1, player_2):
 
     return player_1_avg_speed, player_2_avg_speed, player_1_avg_shot_speed, player_2_avg_shot_speed
 
-def draw_player_stats(output_video_frames, player_stats, player_1, player_2, FPS):
+def add_player_stats_columns(player_stats, player_1, player_2, FPS):
     player_stats["player_1_acceleration"] = player_stats[f"player_{player_1}_last_player_speed"].diff().fillna(0)
     player_stats["player_2_acceleration"] = player_stats[f"player_{player_2}_last_player_speed"].diff().fillna(0)
 
@@ -58,33 +227,111 @@ def draw_player_stats(output_video_frames, player_stats, player_1, player_2, FPS
     player_stats["player_1_rally_percentage"] = (player_stats["player_1_rally_contribution"] / player_stats["player_1_total_shots"]).fillna(0) * 100
     player_stats["player_2_rally_percentage"] = (player_stats["player_2_rally_contribution"] / player_stats["player_2_total_shots"]).fillna(0) * 100
 
-    for index, row in player_stats.iterrows():
-        if index >= len(output_video_frames):
-            continue  
-
-        def safe_value(val):
-            return val if not np.isnan(val) else 0  
-
-        player_stats_dict = {
-            "shot_speed_1": safe_value(row[f'player_{player_1}_last_shot_speed']),
-            "shot_speed_2": safe_value(row[f'player_{player_2}_last_shot_speed']),
-            "speed_1": safe_value(row[f'player_{player_1}_last_player_speed']),
-            "speed_2": safe_value(row[f'player_{player_2}_last_player_speed']),
-            "acceleration_1": safe_value(row["player_1_acceleration"]),
-            "acceleration_2": safe_value(row["player_2_acceleration"]),
-            "shot_inconsistency_1": safe_value(row["player_1_shot_inconsistency"]),
-            "shot_inconsistency_2": safe_value(row["player_2_shot_inconsistency"]),
-            "distance_covered_1": safe_value(row["player_1_distance_covered"]),
-            "distance_covered_2": safe_value(row["player_2_distance_covered"]),
-            "rally_contribution_1": safe_value(row["player_1_rally_contribution"]),
-            "rally_contribution_2": safe_value(row["player_2_rally_contribution"]),
-        }
-
-    return output_video_frames
+    return player_stats
+
+# (label, stats key prefix, value format) for every row of the stats box
+PLAYER_STATS_ROWS = [
+    ("Shot Speed", "shot_speed", "{:.1f} km/h"),
+    ("Player Speed", "speed", "{:.1f} km/h"),
+    ("Acceleration", "acceleration", "{:.1f}"),
+    ("Shot Incons.", "shot_inconsistency", "{:.1f}"),
+    ("Distance", "distance_covered", "{:.1f}"),
+    ("Rally Contrib.", "rally_contribution", "{:.0f}"),
+]
+
+def get_player_stats_values(player_stats, player_1, player_2):
+    # Pull the drawn columns once as a (num_frames, 12) array, NaN filled with 0.
+    # Column order is PLAYER_STATS_ROWS, player 1 then player 2 for each row.
+    columns = {
+        "shot_speed_1": f'player_{player_1}_last_shot_speed',
+        "shot_speed_2": f'player_{player_2}_last_shot_speed',
+        "speed_1": f'player_{player_1}_last_player_speed',
+        "speed_2": f'player_{player_2}_last_player_speed',
+        "acceleration_1": "player_1_acceleration",
+        "acceleration_2": "player_2_acceleration",
+        "shot_inconsistency_1": "player_1_shot_inconsistency",
+        "shot_inconsistency_2": "player_2_shot_inconsistency",
+        "distance_covered_1": "player_1_distance_covered",
+        "distance_covered_2": "player_2_distance_covered",
+        "rally_contribution_1": "player_1_rally_contribution",
+        "rally_contribution_2": "player_2_rally_contribution",
+    }
+    values = player_stats[list(columns.values())].to_numpy(dtype=np.float64)
+    return np.nan_to_num(values, nan=0.0)
+
+class PlayerStatsOverlay:
+    """
+    Stats box in the bottom right corner. The labels are rasterized once, so each
+    frame only pays for darkening the box area and writing the 12 values.
+    """
+    def __init__(self, frame_shape, width=350, height=230, alpha=0.5):
+        frame_h, frame_w = frame_shape[:2]
+        self.end_x = frame_w - 40
+        self.end_y = frame_h - 40
+        self.start_x = max(self.end_x - width, 0)
+        self.start_y = max(self.end_y - height, 0)
+        self.alpha = alpha
+        self.row_height = 30
+
+        box_h = self.end_y - self.start_y
+        box_w = self.end_x - self.start_x
+        self.labels = self.draw_labels(np.zeros((box_h, box_w, 3), dtype=np.uint8))
+        # A masked copy of the labels is only exact when the text has no antialiased
+        # edges (OpenCV 4 LINE_8). OpenCV 5 antialiases putText, blending those edges
+        # costs as much as drawing the labels, so they are drawn on every frame then.
+        self.cached_labels = bool(np.isin(self.labels, (0, 255)).all())
+        # uint8 mask for cv2.copyTo, a boolean np.copyto is ~70x slower than drawing the labels
+        self.labels_mask = self.labels.any(axis=2).astype(np.uint8) * 255
+
+    def draw_labels(self, image):
+        # image is the box area
+        cv2.putText(image, "Player 1", (110, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+        cv2.putText(image, "Player 2", (230, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+        for row, (label, _, _) in enumerate(PLAYER_STATS_ROWS):
+            cv2.putText(image, label, (10, 55 + row * self.row_height), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        return image
+
+    def draw(self, frame, values):
+        roi = frame[self.start_y:self.end_y, self.start_x:self.end_x]
+        # Blend with a black rectangle == scale the area down
+        cv2.convertScaleAbs(roi, dst=roi, alpha=1 - self.alpha)
+        if self.cached_labels:
+            cv2.copyTo(self.labels, self.labels_mask, roi)
+        else:
+            self.draw_labels(roi)
+
+        for row, (_, _, value_format) in enumerate(PLAYER_STATS_ROWS):
+            y = self.start_y + 55 + row * self.row_height
+            cv2.putText(frame, value_format.format(values[2 * row]), (self.start_x + 110, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+            cv2.putText(frame, value_format.format(values[2 * row + 1]), (self.start_x + 230, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+        return frame
+
+def iter_player_stats_on_video(video_frames, player_stats_values):
+    overlay = None
+    for frame_num, frame in enumerate(video_frames):
+        if frame_num < len(player_stats_values):
+            if overlay is None:
+                overlay = PlayerStatsOverlay(frame.shape)
+            frame = overlay.draw(frame, player_stats_values[frame_num])
+        yield frame
+
+def draw_player_stats(output_video_frames, player_stats, player_1, player_2, FPS):
+    add_player_stats_columns(player_stats, player_1, player_2, FPS)
+    player_stats_values = get_player_stats_values(player_stats, player_1, player_2)
+    return list(iter_player_stats_on_video(output_video_frames, player_stats_values))
 
 import pandas as pd
 
-def generate_report_max_only(player_stats, player_1, player_2):
+def generate_report_max_only(player_stats, player_1, player_2, output_path="max_game_report.csv"):
+    if hasattr(player_stats, "max_stats"):
+        # Event-sparse stats (event_stats.EventPlayerStats) aggregate straight from the events
+        df = player_stats.max_stats()
+        if output_path is not None:
+            df.to_csv(output_path, index=True)
+        return df
+
     avg_speed_1, avg_speed_2, avg_shot_speed_1, avg_shot_speed_2 = calculate_average_speed(player_stats, player_1, player_2)
 
     max_stats = {
@@ -112,7 +359,8 @@ def generate_report_max_only(player_stats, player_1, player_2):
 
     df = pd.DataFrame(max_stats)
     
-    df.to_csv("max_game_report.csv", index=True)
+    if output_path is not None:
+        df.to_csv(output_path, index=True)
 
     return df
 
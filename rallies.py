@@ -0,0 +1,231 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from shot_stats import build_player_stats_df
+from utils.player_stats_drawer_utils import add_player_stats_columns, generate_report_max_only
+
+def ball_visible_mask(ball_detections):
+    # True for the frames where the ball tracker found the ball (before interpolation)
+    return np.array([len(frame.get(1, ())) == 4 for frame in ball_detections], dtype=bool)
+
+def missing_run_lengths(ball_visible):
+    # For every frame, the length of the run of missing-ball frames it is part of (0 when visible)
+    num_frames = len(ball_visible)
+    frames = np.arange(num_frames)
+    last_visible = np.maximum.accumulate(np.where(ball_visible, frames, -1))
+    next_visible = np.minimum.accumulate(np.where(ball_visible, frames, num_frames)[::-1])[::-1]
+    return np.where(ball_visible, 0, next_visible - last_visible - 1)
+
+class RallyIndex:
+    """
+    Rallies of a match, stored as flat arrays: rally r has the shots
+    shot_frames[shot_offsets[r]:shot_offsets[r + 1]] and covers the frames
+    start_frames[r]..end_frames[r] (inclusive). shooters holds the player who hit
+    each shot (-1 when unknown). segments are optional named frame windows,
+    e.g. {"set 2": (41000, 83000)}, that queries can be restricted to.
+    """
+    def __init__(self, start_frames, end_frames, shot_offsets, shot_frames, shooters, fps, segments=None):
+        self.start_frames = np.asarray(start_frames, dtype=np.int64)
+        self.end_frames = np.asarray(end_frames, dtype=np.int64)
+        self.shot_offsets = np.asarray(shot_offsets, dtype=np.int64)
+        self.shot_frames = np.asarray(shot_frames, dtype=np.int64)
+        self.shooters = np.asarray(shooters, dtype=np.int64)
+        self.fps = fps
+        self.segments = dict(segments or {})
+
+    def __len__(self):
+        return len(self.start_frames)
+
+    @property
+    def num_shots(self):
+        return np.diff(self.shot_offsets)
+
+    @property
+    def durations(self):
+        # Seconds
+        return (self.end_frames - self.start_frames + 1) / self.fps
+
+    def rally(self, rally_id):
+        shots = slice(self.shot_offsets[rally_id], self.shot_offsets[rally_id + 1])
+        shooters = self.shooters[shots]
+        return {
+            'rally_id': int(rally_id),
+            'start_frame': int(self.start_frames[rally_id]),
+            'end_frame': int(self.end_frames[rally_id]),
+            'duration': float(self.durations[rally_id]),
+            'num_shots': int(self.num_shots[rally_id]),
+            'shot_frames': self.shot_frames[shots].tolist(),
+            'shooters': shooters.tolist(),
+            'first_hitter': int(shooters[0]) if len(shooters) else -1,
+            'last_hitter': int(shooters[-1]) if len(shooters) else -1,
+        }
+
+    def __getitem__(self, rally_id):
+        return self.rally(rally_id)
+
+    def rally_at(self, frame_num):
+        # Rally containing frame_num, or None between rallies (binary search)
+        rally_id = int(np.searchsorted(self.start_frames, frame_num, side='right')) - 1
+        if rally_id < 0 or frame_num > self.end_frames[rally_id]:
+            return None
+        return rally_id
+
+    def query(self, min_shots=None, max_shots=None, min_duration=None, max_duration=None,
+              start_frame=None, end_frame=None, segment=None, hitter=None):
+        """
+        Ids of the rallies matching every given condition. Durations are in
+        seconds, start_frame / end_frame / segment keep the rallies that lie
+        entirely inside the window and hitter keeps the rallies the player hit
+        at least one shot in.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_shots is not None:
+            mask &= self.num_shots >= min_shots
+        if max_shots is not None:
+            mask &= self.num_shots <= max_shots
+        if min_duration is not None:
+            mask &= self.durations >= min_duration
+        if max_duration is not None:
+            mask &= self.durations <= max_duration
+        if segment is not None:
+            segment_start, segment_end = self.segments[segment]
+            start_frame = segment_start if start_frame is None else max(start_frame, segment_start)
+            end_frame = segment_end if end_frame is None else min(end_frame, segment_end)
+        if start_frame is not None:
+            mask &= self.start_frames >= start_frame
+        if end_frame is not None:
+            mask &= self.end_frames <= end_frame
+        if hitter is not None:
+            hit = (self.shooters == hitter).astype(np.int64)
+            hits_per_rally = np.add.reduceat(hit, self.shot_offsets[:-1]) if len(hit) else np.zeros(len(self), dtype=np.int64)
+            mask &= hits_per_rally > 0
+        return np.flatnonzero(mask)
+
+    def longest(self, n=10, rally_ids=None):
+        # The n longest rallies (by shots, then duration), optionally among rally_ids
+        rally_ids = np.arange(len(self)) if rally_ids is None else np.asarray(rally_ids)
+        order = np.lexsort((-self.durations[rally_ids], -self.num_shots[rally_ids]))
+        return rally_ids[order[:n]]
+
+    def frame_ranges(self, rally_ids=None):
+        # (start, end) inclusive frame range of each rally, for cutting clips
+        rally_ids = np.arange(len(self)) if rally_ids is None else np.asarray(rally_ids)
+        return list(zip(self.start_frames[rally_ids].tolist(), self.end_frames[rally_ids].tolist()))
+
+    def shot_events(self, shot_events, rally_id):
+        """
+        The shot events (as returned by compute_shot_events) that belong to the
+        rally: shots starting in it whose next shot is in the same rally, so
+        the pair that spans two rallies is dropped.
+        """
+        frames = self.shot_frames[self.shot_offsets[rally_id]:self.shot_offsets[rally_id + 1]]
+        if len(frames) < 2:
+            keep = np.zeros(len(shot_events['frame_num']), dtype=bool)
+        else:
+            keep = (shot_events['frame_num'] >= frames[0]) & (shot_events['frame_num'] < frames[-1])
+        return {name: values[keep] for name, values in shot_events.items()}
+
+    def player_stats(self, shot_events, rally_id, player_1, player_2):
+        """
+        Per-frame player stats (like main.py's player_stats_data_df) for the
+        frames of one rally only, counted from the start of the rally.
+        """
+        start_frame = self.start_frames[rally_id]
+        rally_events = self.shot_events(shot_events, rally_id)
+        rally_events['frame_num'] = rally_events['frame_num'] - start_frame
+        num_frames = int(self.end_frames[rally_id] - start_frame + 1)
+
+        player_stats = build_player_stats_df(rally_events, num_frames, player_1, player_2)
+        player_stats['frame_num'] += start_frame
+        add_player_stats_columns(player_stats, player_1, player_2, self.fps)
+        return player_stats
+
+    def max_stats(self, shot_events, rally_ids, player_1, player_2):
+        # generate_report_max_only for each of the rallies, one row per rally
+        rows = []
+        for rally_id in rally_ids:
+            player_stats = self.player_stats(shot_events, rally_id, player_1, player_2)
+            row = generate_report_max_only(player_stats, player_1, player_2, output_path=None)
+            row.insert(0, 'rally_id', int(rally_id))
+            rows.append(row)
+        if not rows:
+            return pd.DataFrame()
+        return pd.concat(rows, ignore_index=True)
+
+    def to_dataframe(self):
+        return pd.DataFrame([self.rally(rally_id) for rally_id in range(len(self))])
+
+    def save(self, path):
+        data = {
+            'fps': self.fps,
+            'segments': {name: list(window) for name, window in self.segments.items()},
+            'start_frames': self.start_frames.tolist(),
+            'end_frames': self.end_frames.tolist(),
+            'shot_offsets': self.shot_offsets.tolist(),
+            'shot_frames': self.shot_frames.tolist(),
+            'shooters': self.shooters.tolist(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        print(f"✅ Rally index saved as {path}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data['start_frames'], data['end_frames'], data['shot_offsets'],
+                   data['shot_frames'], data['shooters'], data['fps'],
+                   {name: tuple(window) for name, window in data['segments'].items()})
+
+def segment_rallies(ball_shot_frames, num_frames, fps, shot_events=None, ball_visible=None,
+                    max_shot_gap=3.0, max_missing=1.0, tail=1.0, segments=None):
+    """
+    Splits the shot frames into rallies. A new rally starts when two shots are
+    more than max_shot_gap seconds apart, or when the ball is missing for more
+    than max_missing seconds between them (ball_visible, from the detections
+    before interpolation). A rally ends at its last shot plus up to tail
+    seconds of ball flight, cut short where the ball disappears. Hitters come
+    from shot_events when given.
+    """
+    shot_frames = np.unique(np.asarray(ball_shot_frames, dtype=np.int64))
+    shot_frames = shot_frames[(shot_frames >= 0) & (shot_frames < num_frames)]
+    if len(shot_frames) == 0:
+        return RallyIndex([], [], [0], [], [], fps, segments)
+
+    max_gap_frames = max_shot_gap * fps
+    max_missing_frames = max_missing * fps
+    tail_frames = int(round(tail * fps))
+
+    breaks = np.diff(shot_frames) > max_gap_frames
+    missing_runs = None
+    if ball_visible is not None:
+        missing_runs = missing_run_lengths(np.asarray(ball_visible, dtype=bool)[:num_frames])
+        # Longest missing run between each pair of consecutive shots
+        longest_missing = np.maximum.reduceat(missing_runs, shot_frames)[:-1]
+        breaks |= longest_missing > max_missing_frames
+
+    first_shots = np.concatenate([[0], np.flatnonzero(breaks) + 1])
+    shot_offsets = np.concatenate([first_shots, [len(shot_frames)]])
+    start_frames = shot_frames[first_shots]
+    last_shot_frames = shot_frames[shot_offsets[1:] - 1]
+
+    # Ball flight after the last shot, up to the next rally or the end of the video
+    next_starts = np.concatenate([start_frames[1:] - 1, [num_frames - 1]])
+    end_frames = np.minimum(last_shot_frames + tail_frames, next_starts)
+    if missing_runs is not None:
+        for rally_id, (last_shot, end) in enumerate(zip(last_shot_frames, end_frames)):
+            out_of_play = np.flatnonzero(missing_runs[last_shot:end + 1] > max_missing_frames)
+            if len(out_of_play):
+                # Last frame the ball was seen before it went missing
+                end_frames[rally_id] = max(last_shot + out_of_play[0] - 1, last_shot)
+
+    shooters = np.full(len(shot_frames), -1, dtype=np.int64)
+    if shot_events is not None and len(shot_events['frame_num']):
+        event_index = np.searchsorted(shot_events['frame_num'], shot_frames)
+        event_index = np.minimum(event_index, len(shot_events['frame_num']) - 1)
+        matched = shot_events['frame_num'][event_index] == shot_frames
+        shooters[matched] = shot_events['shooter'][event_index[matched]]
+
+    return RallyIndex(start_frames, end_frames, shot_offsets, shot_frames, shooters, fps, segments)
@@ -0,0 +1,232 @@
+"""
+Sharded processing of long recordings, one recording per court / camera.
+
+    python sharded.py court_1.mp4 court_2.mp4 --workers 8 --chunk-seconds 300
+
+Each recording is split into time chunks that overlap by a few seconds. The
+chunks of every recording share one process pool, so detection (the expensive
+part) scales across all cores. Player track ids are stitched at the chunk
+boundaries by matching the tracks of the overlap on IoU, then every recording
+goes through the rest of the pipeline once, on its stitched detections. Shots
+are found on the stitched ball track, so a shot inside an overlap is counted
+once and each match gets one max_game_report and one score.
+"""
+import argparse
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from app_rep import stats_to_long
+from metrics import score_metrics
+from batch_runner import match_id_for
+from stats_store import MatchStatsStore, TABLES
+from utils.player_stats_drawer_utils import get_video_fps, get_video_frame_count, iter_video_range
+
+# Loaded once per worker process by _init_worker
+_worker_models = None
+
+def plan_chunks(num_frames, chunk_frames, overlap_frames):
+    """
+    Inclusive (start, end) frame ranges of chunk_frames frames, each one
+    running overlap_frames into the next chunk. num_frames is only an estimate
+    (the container header), so the last chunk's end is None: it is read to the
+    end of the stream.
+    """
+    if overlap_frames < 1:
+        raise ValueError("Chunks must overlap by at least one frame to stitch the player tracks")
+    chunks = []
+    for start in range(0, max(num_frames, 1), max(chunk_frames, 1)):
+        end = start + chunk_frames + overlap_frames - 1
+        if end >= num_frames - 1:
+            chunks.append((start, None))
+            break
+        chunks.append((start, end))
+    return chunks
+
+def bbox_iou(box_a, box_b):
+    x1, y1 = max(box_a[0], box_b[0]), max(box_a[1], box_b[1])
+    x2, y2 = min(box_a[2], box_b[2]), min(box_a[3], box_b[3])
+    intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = ((box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+             + (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]) - intersection)
+    return intersection / union if union > 0 else 0.0
+
+def match_tracks(previous, current, min_iou=0.5):
+    """
+    {current track id: previous track id} for the tracks of two chunks over
+    the same overlap frames. Pairs are scored by their mean IoU over the
+    frames where both are found and matched greedily, best first.
+    """
+    ious = {}
+    for previous_frame, current_frame in zip(previous, current):
+        for previous_id, previous_box in previous_frame.items():
+            for current_id, current_box in current_frame.items():
+                ious.setdefault((previous_id, current_id), []).append(bbox_iou(previous_box, current_box))
+
+    pairs = sorted(((np.mean(values), previous_id, current_id)
+                    for (previous_id, current_id), values in ious.items()), reverse=True)
+    mapping = {}
+    used = set()
+    for iou, previous_id, current_id in pairs:
+        if iou < min_iou:
+            break
+        if current_id in mapping or previous_id in used:
+            continue
+        mapping[current_id] = previous_id
+        used.add(previous_id)
+    return mapping
+
+def stitch_chunks(chunk_results, min_iou=0.5):
+    """
+    One (player_detections, ball_detections) pair for the whole recording from
+    the chunks' (start, player_detections, ball_detections), sorted by start.
+    Player ids of the first chunk are kept, later chunks are relabelled to the
+    ids they match in the overlap and get new ids otherwise. Each overlap is
+    split in the middle between the two chunks. The result has one entry per
+    decoded frame, chunks past the end of the stream are empty and skipped.
+    """
+    chunk_results = [chunk for chunk in chunk_results if len(chunk[1])]
+    num_frames = max((start + len(players) for start, players, _ in chunk_results), default=0)
+    player_detections = [{} for _ in range(num_frames)]
+    ball_detections = [{} for _ in range(num_frames)]
+    previous_start, previous_players = None, None
+    next_id = 1
+
+    for start, players, ball in chunk_results:
+        track_ids = {track_id for frame in players for track_id in frame}
+        if previous_players is None:
+            mapping = {track_id: track_id for track_id in track_ids}
+            first_frame = start
+        else:
+            previous_end = previous_start + len(previous_players) - 1
+            overlap = max(previous_end - start + 1, 0)
+            mapping = match_tracks(previous_players[start - previous_start:], players[:overlap], min_iou)
+            for track_id in sorted(track_ids - mapping.keys()):
+                mapping[track_id] = next_id
+                next_id += 1
+            first_frame = start + overlap // 2
+
+        players = [{mapping[track_id]: bbox for track_id, bbox in frame.items()} for frame in players]
+        next_id = max([next_id] + [track_id + 1 for track_id in mapping.values()])
+
+        for frame_num in range(first_frame, start + len(players)):
+            player_detections[frame_num] = players[frame_num - start]
+            ball_detections[frame_num] = ball[frame_num - start]
+        previous_start, previous_players = start, players
+
+    return player_detections, ball_detections
+
+def _init_worker(num_threads):
+    global _worker_models
+    from main import load_models
+    _worker_models = load_models(num_threads=num_threads)
+
+def _detect_chunk(video_path, start, end):
+    player_tracker = _worker_models['player_tracker']
+    ball_tracker = _worker_models['ball_tracker']
+    player_detections = player_tracker.detect_frames(iter_video_range(video_path, start, end))
+    ball_detections = ball_tracker.detect_frames(iter_video_range(video_path, start, end))
+    return start, player_detections, ball_detections
+
+def _analyze_match(video_path, detections, output_dir, render_video, stats_store=None):
+    from main import analyze_match
+
+    match_id = match_id_for(video_path)
+    output_video_path = os.path.join(output_dir, f"{match_id}.avi") if render_video else None
+    report_path = os.path.join(output_dir, f"{match_id}_max_game_report.csv")
+    max_stats_df, _, _ = analyze_match(video_path, output_video_path, models=_worker_models,
+                                      report_path=report_path, stats_store=stats_store,
+                                      match_id=match_id, detections=detections)
+    return max_stats_df
+
+def run_sharded(videos, output_dir, max_workers=None, num_threads=1, chunk_seconds=300.0,
+                overlap_seconds=5.0, render_video=True, stats_store=None):
+    """
+    Run every recording in videos through the pipeline with sharded detection
+    and return one table with a row per match and player (stats, points and
+    total score), also written to sharded_report.csv.
+    """
+    if overlap_seconds <= 0:
+        raise ValueError("overlap_seconds must be positive, the chunk overlaps are used to stitch the player tracks")
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(num_threads,)) as executor:
+        chunk_futures = {}
+        for video_path in videos:
+            fps = get_video_fps(video_path)
+            chunks = plan_chunks(get_video_frame_count(video_path), int(round(chunk_seconds * fps)),
+                                 int(round(overlap_seconds * fps)))
+            for start, end in chunks:
+                chunk_futures[executor.submit(_detect_chunk, video_path, start, end)] = video_path
+            print(f"✅ {video_path}: {len(chunks)} chunks")
+
+        chunk_results = {video_path: [] for video_path in videos}
+        failed = set()
+        for future in as_completed(chunk_futures):
+            video_path = chunk_futures[future]
+            try:
+                chunk_results[video_path].append(future.result())
+            except Exception:
+                print(f"❌ {video_path} chunk failed:\n{traceback.format_exc()}")
+                failed.add(video_path)
+
+        match_futures = {}
+        for video_path in videos:
+            if video_path in failed:
+                continue
+            detections = stitch_chunks(sorted(chunk_results[video_path], key=lambda chunk: chunk[0]))
+            match_futures[executor.submit(_analyze_match, video_path, detections, output_dir,
+                                          render_video, stats_store)] = video_path
+
+        for future in as_completed(match_futures):
+            video_path = match_futures[future]
+            try:
+                max_stats_df = future.result()
+            except Exception:
+                print(f"❌ {video_path} failed:\n{traceback.format_exc()}")
+                continue
+
+            match_df = stats_to_long(max_stats_df).drop(columns="match")
+            match_df.insert(0, "match", match_id_for(video_path))
+            results.append(match_df)
+            print(f"✅ {video_path} done")
+
+    if stats_store is not None:
+        store = MatchStatsStore(stats_store)
+        for table in TABLES:
+            store.compact(table)
+
+    if not results:
+        return pd.DataFrame(columns=["match", "player"])
+
+    combined = score_metrics(long_stats=pd.concat(results, ignore_index=True)).get("scores")
+    combined = combined.sort_values(["match", "player"], kind="stable").reset_index(drop=True)
+    combined.to_csv(os.path.join(output_dir, "sharded_report.csv"), index=False)
+    return combined
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze long recordings with detection split across processes")
+    parser.add_argument("videos", nargs="+", help="one recording per court / camera, each is its own match")
+    parser.add_argument("--output-dir", default="output_videos")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--chunk-seconds", type=float, default=300.0)
+    parser.add_argument("--overlap-seconds", type=float, default=5.0,
+                        help="overlap between chunks used to stitch the player tracks (must be > 0)")
+    parser.add_argument("--no-video", action="store_true", help="skip the annotated videos")
+    parser.add_argument("--stats-store", default=None, help="also append every match to this Parquet store")
+    args = parser.parse_args()
+
+    combined = run_sharded(args.videos, args.output_dir, args.workers, args.threads_per_worker,
+                           args.chunk_seconds, args.overlap_seconds, not args.no_video, args.stats_store)
+    print(combined)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+STAT_NAMES = ['number_of_shots',
+              'total_shot_speed',
+              'last_shot_speed',
+              'total_player_speed',
+              'last_player_speed']
+
+
+def gather_shot_positions(ball_shot_frames, ball_mini_court_detections, player_mini_court_detections, player_1, player_2):
+    # (S, 2) arrays of the ball and both players at every shot frame
+    ball_positions = np.array([ball_mini_court_detections[f][1] for f in ball_shot_frames], dtype=np.float64).reshape(-1, 2)
+    player_1_positions = np.array([player_mini_court_detections[f][player_1] for f in ball_shot_frames], dtype=np.float64).reshape(-1, 2)
+    player_2_positions = np.array([player_mini_court_detections[f][player_2] for f in ball_shot_frames], dtype=np.float64).reshape(-1, 2)
+    return ball_positions, player_1_positions, player_2_positions
+
+
+def compute_shot_events(ball_shot_frames, ball_positions, player_1_positions, player_2_positions,
+                        player_1, player_2, fps, meters_per_pixel=1.0):
+    """
+    Vectorized version of the per-shot loop in main.py.
+
+    Every consecutive pair of shot frames is one shot. Positions are (S, 2) arrays
+    sampled at the shot frames, in mini court pixels (meters_per_pixel converts them)
+    or directly in metres (meters_per_pixel=1). Returns a dict of arrays with one
+    entry per shot: frame_num, shooter, shot_speed and opponent_speed (km/h).
+    """
+    shot_frames = np.asarray(ball_shot_frames, dtype=np.int64)
+    if len(shot_frames) < 2:
+        return {'frame_num': np.empty(0, dtype=np.int64),
+                'shooter': np.empty(0, dtype=np.int64),
+                'shot_speed': np.empty(0),
+                'opponent_speed': np.empty(0)}
+
+    start, end = slice(None, -1), slice(1, None)
+    shot_time_in_seconds = (shot_frames[end] - shot_frames[start]) / fps
+
+    # Ball speed in km/h
+    ball_distance = np.linalg.norm(ball_positions[end] - ball_positions[start], axis=1) * meters_per_pixel
+    shot_speed = ball_distance / shot_time_in_seconds * 3.6
+
+    # The player closer to the ball at the start frame hit the shot (ties go to player_1)
+    distance_1 = np.linalg.norm(player_1_positions[start] - ball_positions[start], axis=1)
+    distance_2 = np.linalg.norm(player_2_positions[start] - ball_positions[start], axis=1)
+    player_1_shot = distance_2 >= distance_1
+
+    # Opponent speed over the same interval
+    opponent_distance = np.where(
+        player_1_shot,
+        np.linalg.norm(player_2_positions[end] - player_2_positions[start], axis=1),
+        np.linalg.norm(player_1_positions[end] - player_1_positions[start], axis=1),
+    ) * meters_per_pixel
+    opponent_speed = opponent_distance / shot_time_in_seconds * 3.6
+
+    return {'frame_num': shot_frames[start],
+            'shooter': np.where(player_1_shot, player_1, player_2),
+            'shot_speed': shot_speed,
+            'opponent_speed': opponent_speed}
+
+
+def _last_value(mask, values):
+    # Forward fill of values[mask], 0 before the first True
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    idx = np.maximum.accumulate(idx)
+    return np.where(idx >= 0, values[np.maximum(idx, 0)], 0.0)
+
+
+def cumulative_player_stats(shot_events, player_1, player_2):
+    """
+    Running totals after each shot, one row per event plus the initial all-zero row
+    at frame 0 (the same rows the old deepcopy loop appended to player_stats_data).
+    """
+    shooter = shot_events['shooter']
+    columns = {'frame_num': np.concatenate([[0], shot_events['frame_num']]).astype(np.int64)}
+
+    for player_id in (player_1, player_2):
+        shot = shooter == player_id
+        opponent_shot = ~shot
+        shot_speed = np.where(shot, shot_events['shot_speed'], 0.0)
+        player_speed = np.where(opponent_shot, shot_events['opponent_speed'], 0.0)
+
+        stats = {
+            'number_of_shots': np.cumsum(shot),
+            'total_shot_speed': np.cumsum(shot_speed),
+            'last_shot_speed': _last_value(shot, shot_events['shot_speed']),
+            'total_player_speed': np.cumsum(player_speed),
+            'last_player_speed': _last_value(opponent_shot, shot_events['opponent_speed']),
+        }
+        for stat_name in STAT_NAMES:
+            columns[f'player_{player_id}_{stat_name}'] = np.concatenate([[0.0], stats[stat_name]])
+
+    return columns
+
+
+def expand_to_frames(event_columns, num_frames):
+    # Per-frame view of the event rows (what merge + ffill used to produce)
+    row_index = np.searchsorted(event_columns['frame_num'], np.arange(num_frames), side='right') - 1
+    row_index = np.maximum(row_index, 0)
+    frame_columns = {'frame_num': np.arange(num_frames)}
+    for name, values in event_columns.items():
+        if name != 'frame_num':
+            frame_columns[name] = values[row_index]
+    return frame_columns
+
+
+def build_player_stats_df(shot_events, num_frames, player_1, player_2):
+    """
+    Per-frame player stats DataFrame with the same columns main.py always produced,
+    including the average_shot_speed / average_player_speed columns.
+    """
+    frame_columns = expand_to_frames(cumulative_player_stats(shot_events, player_1, player_2), num_frames)
+
+    for player_id, opponent_id in ((player_1, player_2), (player_2, player_1)):
+        frame_columns[f'player_{player_id}_average_shot_speed'] = (
+            frame_columns[f'player_{player_id}_total_shot_speed']
+            / np.maximum(frame_columns[f'player_{player_id}_number_of_shots'], 1))
+        # A player's speed is recorded while the opponent is hitting
+        frame_columns[f'player_{player_id}_average_player_speed'] = (
+            frame_columns[f'player_{player_id}_total_player_speed']
+            / np.maximum(frame_columns[f'player_{opponent_id}_number_of_shots'], 1))
+
+    return pd.DataFrame(frame_columns)
@@ -0,0 +1,168 @@
+"""
+Columnar store for match stats, one Parquet dataset per table.
+
+    store = MatchStatsStore("stats_store")
+    store.append("match_042", max_stats_df, player_stats_data_df, player_1, player_2)
+    store.load("max_stats", matches=["match_042"])
+
+Tables are long format, keyed by match and player:
+    max_stats    one row per match and player (the max_game_report stats)
+    frame_stats  one row per match, player and frame (the player_stats_data_df columns)
+max_stats keeps every value as float64, NaN included, since scores() compares
+them against the thresholds and float32 could move one across a threshold.
+frame_stats, the large table, stores counts as int32 and everything else as
+float32. Each append writes a new file to the table's directory, so appending
+never rewrites earlier matches.
+pyarrow is only imported when the store is used.
+"""
+import os
+import re
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from app_rep import stats_to_long, thresholds as default_thresholds
+from metrics import score_metrics
+
+TABLES = ("max_stats", "frame_stats")
+
+# Stored as int32 in frame_stats, every other stat as float32
+COUNT_STATS = {"number_of_shots", "rally_contribution", "total_shots"}
+
+# Columns add_player_stats_columns names by player slot (player_1_ / player_2_)
+# rather than by track id
+SLOT_STATS = {"acceleration", "shot_inconsistency", "distance_covered",
+              "rally_contribution", "total_shots", "rally_percentage"}
+
+def compact_stats(df, key_columns):
+    # Typed copy of a long table: int32 counts, float32 stats, keys left as they are
+    columns = {}
+    for column in df.columns:
+        if column in key_columns:
+            columns[column] = df[column].to_numpy()
+        elif column in COUNT_STATS:
+            columns[column] = df[column].fillna(0).to_numpy().astype(np.int32)
+        else:
+            columns[column] = df[column].to_numpy().astype(np.float32)
+    return pd.DataFrame(columns)
+
+def frame_stats_to_long(player_stats, player_1, player_2):
+    """
+    player_stats_data_df (one wide row per frame) as one row per player and
+    frame with plain stat columns: frame_num, player, number_of_shots, ...
+    """
+    slots = {1: player_1, 2: player_2}
+    per_player = {player_1: {}, player_2: {}}
+    for column in player_stats.columns:
+        match = re.match(r"player_(\d+)_(.+)$", str(column))
+        if not match:
+            continue
+        column_id, stat_name = int(match.group(1)), match.group(2)
+        player_id = slots.get(column_id) if stat_name in SLOT_STATS else column_id
+        if player_id in per_player:
+            per_player[player_id][stat_name] = player_stats[column].to_numpy()
+
+    frame_num = player_stats['frame_num'].to_numpy().astype(np.int32)
+    rows = []
+    for player_id, stats in per_player.items():
+        player_df = pd.DataFrame(stats)
+        player_df.insert(0, "player", np.int32(player_id))
+        player_df.insert(0, "frame_num", frame_num)
+        rows.append(player_df)
+    return pd.concat(rows, ignore_index=True)
+
+class MatchStatsStore:
+    def __init__(self, root="stats_store"):
+        self.root = root
+
+    def table_path(self, table):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return os.path.join(self.root, table)
+
+    def _write(self, table, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.table_path(table)
+        os.makedirs(path, exist_ok=True)
+        file_path = os.path.join(path, f"part-{uuid.uuid4().hex}.parquet")
+        tmp_path = f"{file_path}.tmp"
+        # Written under a temporary name so readers never see a partial file
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression="zstd")
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def append(self, match_id, max_stats_df=None, player_stats=None, player_1=None, player_2=None):
+        """
+        Adds one match. max_stats_df is the wide generate_report_max_only
+        table, player_stats the per-frame player_stats_data_df (needs
+        player_1 / player_2 to resolve its column names).
+        """
+        if max_stats_df is not None:
+            long_df = stats_to_long(max_stats_df).drop(columns="match")
+            long_df.insert(0, "match", str(match_id))
+            long_df["player"] = long_df["player"].astype(np.int32)
+            stat_columns = long_df.columns.difference(["match", "player"])
+            long_df[stat_columns] = long_df[stat_columns].astype(np.float64)
+            self._write("max_stats", long_df)
+
+        if player_stats is not None:
+            long_df = frame_stats_to_long(player_stats, player_1, player_2)
+            long_df.insert(0, "match", str(match_id))
+            self._write("frame_stats", compact_stats(long_df, {"match", "player", "frame_num"}))
+
+    def load(self, table, matches=None, players=None, columns=None):
+        """
+        The table as a DataFrame, optionally only some matches / players /
+        columns. Filters and column selection are pushed down to the Parquet
+        reader, so only the matching row groups and columns are read.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        path = self.table_path(table)
+        if not os.path.isdir(path):
+            return pd.DataFrame()
+
+        fragments = list(ds.dataset(path, format="parquet").get_fragments())
+        if not fragments:
+            return pd.DataFrame()
+        # Files from older versions may have narrower types (float32 max_stats),
+        # widen every file to the common schema instead of the first file's
+        schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments],
+                                  promote_options="permissive")
+        dataset = ds.dataset(path, format="parquet", schema=schema)
+        condition = None
+        if matches is not None:
+            condition = ds.field("match").isin([str(match_id) for match_id in matches])
+        if players is not None:
+            player_condition = ds.field("player").isin([int(player_id) for player_id in players])
+            condition = player_condition if condition is None else condition & player_condition
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    def matches(self):
+        df = self.load("max_stats", columns=["match"])
+        return sorted(df["match"].unique()) if len(df) else []
+
+    def scores(self, matches=None, thresholds=default_thresholds):
+        # score_players over the stored max stats, one row per match and player
+        df = self.load("max_stats", matches=matches)
+        if not len(df):
+            return df
+        return score_metrics(long_stats=df, thresholds=thresholds).get("scores")
+
+    def compact(self, table):
+        """
+        Rewrites the table's many small append files as a single file. Run it
+        after a batch to keep loads fast.
+        """
+        df = self.load(table)
+        if not len(df):
+            return
+        path = self.table_path(table)
+        old_files = [os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet")]
+        self._write(table, df)
+        for file_path in old_files:
+            os.remove(file_path)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app_rep import calculate_points, score_stat, score_players, stats_to_long, thresholds
+
+def make_long_stats(num_matches=50, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for match in range(num_matches):
+        for player in (1, 2):
+            row = {"match": match, "player": player}
+            for stat_name, th in thresholds.items():
+                # Values around every threshold, exact hits included
+                row[stat_name] = rng.choice([th["Low"] - 1, th["Low"], th["Med"], th["High"], th["High"] + 1,
+                                             rng.uniform(0, 100), np.nan])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def test_score_stat_matches_calculate_points():
+    long_stats = make_long_stats()
+    for stat_name in thresholds:
+        values = long_stats[stat_name].to_numpy()
+        expected = [calculate_points(value, stat_name) for value in values]
+        assert score_stat(values, stat_name).tolist() == expected, stat_name
+
+def test_score_players_totals():
+    scored = score_players(make_long_stats())
+    points = scored[[f"{stat_name}_Points" for stat_name in thresholds]]
+    assert (scored["Total_Score"] == points.sum(axis=1)).all()
+    np.testing.assert_allclose(scored["Score_Percentage"], scored["Total_Score"] / (3 * len(thresholds)) * 100)
+
+def test_stats_to_long_splits_players():
+    wide = pd.DataFrame({"player_1_max_speed": [5.0, 6.0], "player_7_max_speed": [7.0, 8.0],
+                         "player_1_total_shots": [1, 2], "player_7_total_shots": [3, 4]})
+    long_stats = stats_to_long(wide)
+
+    assert long_stats[["match", "player"]].values.tolist() == [[0, 1], [0, 7], [1, 1], [1, 7]]
+    assert long_stats["max_speed"].tolist() == [5.0, 7.0, 6.0, 8.0]
+    assert long_stats["total_shots"].tolist() == [1, 3, 2, 4]
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import batch_runner
+import main
+from batch_runner import MemoryLimit, run_batch
+from event_stats import EventPlayerStats
+from instrumentation import current_rss_mb
+from shot_stats import compute_shot_events
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"),
+                                reason="forked workers inherit the fakes, RSS read from /proc")
+
+def make_max_stats(num_frames=500):
+    rng = np.random.default_rng(0)
+    shot_frames = np.arange(10, num_frames, 40)
+    positions = [rng.uniform(0, 250, size=(len(shot_frames), 2)) for _ in range(3)]
+    shot_events = compute_shot_events(shot_frames, *positions, 1, 2, 24, 0.05)
+    return EventPlayerStats(shot_events, num_frames, 1, 2, 24).max_stats()
+
+MAX_STATS = make_max_stats()
+
+def allocate_until_stopped(seconds=10):
+    chunks = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        chunks.append(np.ones(16 * 1024 * 1024, dtype=np.uint8))
+        time.sleep(0.01)
+    return chunks
+
+def fake_analyze_match(video_path, output_video_path, **kwargs):
+    name = os.path.basename(video_path)
+    if "hog" in name:
+        allocate_until_stopped()
+    elif "crash" in name:
+        os._exit(1)
+    return MAX_STATS, None, None
+
+def write_videos(directory, names):
+    directory.mkdir()
+    for name in names:
+        (directory / name).write_bytes(b"")
+    return str(directory)
+
+def test_memory_limit_fails_only_the_watched_match():
+    limit = MemoryLimit(current_rss_mb() + 100, interval=0.05)
+    with pytest.raises(MemoryError):
+        with limit.watch():
+            allocate_until_stopped()
+
+    # The next match runs normally
+    with limit.watch():
+        time.sleep(0.2)
+
+def test_memory_limit_not_raised_outside_a_match():
+    MemoryLimit(current_rss_mb() + 50, interval=0.05)
+    chunks = allocate_until_stopped(seconds=0.5)
+    time.sleep(0.2)
+    assert len(chunks) > 0
+
+def test_run_batch_fails_only_the_match_over_the_limit(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(main, "load_models", lambda num_threads=None: {})
+    monkeypatch.setattr(main, "analyze_match", fake_analyze_match)
+    # One worker runs them in order, c runs after b_hog hit the limit
+    source = write_videos(tmp_path / "videos", ["a.mp4", "b_hog.mp4", "c.mp4"])
+
+    combined = run_batch(source, str(tmp_path / "out"), max_workers=1,
+                         memory_limit_mb=current_rss_mb() + 300)
+    assert sorted(combined["match"].unique()) == ["a", "c"]
+    output = capsys.readouterr().out
+    assert "b_hog.mp4 failed" in output and "MemoryError" in output
+
+def test_run_batch_survives_a_dead_worker(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(main, "load_models", lambda num_threads=None: {})
+    monkeypatch.setattr(main, "analyze_match", fake_analyze_match)
+    source = write_videos(tmp_path / "videos", ["crash.mp4", "z.mp4"])
+
+    combined = run_batch(source, str(tmp_path / "out"), max_workers=1)
+    assert "crash.mp4 failed: the worker process running it died" in capsys.readouterr().out
+    assert set(combined["match"]) <= {"z"}
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+from compositor import FrameCompositor, StaticLayer
+
+FRAME_SHAPE = (360, 640, 3)
+
+def make_frame(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=FRAME_SHAPE, dtype=np.uint8)
+
+def draw_panel(image):
+    # Mini court style: a half transparent box with opaque lines on top
+    overlay = image.copy()
+    cv2.rectangle(overlay, (400, 20), (620, 300), (255, 255, 255), cv2.FILLED)
+    image = cv2.addWeighted(overlay, 0.5, image, 0.5, 0)
+    cv2.rectangle(image, (420, 40), (600, 280), (0, 0, 0), 2)
+    cv2.line(image, (420, 160), (600, 160), (0, 0, 0), 2)
+    return image
+
+def draw_keypoints(image):
+    # Keypoint style: text, filled circles and an antialiased outline that
+    # reaches the frame corners
+    for i, (x, y) in enumerate([(30, 40), (600, 50), (320, 180), (60, 330)]):
+        cv2.putText(image, str(i), (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+        cv2.circle(image, (x, y), 5, (0, 0, 255), -1)
+    corners = np.array([(0, 0), (639, 0), (639, 359), (0, 359)], np.int32).reshape((-1, 1, 2))
+    cv2.polylines(image, [corners], isClosed=True, color=(0, 255, 0), thickness=2, lineType=cv2.LINE_AA)
+    return image
+
+def assert_within_one(actual, expected):
+    difference = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+    assert difference.max() <= 1
+
+def test_dense_layer_matches_drawing_directly():
+    layer = StaticLayer(draw_panel, FRAME_SHAPE)
+    assert not layer.sparse
+
+    for seed in range(3):
+        frame = make_frame(seed)
+        assert_within_one(layer.apply(frame.copy()), draw_panel(frame.copy()))
+
+def test_sparse_full_frame_layer_matches_drawing_directly():
+    layer = StaticLayer(draw_keypoints, FRAME_SHAPE)
+    assert layer.sparse
+    assert layer.rgba.shape[:2] == FRAME_SHAPE[:2]
+
+    for seed in range(3):
+        frame = make_frame(seed)
+        assert_within_one(layer.apply(frame.copy()), draw_keypoints(frame.copy()))
+
+def test_empty_layer_leaves_the_frame_alone():
+    layer = StaticLayer(lambda image: image, FRAME_SHAPE)
+    frame = make_frame()
+    np.testing.assert_array_equal(layer.apply(frame.copy()), frame)
+
+def test_compositor_applies_layers_in_order():
+    compositor = FrameCompositor()
+    compositor.add_static('panel', draw_panel)
+    compositor.add_dynamic('keypoints', lambda frame, frame_num: draw_keypoints(frame))
+
+    frames = [make_frame(seed) for seed in range(3)]
+    composed = list(compositor.iter_compose([frame.copy() for frame in frames]))
+    for frame, result in zip(frames, composed):
+        assert_within_one(result, draw_keypoints(draw_panel(frame.copy())))
@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from court_line_detector import CourtLineDetector, CourtKeypointTracker, preprocess_frames
+from main import annotate_frames
+
+class FixedCourtModel(torch.nn.Module):
+    # The same 14 keypoints (224x224 coordinates) whatever the frame
+    def forward(self, batch):
+        return torch.linspace(20.0, 200.0, 28).repeat(len(batch), 1)
+
+class FakeTracker:
+    def draw_bboxes(self, frames, detections):
+        return frames
+
+class FakeMiniCourt:
+    def draw_mini_court(self, frames):
+        return frames
+
+    def draw_points_on_mini_court(self, frames, positions, color=(0, 255, 0)):
+        return frames
+
+def make_conv_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(torch.nn.Conv2d(3, 8, 4, stride=4), torch.nn.ReLU(), torch.nn.AdaptiveAvgPool2d(4),
+                               torch.nn.Flatten(), torch.nn.Linear(128, 28))
+
+def make_detector():
+    return CourtLineDetector(model=FixedCourtModel(), device='cpu')
+
+def export_torchscript(model, output_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        torch.jit.save(torch.jit.trace(model.eval(), torch.zeros(1, 3, 224, 224)), str(output_path))
+    return str(output_path)
+
+def make_frames(num_frames):
+    return [np.full((72, 128, 3), 40, dtype=np.uint8) for _ in range(num_frames)]
+
+def test_predict_batch_matches_predict():
+    detector = CourtLineDetector(model=make_conv_model(), device='cpu')
+    rng = np.random.default_rng(0)
+    # Mixed frame sizes, and more frames than one batch
+    frames = [rng.integers(0, 256, size=shape, dtype=np.uint8)
+              for shape in [(360, 640, 3)] * 5 + [(1025, 1884, 3), (224, 224, 3)]]
+
+    batched = detector.predict_batch(frames, batch_size=3)
+    assert batched.shape == (len(frames), 28)
+    for frame, keypoints in zip(frames, batched):
+        np.testing.assert_allclose(keypoints, detector.predict(frame), rtol=1e-4, atol=1e-3)
+
+def test_preprocessing_matches_torchvision():
+    transforms = pytest.importorskip("torchvision.transforms")
+    transform = transforms.Compose([
+        transforms.ToPILImage(),
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+    ])
+    frame = np.random.default_rng(0).integers(0, 256, size=(1025, 1884, 3), dtype=np.uint8)
+    expected = transform(np.ascontiguousarray(frame[..., ::-1]))
+    np.testing.assert_allclose(preprocess_frames([frame])[0].numpy(), expected.numpy(), atol=1e-5)
+
+def test_exported_models_default_to_the_cpu(tmp_path, monkeypatch):
+    model_path = export_torchscript(make_conv_model(), tmp_path / "court.torchscript")
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: True)
+    detector = CourtLineDetector(model_path)
+    assert detector.device.type == 'cpu'
+    assert detector.predict(make_frames(1)[0]).shape == (28,)
+
+def test_quantized_torchscript_needs_the_cpu(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        quantized = torch.ao.quantization.quantize_dynamic(make_conv_model().eval(), {torch.nn.Linear},
+                                                           dtype=torch.qint8)
+    model_path = export_torchscript(quantized, tmp_path / "court_int8_dynamic.torchscript")
+    with pytest.raises(ValueError, match="quantized and only runs on the CPU"):
+        CourtLineDetector(model_path, device='cuda')
+
+def test_exported_models_load_without_torchvision(tmp_path):
+    model_path = export_torchscript(make_conv_model(), tmp_path / "court.torchscript")
+    script = ("import sys; sys.modules['torchvision'] = None\n"
+              "import numpy as np\n"
+              "from court_line_detector import CourtLineDetector\n"
+              f"detector = CourtLineDetector({model_path!r})\n"
+              "print(detector.predict(np.zeros((72, 128, 3), dtype=np.uint8)).shape)\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("(28,)")
+
+def test_track_mode_reuses_keypoints():
+    detector = make_detector()
+    tracker = CourtKeypointTracker(detector)
+    for frame in make_frames(10):
+        tracker.update(frame)
+    assert detector.inference_count == 1
+
+    detector = make_detector()
+    tracker = CourtKeypointTracker(detector, refresh_interval=4)
+    for frame in make_frames(10):
+        tracker.update(frame)
+    assert detector.inference_count == 3
+
+def test_per_frame_mode_predicts_every_frame():
+    detector = make_detector()
+    tracker = CourtKeypointTracker(detector, mode="per_frame")
+    for frame in make_frames(10):
+        tracker.update(frame)
+    assert detector.inference_count == 10
+
+@pytest.mark.parametrize("court_mode, expected", [("track", 0), ("per_frame", 12)])
+def test_annotate_frames_court_mode(court_mode, expected):
+    num_frames = 12
+    detector = make_detector()
+    court_keypoints = detector.predict(make_frames(1)[0])
+    detector.inference_count = 0
+
+    annotated = annotate_frames(make_frames(num_frames), FakeTracker(), [{}] * num_frames, FakeTracker(),
+                                [{}] * num_frames, detector, court_keypoints, FakeMiniCourt(),
+                                [{}] * num_frames, [{}] * num_frames, [], court_mode=court_mode)
+    assert len(list(annotated)) == num_frames
+    assert detector.inference_count == expected
@@ -0,0 +1,36 @@
+import numpy as np
+
+from court_projection import CourtProjector, court_reference_keypoints, fill_missing_positions
+from shot_stats import compute_shot_events
+
+def make_projector(scale=20.0, offset=(100.0, 50.0)):
+    # Keypoints of a court seen straight from above, scale pixels per metre
+    image_points = court_reference_keypoints() * scale + np.array(offset, dtype=np.float32)
+    return CourtProjector(image_points.ravel())
+
+def test_projects_back_to_metres():
+    projector = make_projector()
+    points = court_reference_keypoints() * 20.0 + np.array([100.0, 50.0])
+    np.testing.assert_allclose(projector.project_points(points), court_reference_keypoints(), atol=1e-3)
+
+def test_fill_missing_positions():
+    positions = np.array([[np.nan, np.nan], [1.0, 2.0], [np.nan, np.nan], [3.0, 4.0], [np.nan, np.nan]])
+    np.testing.assert_array_equal(fill_missing_positions(positions),
+                                  [[1.0, 2.0], [1.0, 2.0], [1.0, 2.0], [3.0, 4.0], [3.0, 4.0]])
+    assert np.isnan(fill_missing_positions(np.full((3, 2), np.nan))).all()
+
+def test_missing_player_keeps_last_position():
+    projector = make_projector()
+    player_detections = [{1: [100, 100, 120, 150], 2: [300, 500, 320, 560]},
+                         {2: [300, 510, 320, 570]},
+                         {1: [110, 100, 130, 160], 2: [300, 520, 320, 580]}]
+    ball_detections = [{1: [200, 200, 204, 204]}] * 3
+    player_positions, ball_positions = projector.project_detections(player_detections, ball_detections, 1, 2)
+
+    assert not np.isnan(player_positions).any()
+    np.testing.assert_allclose(player_positions[1, 0], player_positions[0, 0])
+
+    # The shot stats stay finite with the player missing at a shot frame
+    shot_events = compute_shot_events([0, 1, 2], ball_positions, player_positions[:, 0], player_positions[:, 1],
+                                      1, 2, 24)
+    assert np.isfinite(shot_events['opponent_speed']).all()
@@ -0,0 +1,63 @@
+import os
+
+from detection_cache import DetectionCache, encode_detections, decode_detections
+
+def make_detections(num_frames, offset=0.0):
+    return [{1: [offset + i, 2.0, 3.0, 4.0], 7: [5.0, 6.0, 7.0, 8.5]} if i % 3 else {} for i in range(num_frames)]
+
+def write_file(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+def test_encode_decode_round_trip():
+    detections = make_detections(10)
+    assert decode_detections(encode_detections(detections)) == detections
+    assert decode_detections(encode_detections([])) == []
+
+def test_get_or_detect_only_detects_once(tmp_path):
+    video = write_file(tmp_path / "video.mp4", b"video")
+    cache = DetectionCache(str(tmp_path / "cache"))
+    calls = []
+
+    def detect():
+        calls.append(1)
+        return make_detections(6)
+
+    first = cache.get_or_detect(video, "yolov8x", detect, params={"tracker": "player"})
+    second = cache.get_or_detect(video, "yolov8x", detect, params={"tracker": "player"})
+    assert first == second == make_detections(6)
+    assert len(calls) == 1
+
+def test_key_changes_with_video_model_and_params(tmp_path):
+    video = write_file(tmp_path / "video.mp4", b"video")
+    other_video = write_file(tmp_path / "other.mp4", b"other video")
+    model = write_file(tmp_path / "model.pt", b"weights")
+    cache = DetectionCache(str(tmp_path / "cache"))
+
+    key = cache.make_key(video, model, {"tracker": "ball"})
+    assert key == cache.make_key(video, model, {"tracker": "ball"})
+    assert key != cache.make_key(other_video, model, {"tracker": "ball"})
+    assert key != cache.make_key(video, model, {"tracker": "player"})
+
+    # New weights in the same file
+    write_file(model, b"retrained weights")
+    assert key != cache.make_key(video, model, {"tracker": "ball"})
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = DetectionCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.save(key, make_detections(200, offset=i))
+        os.utime(cache.path_for(key), (1000 + i, 1000 + i))
+    # Reading "a" makes it the most recently used
+    assert cache.load("a") is not None
+
+    entry_size = os.path.getsize(cache.path_for("b"))
+    cache.max_bytes = 2 * entry_size + entry_size // 2
+    cache.evict()
+    assert sorted(key for key, _, _ in cache.entries()) == ["a", "c"]
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    write_file(cache.path_for("broken"), b"not an npz file")
+    assert cache.load("broken") is None
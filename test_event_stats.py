@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from event_stats import EventPlayerStats
+from shot_stats import compute_shot_events, build_player_stats_df
+from utils.player_stats_drawer_utils import (add_player_stats_columns, get_player_stats_values,
+                                             generate_report_max_only)
+
+FPS = 24
+PLAYER_1, PLAYER_2 = 3, 8
+
+def make_shot_events(num_frames, seed=0, shot_frames=None):
+    rng = np.random.default_rng(seed)
+    if shot_frames is None:
+        shot_frames = np.cumsum(rng.integers(5, 80, size=num_frames // 5))
+        shot_frames = shot_frames[shot_frames < num_frames]
+    positions = [rng.uniform(0, 250, size=(len(shot_frames), 2)) for _ in range(3)]
+    return compute_shot_events(shot_frames, *positions, PLAYER_1, PLAYER_2, FPS, 0.05)
+
+def dense_stats(shot_events, num_frames):
+    player_stats = build_player_stats_df(shot_events, num_frames, PLAYER_1, PLAYER_2)
+    return add_player_stats_columns(player_stats, PLAYER_1, PLAYER_2, FPS)
+
+def test_values_match_the_dense_table():
+    num_frames = 3000
+    shot_events = make_shot_events(num_frames)
+    stats = EventPlayerStats(shot_events, num_frames, PLAYER_1, PLAYER_2, FPS)
+    expected = get_player_stats_values(dense_stats(shot_events, num_frames), PLAYER_1, PLAYER_2)
+
+    assert len(stats) == num_frames
+    np.testing.assert_allclose(stats.values_at(np.arange(num_frames)), expected, rtol=1e-9, atol=1e-9)
+    # Random access through the block cache
+    for frame_num in np.random.default_rng(1).integers(0, num_frames, size=50):
+        np.testing.assert_allclose(stats[frame_num], expected[frame_num], rtol=1e-9, atol=1e-9)
+
+def test_max_stats_match_generate_report_max_only():
+    for seed, num_frames in [(0, 3000), (1, 200), (2, 50)]:
+        shot_events = make_shot_events(num_frames, seed)
+        stats = EventPlayerStats(shot_events, num_frames, PLAYER_1, PLAYER_2, FPS)
+        expected = generate_report_max_only(dense_stats(shot_events, num_frames), PLAYER_1, PLAYER_2,
+                                            output_path=None)
+        report = generate_report_max_only(stats, PLAYER_1, PLAYER_2, output_path=None)
+
+        assert list(report.columns) == list(expected.columns)
+        np.testing.assert_allclose(report.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64),
+                                   rtol=1e-9, atol=1e-9)
+
+def test_no_shots():
+    num_frames = 100
+    shot_events = make_shot_events(num_frames, shot_frames=np.array([10]))
+    stats = EventPlayerStats(shot_events, num_frames, PLAYER_1, PLAYER_2, FPS)
+    assert (stats.values_at(np.arange(num_frames)) == 0).all()
+    assert stats.max_stats()[f"player_{PLAYER_1}_total_shots"].iloc[0] == 0
+
+def test_index_out_of_range():
+    stats = EventPlayerStats(make_shot_events(100), 100, PLAYER_1, PLAYER_2, FPS)
+    for frame_num in (-1, 100):
+        with pytest.raises(IndexError):
+            stats[frame_num]
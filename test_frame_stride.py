@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+from frame_stride import select_frames, interpolate_tracks, detect_adaptive
+from rallies import ball_visible_mask
+from utils.player_stats_drawer_utils import count_video_frames
+
+def write_video(path, num_frames):
+    # The frame number (times 4, MJPG is lossy) fills the top left block of each frame
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 24, (64, 48))
+    for frame_num in range(num_frames):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:16, :16] = frame_num * 4
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+def frame_number(frame):
+    return int(round(frame[4:12, 4:12].mean() / 4))
+
+class FakePlayerTracker:
+    def detect_frames(self, frames):
+        return [{1: [frame_number(f), 0.0, frame_number(f) + 10.0, 10.0]} for f in frames]
+
+class FakeBallTracker:
+    def __init__(self, shot_frames):
+        self.shot_frames = shot_frames
+        self.detected = []
+
+    def detect_frames(self, frames):
+        detections = []
+        for frame in frames:
+            self.detected.append(frame_number(frame))
+            detections.append({1: [1.0, 1.0, 2.0, 2.0]})
+        return detections
+
+    def interpolate_ball_positions(self, detections):
+        return detections
+
+    def get_ball_shot_frames(self, detections):
+        return self.shot_frames
+
+def test_select_frames():
+    selected = select_frames(20, 5, [(8, 10)])
+    assert selected.tolist() == [0, 5, 8, 9, 10, 15, 19]
+
+def test_interpolate_tracks_fills_between_neighbouring_samples():
+    selected = np.array([0, 4, 8])
+    sparse = [{1: [0, 0, 4, 4]}, {1: [4, 0, 8, 4]}, {}]
+    detections = interpolate_tracks(sparse, selected, 10)
+
+    assert detections[2] == {1: [2.0, 0.0, 6.0, 4.0]}
+    # Not found on frame 8, so nothing is filled after frame 4
+    assert detections[4] == {1: [4.0, 0.0, 8.0, 4.0]}
+    assert detections[5] == {} and detections[9] == {}
+
+def test_detect_adaptive_uses_decoded_frames(tmp_path):
+    num_frames = 60
+    video_path = write_video(tmp_path / "video.avi", num_frames)
+    assert count_video_frames(video_path) == num_frames
+
+    ball_tracker = FakeBallTracker(shot_frames=[30])
+    player_detections, ball_detections = detect_adaptive(FakePlayerTracker(), ball_tracker, video_path,
+                                                         stride=8, shot_radius=2)
+
+    assert len(player_detections) == len(ball_detections) == num_frames
+    # Players are interpolated to every frame and land on the right bbox
+    assert all(player_detections[frame_num][1][0] == frame_num for frame_num in range(num_frames))
+
+    # The ball is only set where it was detected, so interpolated frames don't count as visible
+    detected = sorted(set(ball_tracker.detected))
+    assert detected == select_frames(num_frames, 8, [(28, 32)]).tolist()
+    assert np.flatnonzero(ball_visible_mask(ball_detections)).tolist() == detected
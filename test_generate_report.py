@@ -0,0 +1,53 @@
+import os
+import re
+import sys
+import zlib
+
+import pandas as pd
+import pytest
+
+from generate_report import FpdfRenderer, generate_reports_batch, get_report_renderer
+
+pytest.importorskip("fpdf")
+
+MAX_GAME_REPORT = os.path.join(os.path.dirname(__file__), "max_game_report.csv")
+
+def pdf_pages(content):
+    return len(re.findall(rb"/Type\s*/Page(?!s)", content))
+
+def pdf_text(content):
+    # Page content streams are zlib compressed
+    text = b""
+    for stream in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", content, re.S):
+        try:
+            text += zlib.decompress(stream)
+        except zlib.error:
+            text += stream
+    return text
+
+def test_fpdf_reports_are_valid_pdfs(tmp_path):
+    max_stats = pd.read_csv(MAX_GAME_REPORT, index_col=0)
+    pdf_paths = generate_reports_batch({"match": max_stats}, str(tmp_path), renderer="fpdf")
+
+    # One report per player
+    assert [os.path.basename(path) for path in pdf_paths] == ["match_player_1_report.pdf",
+                                                              "match_player_2_report.pdf"]
+    for player, pdf_path in zip((1, 2), pdf_paths):
+        with open(pdf_path, "rb") as f:
+            content = f.read()
+        assert content.startswith(b"%PDF-") and content.rstrip().endswith(b"%%EOF")
+        assert pdf_pages(content) >= 1
+        assert f"Tennis Player Report - {player}".encode() in pdf_text(content)
+
+def test_default_renderer_is_fpdf():
+    assert isinstance(get_report_renderer(), FpdfRenderer)
+
+def test_clear_error_without_any_renderer(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fpdf", None)
+    monkeypatch.setitem(sys.modules, "pdfkit", None)
+    with pytest.raises(RuntimeError, match="No PDF report renderer is available.*fpdf2.*pdfkit"):
+        get_report_renderer()
+    with pytest.raises(RuntimeError, match="fpdf2"):
+        get_report_renderer("fpdf")
+    with pytest.raises(RuntimeError, match="wkhtmltopdf"):
+        generate_reports_batch({}, "unused", renderer="wkhtmltopdf")
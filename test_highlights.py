@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from highlights import highlight_ranges, merge_ranges, top_stat_frames
+
+@pytest.mark.parametrize("frame_ranges, expected", [
+    ([], []),
+    # Overlapping, and one range inside another
+    ([(10, 20), (15, 30)], [(10, 30)]),
+    ([(10, 50), (20, 30)], [(10, 50)]),
+    # Sharing an end frame, and touching (no frame between them)
+    ([(10, 20), (20, 30)], [(10, 30)]),
+    ([(10, 20), (21, 30)], [(10, 30)]),
+    # Adjacent with one frame between them stay apart
+    ([(10, 20), (22, 30)], [(10, 20), (22, 30)]),
+    # Unsorted input, merged in a chain
+    ([(40, 45), (10, 20), (18, 41)], [(10, 45)]),
+])
+def test_merge_ranges(frame_ranges, expected):
+    assert merge_ranges(frame_ranges) == expected
+
+@pytest.mark.parametrize("frame_ranges, expected", [
+    # Clamped at frame 0, dropped when entirely before it
+    ([(-15, 5)], [(0, 5)]),
+    ([(-10, -1), (3, 8)], [(3, 8)]),
+    # Clamped at the last frame, dropped when entirely after it
+    ([(95, 130)], [(95, 99)]),
+    ([(90, 95), (100, 130)], [(90, 95)]),
+    ([(-5, 40), (30, 120)], [(0, 99)]),
+])
+def test_merge_ranges_clamps_to_the_video(frame_ranges, expected):
+    assert merge_ranges(frame_ranges, num_frames=100) == expected
+
+def make_player_stats(values, first_frame=100):
+    return pd.DataFrame({'frame_num': np.arange(first_frame, first_frame + len(values)),
+                         'player_1_last_shot_speed': values})
+
+def test_top_stat_frames_ties_keep_frame_order():
+    # New values at rows 2 (50), 5 (30), 7 (50), 9 (70) and 13 (30 after NaN)
+    values = [0, 0, 50, 50, 50, 30, 30, 50, 50, 70, 70, np.nan, np.nan, 30]
+    player_stats = make_player_stats(values)
+
+    frames, top_values = top_stat_frames(player_stats, 'player_1_last_shot_speed', n=3)
+    assert frames.tolist() == [109, 102, 107]
+    assert top_values.tolist() == [70, 50, 50]
+
+    frames, top_values = top_stat_frames(player_stats, 'player_1_last_shot_speed', n=10)
+    assert frames.tolist() == [109, 102, 107, 105, 113]
+    assert top_values.tolist() == [70, 50, 50, 30, 30]
+
+def test_top_stat_frames_without_any_shot():
+    frames, top_values = top_stat_frames(make_player_stats([0.0] * 5 + [np.nan] * 5), 'player_1_last_shot_speed')
+    assert len(frames) == 0 and len(top_values) == 0
+
+def test_highlight_ranges_pad_and_clamp():
+    num_frames = 60
+    player_stats = pd.DataFrame({'frame_num': np.arange(num_frames)})
+    for column in ('player_1_last_shot_speed', 'player_2_last_shot_speed',
+                   'player_1_last_player_speed', 'player_2_last_player_speed'):
+        player_stats[column] = 0.0
+    # Moments at frames 3, 35 and 55
+    player_stats.loc[3:, 'player_1_last_shot_speed'] = 80.0
+    player_stats.loc[35:, 'player_2_last_shot_speed'] = 60.0
+    player_stats.loc[55:, 'player_1_last_player_speed'] = 9.0
+
+    # 10 fps, 1 s before and 2 s after each moment: (-7, 23), (25, 55) and (45, 75),
+    # clamped to the video with the last two merged
+    ranges = highlight_ranges(player_stats, 1, 2, fps=10, num_frames=num_frames)
+    assert ranges == [(0, 23), (25, 59)]
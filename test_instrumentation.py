@@ -0,0 +1,47 @@
+import importlib
+import sys
+
+import numpy as np
+
+import instrumentation
+from instrumentation import PipelineProfiler
+
+def test_stage_rss_follows_current_memory():
+    profiler = PipelineProfiler()
+    with profiler.stage("small"):
+        pass
+    with profiler.stage("large"):
+        buffer = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+        profiler._rss_sampled_at = None
+    del buffer
+    profiler._rss_sampled_at = None
+    with profiler.stage("after"):
+        pass
+
+    stages = profiler.summary()["stages"]
+    # A later stage doesn't inherit the process high-water mark
+    assert stages["large"]["rss_mb"] - stages["after"]["rss_mb"] > 32
+    assert stages["large"]["rss_mb"] - stages["small"]["rss_mb"] > 32
+    assert profiler.summary()["process_peak_rss_mb"] >= stages["large"]["rss_mb"] - 1
+
+def test_without_resource_or_psutil(monkeypatch):
+    # e.g. Windows without psutil: memory fields are None, timings still work
+    monkeypatch.setattr(instrumentation, "resource", None)
+    monkeypatch.setattr(instrumentation, "psutil", None)
+    monkeypatch.setattr(instrumentation.sys, "platform", "win32")
+    profiler = PipelineProfiler()
+    with profiler.stage("stage", frames=3):
+        pass
+
+    summary = profiler.summary()
+    assert summary["process_peak_rss_mb"] is None and summary["rss_mb"] is None
+    assert summary["stages"]["stage"]["rss_mb"] is None
+    assert summary["stages"]["stage"]["frames"] == 3
+
+def test_imports_without_resource(monkeypatch):
+    monkeypatch.setitem(sys.modules, "resource", None)
+    try:
+        assert importlib.reload(instrumentation).resource is None
+    finally:
+        monkeypatch.undo()
+        importlib.reload(instrumentation)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from live_stats import LiveMatchStats
+from shot_stats import compute_shot_events, build_player_stats_df
+from utils.player_stats_drawer_utils import add_player_stats_columns, generate_report_max_only
+
+FPS = 24
+PLAYER_1, PLAYER_2 = 1, 2
+
+def make_shot_events(num_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    shot_frames = np.cumsum(rng.integers(10, 60, size=num_frames // 10))
+    shot_frames = shot_frames[shot_frames < num_frames]
+    positions = [rng.uniform(0, 250, size=(len(shot_frames), 2)) for _ in range(3)]
+    return compute_shot_events(shot_frames, *positions, PLAYER_1, PLAYER_2, FPS, 0.05)
+
+def batch_report(shot_events, num_frames):
+    player_stats = build_player_stats_df(shot_events, num_frames, PLAYER_1, PLAYER_2)
+    add_player_stats_columns(player_stats, PLAYER_1, PLAYER_2, FPS)
+    return player_stats, generate_report_max_only(player_stats, PLAYER_1, PLAYER_2, output_path=None)
+
+def assert_same_report(live, batch):
+    assert list(live.columns) == list(batch.columns)
+    np.testing.assert_allclose(live.to_numpy(dtype=np.float64), batch.to_numpy(dtype=np.float64), rtol=1e-9)
+
+def test_frame_by_frame_matches_batch():
+    num_frames = 600
+    shot_events = make_shot_events(num_frames)
+    player_stats, expected = batch_report(shot_events, num_frames)
+
+    live = LiveMatchStats(PLAYER_1, PLAYER_2, FPS)
+    for _, row in player_stats.iterrows():
+        live.update_row(row)
+    assert_same_report(live.max_game_report(), expected)
+
+def test_shot_events_match_batch():
+    num_frames = 2000
+    shot_events = make_shot_events(num_frames, seed=1)
+    _, expected = batch_report(shot_events, num_frames)
+
+    live = LiveMatchStats(PLAYER_1, PLAYER_2, FPS)
+    live.update(0.0, 0.0, 0.0, 0.0)
+    for frame_num, shooter, shot_speed, opponent_speed in zip(shot_events['frame_num'], shot_events['shooter'],
+                                                              shot_events['shot_speed'], shot_events['opponent_speed']):
+        live.add_shot(int(frame_num), shooter, shot_speed, opponent_speed)
+    live.advance_to(num_frames)
+    assert live.frames == num_frames
+    assert_same_report(live.max_game_report(), expected)
+
+def test_scores_follow_the_report():
+    live = LiveMatchStats(PLAYER_1, PLAYER_2, FPS)
+    live.update(50.0, 7.0, 40.0, 5.0, n_frames=10)
+    scores = live.scores()
+    assert scores["player"].tolist() == [PLAYER_1, PLAYER_2]
+    assert isinstance(scores, pd.DataFrame) and "Total_Score" in scores
+
+def feed_shot_events(shot_events, num_frames):
+    live = LiveMatchStats(PLAYER_1, PLAYER_2, FPS)
+    live.update(0.0, 0.0, 0.0, 0.0)
+    for frame_num, shooter, shot_speed, opponent_speed in zip(shot_events['frame_num'], shot_events['shooter'],
+                                                              shot_events['shot_speed'], shot_events['opponent_speed']):
+        live.add_shot(int(frame_num), shooter, shot_speed, opponent_speed)
+    live.advance_to(num_frames)
+    return live
+
+def test_nan_speeds_are_skipped_like_batch():
+    num_frames = 1500
+    shot_events = make_shot_events(num_frames, seed=2)
+    shot_events['shot_speed'][[1, 4, 5]] = np.nan
+    shot_events['opponent_speed'][[2, 5, 9]] = np.nan
+    _, expected = batch_report(shot_events, num_frames)
+
+    live = feed_shot_events(shot_events, num_frames)
+    report = live.max_game_report()
+    assert np.isfinite(report.to_numpy(dtype=np.float64)).all()
+    assert_same_report(report, expected)
+
+def test_shots_on_the_same_frame_count_once():
+    num_frames = 1500
+    shot_events = make_shot_events(num_frames, seed=3)
+    # A second event on frame 3's start, from the other player
+    duplicate = 3
+    shot_events = {name: np.insert(values, duplicate + 1, values[duplicate]) for name, values in shot_events.items()}
+    shot_events['shooter'][duplicate + 1] = PLAYER_1 if shot_events['shooter'][duplicate] == PLAYER_2 else PLAYER_2
+    shot_events['shot_speed'][duplicate + 1] += 30.0
+    _, expected = batch_report(shot_events, num_frames)
+
+    live = feed_shot_events(shot_events, num_frames)
+    assert live.frames == num_frames
+    assert_same_report(live.max_game_report(), expected)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from main import detect_in_one_pass
+
+class CountingTracker:
+    def __init__(self, offset):
+        self.offset = offset
+        self.frames = []
+
+    def detect_frame(self, frame):
+        self.frames.append(int(frame[0, 0, 0]))
+        return {1: [self.offset + frame[0, 0, 0], 0.0, 10.0, 10.0]}
+
+def decode(num_frames, decoded):
+    for frame_num in range(num_frames):
+        decoded.append(frame_num)
+        yield np.full((4, 4, 3), frame_num, dtype=np.uint8)
+
+def test_both_trackers_share_one_decode():
+    decoded = []
+    player_tracker, ball_tracker = CountingTracker(0.0), CountingTracker(100.0)
+    player_detections, ball_detections = detect_in_one_pass(decode(6, decoded), player_tracker, ball_tracker)
+
+    assert decoded == list(range(6))
+    assert player_tracker.frames == ball_tracker.frames == list(range(6))
+    assert [detections[1][0] for detections in player_detections] == list(range(6))
+    assert [detections[1][0] for detections in ball_detections] == list(range(100, 106))
+
+def test_skips_a_tracker_left_out():
+    decoded = []
+    ball_tracker = CountingTracker(100.0)
+    player_detections, ball_detections = detect_in_one_pass(decode(3, decoded), None, ball_tracker)
+    assert player_detections is None
+    assert len(ball_detections) == 3 and decoded == [0, 1, 2]
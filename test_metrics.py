@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app_rep import player_score_data, score_players, stats_to_long, write_player_data, thresholds
+from event_stats import EventPlayerStats
+from metrics import MetricGraph, score_metrics, match_metrics
+from shot_stats import compute_shot_events
+
+FPS = 24
+PLAYER_1, PLAYER_2 = 1, 2
+
+def make_shot_events(num_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    shot_frames = np.cumsum(rng.integers(5, 80, size=num_frames // 5))
+    shot_frames = shot_frames[shot_frames < num_frames]
+    positions = [rng.uniform(0, 250, size=(len(shot_frames), 2)) for _ in range(3)]
+    return compute_shot_events(shot_frames, *positions, PLAYER_1, PLAYER_2, FPS, 0.05)
+
+def chain_graph(max_entries=16):
+    metrics = MetricGraph(max_entries)
+    metrics.set_input("values", [1, 2, 3])
+    metrics.add_metric("total", ["values"], sum)
+    metrics.add_metric("double", ["total"], lambda total: 2 * total)
+    return metrics
+
+def test_only_recomputes_when_inputs_change():
+    metrics = chain_graph()
+    assert metrics.get("double") == 12
+    assert metrics.get("double") == 12
+    assert metrics.computations == {"total": 1, "double": 1}
+
+    metrics.set_input("values", [4])
+    assert metrics.get("double") == 8
+    assert metrics.computations == {"total": 2, "double": 2}
+
+def test_set_input_with_the_same_object_recomputes():
+    metrics = chain_graph()
+    values = metrics.get("values")
+    assert metrics.get("double") == 12
+
+    values.append(5)
+    metrics.set_input("values", values)
+    assert metrics.get("double") == 22
+
+def test_redefining_a_metric_invalidates_its_dependents():
+    metrics = chain_graph()
+    assert metrics.get("double") == 12
+
+    metrics.add_metric("total", ["values"], max)
+    assert metrics.get("double") == 6
+
+def test_invalidate_recomputes_dependents():
+    metrics = chain_graph()
+    metrics.get("double")
+    metrics.invalidate("total")
+    metrics.get("double")
+    assert metrics.computations == {"total": 2, "double": 2}
+
+def test_eviction_does_not_recompute_cached_metrics():
+    metrics = chain_graph(max_entries=1)
+    for _ in range(3):
+        assert metrics.get("double") == 12
+    # total was evicted when double was cached, double is still valid
+    assert metrics.computations == {"total": 1, "double": 1}
+
+def test_new_thresholds_only_rescore():
+    num_frames = 1000
+    metrics = match_metrics(make_shot_events(num_frames), num_frames, PLAYER_1, PLAYER_2, FPS)
+    first = metrics.get("scores")
+
+    strict = {stat_name: {level: value * 2 for level, value in th.items()} for stat_name, th in thresholds.items()}
+    metrics.set_input("thresholds", strict)
+    rescored = metrics.get("scores")
+
+    assert metrics.computations == {"player_stats": 1, "max_stats": 1, "long_stats": 1, "scores": 2}
+    assert (rescored["Total_Score"] <= first["Total_Score"]).all()
+    pd.testing.assert_frame_equal(rescored, score_players(stats_to_long(metrics.get("max_stats")), strict))
+
+def test_match_metrics_max_stats():
+    num_frames = 1000
+    shot_events = make_shot_events(num_frames, seed=1)
+    metrics = match_metrics(shot_events, num_frames, PLAYER_1, PLAYER_2, FPS)
+    expected = EventPlayerStats(shot_events, num_frames, PLAYER_1, PLAYER_2, FPS).max_stats()
+    pd.testing.assert_frame_equal(metrics.get("max_stats"), expected)
+
+def test_score_metrics_match_the_saved_player_data(tmp_path):
+    num_frames = 1000
+    max_stats = EventPlayerStats(make_shot_events(num_frames, seed=2), num_frames, PLAYER_1, PLAYER_2, FPS).max_stats()
+    metrics = score_metrics(max_stats=max_stats)
+    assert metrics.get("player_data") == player_score_data(max_stats)
+
+    write_player_data(metrics.get("player_data"), str(tmp_path))
+    with open(tmp_path / f"player_{PLAYER_1}_data.json", "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved == json.loads(json.dumps(player_score_data(max_stats)[PLAYER_1]))
+
+    long_stats = stats_to_long(max_stats)
+    pd.testing.assert_frame_equal(score_metrics(long_stats=long_stats).get("scores"), metrics.get("scores"))
@@ -0,0 +1,180 @@
+import itertools
+import threading
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import player_stats_drawer_utils
+from utils.player_stats_drawer_utils import (add_player_stats_columns, get_player_stats_values,
+                                             iter_video_frames, iter_video_frames_threaded, save_video_stream,
+                                             save_video_stream_threaded, PlayerStatsOverlay, PLAYER_STATS_ROWS)
+
+PLAYER_1, PLAYER_2 = 1, 2
+
+def make_player_stats(num_frames=30, seed=0):
+    rng = np.random.default_rng(seed)
+    player_stats = pd.DataFrame({'frame_num': np.arange(num_frames)})
+    for player_id in (PLAYER_1, PLAYER_2):
+        player_stats[f'player_{player_id}_last_shot_speed'] = np.repeat(rng.uniform(20, 60, num_frames // 5), 5)
+        player_stats[f'player_{player_id}_last_player_speed'] = np.repeat(rng.uniform(0, 10, num_frames // 5), 5)
+    player_stats.loc[:4, f'player_{PLAYER_2}_last_shot_speed'] = np.nan
+    return add_player_stats_columns(player_stats, PLAYER_1, PLAYER_2, 24)
+
+def test_values_follow_the_rows_with_nan_as_zero():
+    player_stats = make_player_stats()
+    values = get_player_stats_values(player_stats, PLAYER_1, PLAYER_2)
+
+    assert values.shape == (len(player_stats), 2 * len(PLAYER_STATS_ROWS))
+    assert not np.isnan(values).any()
+    for frame_num, row in player_stats.iterrows():
+        expected = [row[f'player_{PLAYER_1}_last_shot_speed'], row[f'player_{PLAYER_2}_last_shot_speed'],
+                    row[f'player_{PLAYER_1}_last_player_speed'], row[f'player_{PLAYER_2}_last_player_speed'],
+                    row['player_1_acceleration'], row['player_2_acceleration'],
+                    row['player_1_shot_inconsistency'], row['player_2_shot_inconsistency'],
+                    row['player_1_distance_covered'], row['player_2_distance_covered'],
+                    row['player_1_rally_contribution'], row['player_2_rally_contribution']]
+        np.testing.assert_allclose(values[frame_num], np.nan_to_num(np.array(expected, dtype=np.float64)))
+
+def test_overlay_only_draws_inside_its_box():
+    frame = np.full((480, 640, 3), 200, dtype=np.uint8)
+    overlay = PlayerStatsOverlay(frame.shape)
+    drawn = overlay.draw(frame.copy(), np.arange(12, dtype=np.float64))
+
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[overlay.start_y:overlay.end_y, overlay.start_x:overlay.end_x] = False
+    assert (drawn[outside] == frame[outside]).all()
+    assert (drawn[~outside] != frame[~outside]).any()
+
+def test_overlay_matches_drawing_directly():
+    frame = np.random.default_rng(0).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    values = np.linspace(0, 50, 12)
+    overlay = PlayerStatsOverlay(frame.shape)
+    drawn = overlay.draw(frame.copy(), values)
+
+    expected = frame.copy()
+    x, y = overlay.start_x, overlay.start_y
+    roi = expected[y:overlay.end_y, x:overlay.end_x]
+    roi[:] = cv2.addWeighted(roi, 1 - overlay.alpha, np.zeros_like(roi), overlay.alpha, 0)
+    cv2.putText(expected, "Player 1", (x + 110, y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    cv2.putText(expected, "Player 2", (x + 230, y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    for row, (label, _, value_format) in enumerate(PLAYER_STATS_ROWS):
+        row_y = y + 55 + row * overlay.row_height
+        cv2.putText(expected, label, (x + 10, row_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        for column, value in ((110, values[2 * row]), (230, values[2 * row + 1])):
+            cv2.putText(expected, value_format.format(value), (x + column, row_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+    np.testing.assert_array_equal(drawn, expected)
+
+def test_cached_labels_are_copied_over_the_box():
+    frame = np.random.default_rng(1).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    overlay = PlayerStatsOverlay(frame.shape)
+    # Binary labels (OpenCV 4 text) take the cached path on any OpenCV version
+    overlay.labels = np.where(overlay.labels > 127, 255, 0).astype(np.uint8)
+    overlay.labels_mask = overlay.labels.any(axis=2).astype(np.uint8) * 255
+    overlay.cached_labels = True
+
+    box = (slice(overlay.start_y, overlay.end_y), slice(overlay.start_x, overlay.end_x))
+    darkened = (frame[box] * (1 - overlay.alpha)).round().astype(np.uint8)
+    expected = np.where(overlay.labels_mask[..., None] > 0, overlay.labels, darkened)
+
+    drawn = overlay.draw(frame.copy(), np.zeros(12))
+    # Only compare the label pixels, the values are drawn on top
+    labelled = overlay.labels_mask > 0
+    np.testing.assert_array_equal(drawn[box][labelled], expected[labelled])
+
+def make_video_frames(num_frames=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(64, 96, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+def run_with_timeout(function, timeout=10):
+    # Fails the test instead of hanging it when a queue deadlocks
+    result = {}
+
+    def target():
+        try:
+            result["value"] = function()
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "timed out, the queue never unblocked"
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+def video_threads_alive():
+    return [t.name for t in threading.enumerate() if t.name in ("video-decoder", "video-encoder") and t.is_alive()]
+
+def test_threaded_encoder_writes_the_same_file(tmp_path):
+    frames = make_video_frames()
+    sequential, threaded = tmp_path / "sequential.avi", tmp_path / "threaded.avi"
+
+    assert save_video_stream(iter(frames), str(sequential)) == len(frames)
+    assert save_video_stream_threaded(iter(frames), str(threaded), queue_size=4) == len(frames)
+    assert threaded.read_bytes() == sequential.read_bytes()
+
+def test_threaded_decoder_yields_the_same_frames(tmp_path):
+    video_path = str(tmp_path / "input.avi")
+    save_video_stream(make_video_frames(), video_path)
+
+    expected = list(iter_video_frames(video_path))
+    decoded = list(iter_video_frames_threaded(video_path, queue_size=4))
+    assert len(decoded) == len(expected)
+    for frame, expected_frame in zip(decoded, expected):
+        np.testing.assert_array_equal(frame, expected_frame)
+
+def test_closing_the_threaded_decoder_early(tmp_path):
+    video_path = str(tmp_path / "input.avi")
+    save_video_stream(make_video_frames(), video_path)
+
+    frames = iter_video_frames_threaded(video_path, queue_size=2)
+    first = next(frames)
+    # The decoder is blocked on the full queue until close() stops it
+    run_with_timeout(frames.close)
+    np.testing.assert_array_equal(first, next(iter_video_frames(video_path)))
+    assert video_threads_alive() == []
+
+def test_stopping_the_threaded_encoder_early(tmp_path):
+    output_path = tmp_path / "output.avi"
+    frames = make_video_frames()
+    written = save_video_stream_threaded(itertools.islice(iter(frames), 5), str(output_path), queue_size=2)
+    assert written == 5
+    assert len(list(iter_video_frames(str(output_path)))) == 5
+    assert video_threads_alive() == []
+
+def failing_after(frames, num_frames):
+    for frame in frames[:num_frames]:
+        yield frame
+    raise ValueError("codec failed")
+
+def test_decoder_error_reaches_the_consumer(monkeypatch):
+    frames = make_video_frames()
+    monkeypatch.setattr(player_stats_drawer_utils, "iter_video_frames", lambda video_path: failing_after(frames, 3))
+
+    received = []
+
+    def consume():
+        for frame in iter_video_frames_threaded("input.avi", queue_size=1):
+            received.append(frame)
+
+    with pytest.raises(ValueError, match="codec failed"):
+        run_with_timeout(consume)
+    assert len(received) == 3
+    assert video_threads_alive() == []
+
+def test_encoder_error_reaches_the_producer(monkeypatch, tmp_path):
+    def failing_save(output_video_frames, output_video_path, fps=24):
+        for frame, _ in zip(output_video_frames, range(3)):
+            pass
+        raise ValueError("codec failed")
+
+    monkeypatch.setattr(player_stats_drawer_utils, "save_video_stream", failing_save)
+    # Many more frames than the queue holds, so the producer would block forever
+    frames = make_video_frames(100)
+    with pytest.raises(ValueError, match="codec failed"):
+        run_with_timeout(lambda: save_video_stream_threaded(iter(frames), str(tmp_path / "output.avi"), queue_size=1))
+    assert video_threads_alive() == []
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from rallies import segment_rallies
+
+# 10 fps keeps the thresholds in round frames: a 30 frame max shot gap,
+# 10 frames of tail and at most 10 missing-ball frames
+FPS = 10
+NUM_FRAMES = 200
+SHOT_FRAMES = [5, 20, 50, 81, 100, 190]
+SHOOTERS = [1, 2, 1, 2, 1]
+
+def make_shot_events():
+    # compute_shot_events has one event per pair of shots, none for the last one
+    return {'frame_num': np.array(SHOT_FRAMES[:-1]), 'shooter': np.array(SHOOTERS)}
+
+def make_index(**kwargs):
+    return segment_rallies(SHOT_FRAMES, NUM_FRAMES, FPS, make_shot_events(), **kwargs)
+
+def as_table(index):
+    return [(rally['start_frame'], rally['end_frame'], rally['shot_frames'], rally['shooters'])
+            for rally in (index[rally_id] for rally_id in range(len(index)))]
+
+def test_segments_by_hand():
+    index = make_index()
+    # 20 -> 50 is exactly the 30 frame gap and stays in the rally, 50 -> 81 is 31.
+    # Each rally ends 10 frames after its last shot, the last one at the end of the video.
+    assert as_table(index) == [
+        (5, 60, [5, 20, 50], [1, 2, 1]),
+        (81, 110, [81, 100], [2, 1]),
+        (190, 199, [190], [-1]),
+    ]
+    assert index.shot_offsets.tolist() == [0, 3, 5, 6]
+    assert index.num_shots.tolist() == [3, 2, 1]
+    np.testing.assert_allclose(index.durations, [5.6, 3.0, 1.0])
+
+def test_tail_stops_at_the_next_rally():
+    index = make_index(tail=5.0)
+    assert index.end_frames.tolist() == [80, 150, 199]
+
+@pytest.mark.parametrize("missing, expected", [
+    # 10 missing frames between shots 5 and 20 are still in play
+    ((7, 16), [(5, 60, [5, 20, 50]), (81, 104, [81, 100]), (190, 199, [190])]),
+    # 11 split the rally and end the first one at the last frame the ball was seen
+    ((7, 17), [(5, 6, [5]), (20, 60, [20, 50]), (81, 104, [81, 100]), (190, 199, [190])]),
+])
+def test_missing_ball_splits_and_ends_rallies(missing, expected):
+    ball_visible = np.ones(NUM_FRAMES, dtype=bool)
+    ball_visible[missing[0]:missing[1] + 1] = False
+    # Out of play after shot 100
+    ball_visible[105:131] = False
+    index = make_index(ball_visible=ball_visible)
+    assert [row[:3] for row in as_table(index)] == expected
+
+def test_no_shots():
+    index = segment_rallies([], NUM_FRAMES, FPS)
+    assert len(index) == 0
+    assert index.shot_offsets.tolist() == [0]
+    assert index.query().tolist() == []
+    assert index.query(hitter=1).tolist() == []
+    assert index.rally_at(5) is None
+
+def test_one_shot():
+    # Duplicates and frames outside the video are dropped
+    index = segment_rallies([42, 42, -3, 250], NUM_FRAMES, FPS)
+    assert as_table(index) == [(42, 52, [42], [-1])]
+    assert index.query(min_shots=2).tolist() == []
+    assert index.query(hitter=-1).tolist() == [0]
+    assert index.rally_at(52) == 0 and index.rally_at(53) is None
+
+@pytest.mark.parametrize("conditions, expected", [
+    ({}, [0, 1, 2]),
+    ({'min_shots': 2}, [0, 1]),
+    ({'max_shots': 1}, [2]),
+    ({'min_duration': 3.0}, [0, 1]),
+    ({'max_duration': 3.0}, [1, 2]),
+    ({'start_frame': 81}, [1, 2]),
+    ({'end_frame': 110}, [0, 1]),
+    ({'segment': 'second half'}, [1, 2]),
+    ({'segment': 'second half', 'end_frame': 150}, [1]),
+    ({'hitter': 1}, [0, 1]),
+    ({'hitter': 2}, [0, 1]),
+    ({'hitter': -1}, [2]),
+    ({'hitter': 3}, []),
+    ({'min_shots': 2, 'hitter': 2, 'start_frame': 60}, [1]),
+])
+def test_query(conditions, expected):
+    index = make_index(segments={'second half': (80, 199)})
+    assert index.query(**conditions).tolist() == expected
+
+def test_hitter_counts_match_a_loop():
+    # np.add.reduceat over the shot offsets against counting each rally's shots
+    rng = np.random.default_rng(0)
+    shot_frames = np.cumsum(rng.integers(5, 60, size=80))
+    shot_events = {'frame_num': shot_frames, 'shooter': rng.integers(1, 3, size=len(shot_frames))}
+    index = segment_rallies(shot_frames, int(shot_frames[-1]) + 1, FPS, shot_events)
+    for hitter in (1, 2):
+        expected = [rally_id for rally_id in range(len(index)) if hitter in index[rally_id]['shooters']]
+        assert 0 < len(expected) < len(index)
+        assert index.query(hitter=hitter).tolist() == expected
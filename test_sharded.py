@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+import pytest
+
+from sharded import plan_chunks, match_tracks, stitch_chunks
+from utils.player_stats_drawer_utils import iter_video_range
+
+def make_tracks(num_frames):
+    # Two players crossing the frame and a ball, as the trackers return them
+    players = [{1: [i, 0.0, i + 50.0, 100.0], 2: [300.0 - i, 200.0, 350.0 - i, 300.0]} for i in range(num_frames)]
+    ball = [{1: [i, i, i + 5.0, i + 5.0]} for i in range(num_frames)]
+    return players, ball
+
+def run_chunks(players, ball, chunks, relabel):
+    # Detections of each chunk with the track ids the tracker might have given them
+    results = []
+    for chunk, (start, end) in enumerate(chunks):
+        end = len(players) - 1 if end is None else end
+        mapping = relabel(chunk)
+        results.append((start,
+                        [{mapping[track_id]: bbox for track_id, bbox in frame.items()} for frame in players[start:end + 1]],
+                        ball[start:end + 1]))
+    return results
+
+def test_plan_chunks():
+    assert plan_chunks(100, 30, 5) == [(0, 34), (30, 64), (60, 94), (90, None)]
+    assert plan_chunks(60, 30, 5) == [(0, 34), (30, None)]
+    assert plan_chunks(10, 30, 5) == [(0, None)]
+    # Header without a frame count: one chunk read to the end
+    assert plan_chunks(0, 30, 5) == [(0, None)]
+
+def test_plan_chunks_rejects_zero_overlap():
+    with pytest.raises(ValueError):
+        plan_chunks(100, 30, 0)
+
+def test_match_tracks_by_overlap_iou():
+    players, _ = make_tracks(10)
+    relabelled = [{20: frame[2], 10: frame[1], 99: [500.0, 500.0, 510.0, 510.0]} for frame in players]
+    assert match_tracks(players, relabelled) == {10: 1, 20: 2}
+
+def test_stitch_restores_ids_across_chunks():
+    players, ball = make_tracks(100)
+    chunks = plan_chunks(100, 30, 6)
+    results = run_chunks(players, ball, chunks,
+                         lambda chunk: {1: 1, 2: 2} if chunk == 0 else {1: 10 + chunk, 2: 20 + chunk})
+
+    stitched_players, stitched_ball = stitch_chunks(results)
+    assert stitched_players == players
+    assert stitched_ball == ball
+
+def test_stitch_is_sized_from_decoded_frames():
+    # The header said 80 frames but the stream decodes to 100, the last chunk has the rest
+    players, ball = make_tracks(100)
+    chunks = plan_chunks(80, 30, 6)
+    assert chunks[-1][1] is None
+    results = run_chunks(players, ball, chunks, lambda chunk: {1: 1, 2: 2})
+    # A chunk planned past the real end of the stream comes back empty
+    results.append((120, [], []))
+
+    stitched_players, stitched_ball = stitch_chunks(results)
+    assert len(stitched_players) == len(stitched_ball) == 100
+    assert stitched_players == players
+
+def test_new_track_gets_a_new_id():
+    players, ball = make_tracks(70)
+    results = run_chunks(players, ball, plan_chunks(70, 30, 6), lambda chunk: {1: 1, 2: 2})
+    # A third person only seen after the first overlap
+    for frame in results[1][1][10:]:
+        frame[7] = [600.0, 600.0, 650.0, 700.0]
+
+    stitched_players, _ = stitch_chunks(results)
+    assert set(stitched_players[45]) == {1, 2, 3}
+
+def test_last_chunk_reads_to_the_end_of_the_stream(tmp_path):
+    path = str(tmp_path / "video.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 24, (32, 32))
+    for _ in range(40):
+        writer.write(np.zeros((32, 32, 3), dtype=np.uint8))
+    writer.release()
+
+    assert sum(1 for _ in iter_video_range(path, 30, None)) == 10
+    assert sum(1 for _ in iter_video_range(path, 10, 19)) == 10
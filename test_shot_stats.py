@@ -0,0 +1,73 @@
+from copy import deepcopy
+
+import numpy as np
+import pandas as pd
+
+from shot_stats import STAT_NAMES, gather_shot_positions, compute_shot_events, build_player_stats_df
+
+FPS = 24
+PLAYER_1, PLAYER_2 = 1, 2
+
+def make_positions(num_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    ball = [{1: tuple(rng.uniform(0, 250, 2))} for _ in range(num_frames)]
+    players = [{PLAYER_1: tuple(rng.uniform(0, 250, 2)), PLAYER_2: tuple(rng.uniform(0, 250, 2))}
+               for _ in range(num_frames)]
+    return ball, players
+
+def reference_player_stats(ball_shot_frames, ball, players, num_frames, meters_per_pixel):
+    # The per-shot loop main.py used to run, deepcopy rows then merge + ffill
+    def distance(a, b):
+        return np.hypot(a[0] - b[0], a[1] - b[1])
+
+    row = {'frame_num': 0}
+    for player_id in (PLAYER_1, PLAYER_2):
+        for stat_name in STAT_NAMES:
+            row[f'player_{player_id}_{stat_name}'] = 0
+    rows = [row]
+
+    for start_frame, end_frame in zip(ball_shot_frames[:-1], ball_shot_frames[1:]):
+        seconds = (end_frame - start_frame) / FPS
+        shot_speed = distance(ball[start_frame][1], ball[end_frame][1]) * meters_per_pixel / seconds * 3.6
+        shooter = min([PLAYER_1, PLAYER_2], key=lambda player_id: distance(players[start_frame][player_id],
+                                                                            ball[start_frame][1]))
+        opponent = PLAYER_2 if shooter == PLAYER_1 else PLAYER_1
+        opponent_speed = (distance(players[start_frame][opponent], players[end_frame][opponent])
+                          * meters_per_pixel / seconds * 3.6)
+
+        row = deepcopy(rows[-1])
+        row['frame_num'] = start_frame
+        row[f'player_{shooter}_number_of_shots'] += 1
+        row[f'player_{shooter}_total_shot_speed'] += shot_speed
+        row[f'player_{shooter}_last_shot_speed'] = shot_speed
+        row[f'player_{opponent}_total_player_speed'] += opponent_speed
+        row[f'player_{opponent}_last_player_speed'] = opponent_speed
+        rows.append(row)
+
+    frames_df = pd.DataFrame({'frame_num': list(range(num_frames))})
+    return pd.merge(frames_df, pd.DataFrame(rows), on='frame_num', how='left').ffill()
+
+def test_build_player_stats_df_matches_the_per_shot_loop():
+    num_frames = 400
+    ball_shot_frames = [5, 40, 41, 90, 150, 220, 300, 390]
+    ball, players = make_positions(num_frames)
+
+    positions = gather_shot_positions(ball_shot_frames, ball, players, PLAYER_1, PLAYER_2)
+    shot_events = compute_shot_events(ball_shot_frames, *positions, PLAYER_1, PLAYER_2, FPS, 0.05)
+    player_stats = build_player_stats_df(shot_events, num_frames, PLAYER_1, PLAYER_2)
+    expected = reference_player_stats(ball_shot_frames, ball, players, num_frames, 0.05)
+
+    for column in expected.columns:
+        np.testing.assert_allclose(player_stats[column].to_numpy(dtype=np.float64),
+                                   expected[column].to_numpy(dtype=np.float64), rtol=1e-12, err_msg=column)
+
+def test_fewer_than_two_shots_has_no_events():
+    num_frames = 50
+    ball, players = make_positions(num_frames)
+    positions = gather_shot_positions([10], ball, players, PLAYER_1, PLAYER_2)
+    shot_events = compute_shot_events([10], *positions, PLAYER_1, PLAYER_2, FPS)
+
+    assert len(shot_events['frame_num']) == 0
+    player_stats = build_player_stats_df(shot_events, num_frames, PLAYER_1, PLAYER_2)
+    assert len(player_stats) == num_frames
+    assert (player_stats[f'player_{PLAYER_1}_number_of_shots'] == 0).all()
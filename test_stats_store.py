@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app_rep import INVERTED_STATS, thresholds
+from metrics import score_metrics
+from shot_stats import build_player_stats_df, compute_shot_events
+from stats_store import COUNT_STATS, SLOT_STATS, MatchStatsStore
+from utils.player_stats_drawer_utils import add_player_stats_columns
+
+MAX_GAME_REPORT = os.path.join(os.path.dirname(__file__), "max_game_report.csv")
+FPS = 24
+# Track ids, not slots, so the player_1_ / player_2_ slot columns have to be mapped
+PLAYER_1, PLAYER_2 = 3, 7
+
+def make_player_stats(num_frames=300, seed=0):
+    rng = np.random.default_rng(seed)
+    shot_frames = np.cumsum(rng.integers(10, 60, size=12))
+    positions = [rng.uniform(0, 20, size=(len(shot_frames), 2)) for _ in range(3)]
+    shot_events = compute_shot_events(shot_frames, *positions, PLAYER_1, PLAYER_2, FPS)
+    player_stats = build_player_stats_df(shot_events, num_frames, PLAYER_1, PLAYER_2)
+    return add_player_stats_columns(player_stats, PLAYER_1, PLAYER_2, FPS)
+
+def test_round_trip(tmp_path):
+    max_stats = pd.read_csv(MAX_GAME_REPORT, index_col=0)
+    player_stats = make_player_stats()
+    store = MatchStatsStore(str(tmp_path / "store"))
+    store.append("match_1", max_stats, player_stats, PLAYER_1, PLAYER_2)
+    assert store.matches() == ["match_1"]
+
+    stored = store.load("max_stats")
+    assert stored["player"].tolist() == [1, 2]
+    assert stored["player"].dtype == np.int32
+    for column in stored.columns.difference(["match", "player"]):
+        assert stored[column].dtype == np.float64
+        np.testing.assert_array_equal(stored[column], max_stats[[f"player_1_{column}", f"player_2_{column}"]].iloc[0])
+
+    frames = store.load("frame_stats", players=[PLAYER_2])
+    assert frames["frame_num"].tolist() == player_stats["frame_num"].tolist()
+    assert frames["frame_num"].dtype == np.int32
+    for stat_name in frames.columns.difference(["match", "player", "frame_num"]):
+        expected_dtype = np.int32 if stat_name in COUNT_STATS else np.float32
+        assert frames[stat_name].dtype == expected_dtype
+        # Slot columns are named player_2_ for the second player, the rest by track id
+        source = f"player_2_{stat_name}" if stat_name in SLOT_STATS else f"player_{PLAYER_2}_{stat_name}"
+        np.testing.assert_allclose(frames[stat_name], player_stats[source].fillna(0), rtol=1e-6)
+    assert SLOT_STATS <= set(frames.columns)
+
+def make_threshold_stats():
+    # Player 1 just misses every High threshold (by less than float32 can resolve),
+    # player 2 sits exactly on it. NaN counts score 0.
+    row = {}
+    for stat_name, levels in thresholds.items():
+        miss = 1e-7 if stat_name in INVERTED_STATS else -1e-7
+        row[f"player_1_{stat_name}"] = [levels["High"] + miss]
+        row[f"player_2_{stat_name}"] = [float(levels["High"])]
+    row["player_2_total_shots"] = [np.nan]
+    return pd.DataFrame(row)
+
+def test_threshold_scores_match_the_csv_path(tmp_path):
+    max_stats = make_threshold_stats()
+    csv_path = tmp_path / "max_game_report.csv"
+    max_stats.to_csv(csv_path)
+    expected = score_metrics(max_stats=pd.read_csv(csv_path, index_col=0)).get("scores")
+
+    store = MatchStatsStore(str(tmp_path / "store"))
+    store.append("match_1", max_stats)
+    scores = store.scores()
+
+    columns = ["player", "Total_Score", "Score_Percentage"]
+    pd.testing.assert_frame_equal(scores[columns].reset_index(drop=True),
+                                  expected[columns].reset_index(drop=True), check_dtype=False)
+    # Player 1 is one point short on every stat
+    assert scores["Total_Score"].tolist() == [2 * len(thresholds), 3 * len(thresholds) - 3]
+
+def test_narrower_files_are_widened(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    store = MatchStatsStore(str(tmp_path / "store"))
+    # A max_stats file as older versions wrote it: int32 counts, float32 stats
+    os.makedirs(store.table_path("max_stats"))
+    pq.write_table(pa.table({"match": ["old"], "player": pa.array([1], pa.int32()),
+                             "max_speed": pa.array([9.1], pa.float32()),
+                             "total_shots": pa.array([2], pa.int32())}),
+                   os.path.join(store.table_path("max_stats"), "part-old.parquet"))
+    store.append("new", pd.DataFrame({"player_1_max_speed": [9.1], "player_1_total_shots": [np.nan]}))
+
+    stored = store.load("max_stats").sort_values("match").reset_index(drop=True)
+    assert stored["match"].tolist() == ["new", "old"]
+    assert stored["max_speed"].dtype == np.float64 and stored["total_shots"].dtype == np.float64
+    assert stored.loc[0, "max_speed"] == 9.1 and np.isnan(stored.loc[0, "total_shots"])